@@ -0,0 +1,8 @@
+import api.asgi.server as server
+
+# Servidores ASGI importam `app` (hypercorn asgi:app); executado direto,
+# sobe o servidor de desenvolvimento do Quart
+if __name__ == "__main__":
+    server.run()
+else:
+    app = server.create_app()
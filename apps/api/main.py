@@ -1,4 +1,10 @@
+import os
 import api.server as server
 
+# Em produção (FLASK_ENV=production, como nos containers) sobe o gunicorn;
+# fora dela, o servidor de desenvolvimento do Flask
 if __name__ == "__main__":
-    server.run()
+    if os.getenv("FLASK_ENV") == "production":
+        server.run_production()
+    else:
+        server.run()
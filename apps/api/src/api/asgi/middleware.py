@@ -0,0 +1,148 @@
+import asyncio
+import os
+from functools import wraps
+
+import httpx
+from quart import current_app, jsonify, request
+from quart.wrappers.response import DataBody
+
+from api.middleware import auth
+from api.middleware.compression import create_compressor
+from api.middleware.conditional import (
+    DATA_VERSION_EXTENSION,
+    SAFE_METHODS,
+    compute_etag,
+    find_matching_etag,
+)
+
+# Async counterparts of api.middleware for the Quart app. Token caching,
+# ETags and compression settings are shared with the Flask app; only the
+# I/O (introspection call, request body, response body) is awaited here.
+
+_http_client = None
+
+
+def http_client():
+    """The process' httpx.AsyncClient, created on first use inside the event loop."""
+    global _http_client
+    if _http_client is None:
+        pool_size = int(os.getenv("AUTH_POOL_SIZE", "10"))
+        _http_client = httpx.AsyncClient(
+            timeout=auth.AUTH_INTROSPECT_TIMEOUT,
+            limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size),
+        )
+    return _http_client
+
+
+async def close_http_client():
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
+
+async def introspect(token):
+    """`auth.introspect` over httpx, sharing the same token cache and stats."""
+    key, cached = auth.cached_introspection(token)
+    if cached is not None:
+        return cached
+
+    try:
+        response = await http_client().post(auth.AUTH_INTROSPECT_URL, json={"token": token})
+    except Exception:
+        auth.count_introspection_error()
+        raise
+
+    return auth.store_introspection(key, response)
+
+
+def require_auth(f):
+    @wraps(f)
+    async def decorated(*args, **kwargs):
+        if auth.auth_bypassed():
+            return await f(*args, **kwargs)
+
+        token = auth.bearer_token(request.headers.get("Authorization", None))
+        if not token:
+            return jsonify({"error": "Missing token"}), 403
+        try:
+            if auth.AUTH_MODE == "local":
+                auth.get_local_verifier().verify(token)
+            elif not await introspect(token):
+                return jsonify({"error": "Token introspection failed"}), 403
+
+        except Exception as e:
+            return jsonify({"error": str(e)}), 403
+        return await f(*args, **kwargs)
+    return decorated
+
+
+def not_modified(etag: str):
+    response = current_app.response_class(b"", status=304)
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = "no-cache"
+    return response
+
+
+def precondition_failed():
+    return current_app.response_class(b"", status=412)
+
+
+def conditional(f):
+    """
+    api.middleware.conditional.conditional for async views: 304 and ETags
+    only for GET/HEAD, 412 for a matching If-None-Match on other methods.
+    """
+    @wraps(f)
+    async def decorated(*args, **kwargs):
+        watcher = current_app.extensions.get(DATA_VERSION_EXTENSION)
+        safe = request.method in SAFE_METHODS
+        if watcher is None or watcher.version is None or not (safe or request.if_none_match):
+            return await f(*args, **kwargs)
+
+        etag = compute_etag(
+            watcher.version, request.method, request.path, request.query_string,
+            await request.get_data())
+        matched = find_matching_etag(request.if_none_match, etag)
+        if matched is not None:
+            return not_modified(matched) if safe else precondition_failed()
+
+        response = await current_app.make_response(await f(*args, **kwargs))
+        if safe and response.status_code == 200 and "ETag" not in response.headers:
+            response.set_etag(etag)
+            response.headers["Cache-Control"] = "no-cache"
+        return response
+    return decorated
+
+
+def init_compression(app):
+    """
+    Registers the same compression as api.middleware.compression (same
+    environment variables). Streamed bodies are left alone and compression
+    runs in a worker thread, as zlib and friends release the GIL.
+    """
+    compressor = create_compressor()
+    if compressor is None:
+        return None
+
+    @app.after_request
+    async def compress(response):
+        if (
+            not compressor.encodings
+            or not isinstance(response.response, DataBody)
+            or not compressor.compressible(response)
+        ):
+            return response
+
+        encoding = compressor.negotiate(response, request.accept_encodings)
+        if encoding is None:
+            return response
+
+        cache_key = compressor.cache_key(response, encoding)
+        body = compressor.cached_body(cache_key)
+        if body is None:
+            body = await asyncio.to_thread(compressor.compress, await response.get_data(), encoding)
+            compressor.store(cache_key, body)
+        return compressor.finish(response, body, encoding, cache_key)
+
+    return compressor
@@ -0,0 +1 @@
+from ._index import create_blueprints
@@ -0,0 +1,21 @@
+from api.models.dashboard_model import AsyncDashboardModel
+from api.models.yield_predict_model import AsyncYieldPredictModel
+from . import yield_routes, dashboard_routes, yield_predict_routes, terms_routes
+
+
+def create_blueprints(db, sync_db):
+    """
+    Blueprints do servidor ASGI. `db` é o banco do AsyncMongoClient, usado
+    nas consultas das rotas; `sync_db` atende o que continua síncrono e é
+    chamado fora do event loop (escritas de yield, catálogo de filtros e
+    cache do dashboard no backend "mongo").
+    """
+    dashboard_model = AsyncDashboardModel(db)
+    yield_predict_model = AsyncYieldPredictModel(db)
+
+    return [
+        yield_routes.create_blueprint(db, sync_db),
+        dashboard_routes.create_blueprint(db, sync_db, dashboard_model),
+        yield_predict_routes.create_blueprint(db, yield_predict_model),
+        terms_routes.create_terms_blueprint(db),
+    ]
@@ -0,0 +1,110 @@
+import asyncio
+from pymongo.errors import PyMongoError
+from quart import Blueprint, Response, jsonify, request
+from api.asgi.middleware import conditional, not_modified, require_auth
+from api.cache import MongoCache
+from api.middleware.conditional import find_matching_etag
+from api.models.dashboard_model import AsyncDashboardModel, DashboardModel
+from api.routes.filters import read_filters, read_query_filters, validate_filters
+from api.service.dashboard_cache import create_dashboard_cache, make_cache_key
+from api.service.dashboard_service import build_dashboard_payload, get_filtered_yield_data_async
+from api.service.filter_catalog import create_filter_catalog
+from api.warmup import add_warmup
+
+
+def create_blueprint(db, sync_db, model=None):
+    model = model or AsyncDashboardModel(db)
+    cache = create_dashboard_cache(sync_db)
+    # O catálogo é carregado uma vez, com o modelo síncrono, fora do event loop
+    filter_catalog = create_filter_catalog(sync_db, DashboardModel(sync_db))
+
+    # O backend "mongo" do cache usa o cliente síncrono
+    blocking_cache = isinstance(cache, MongoCache)
+
+    async def cache_call(method, *args):
+        if blocking_cache:
+            return await asyncio.to_thread(method, *args)
+        return method(*args)
+
+    dashboard_blueprint = Blueprint(
+        'dashboard', __name__, url_prefix="/dashboard")
+
+    async def dashboard_body(filters):
+        """Corpo JSON do dashboard para os filtros; respostas iguais vêm do cache"""
+        cache_key = make_cache_key(**filters)
+        body = await cache_call(cache.get, cache_key)
+        if body is None:
+            results = await get_filtered_yield_data_async(**filters, model=model)
+            body = await jsonify(build_dashboard_payload(results)).get_data()
+            await cache_call(cache.set, cache_key, body)
+        return body
+
+    @dashboard_blueprint.record_once
+    def register_warmup(state):
+        add_warmup(state.app, "catálogo de filtros", lambda: asyncio.to_thread(filter_catalog.get))
+        add_warmup(state.app, "dashboard", lambda: dashboard_body(read_filters({})))
+
+    @dashboard_blueprint.route('/', methods=['OPTIONS'])
+    async def options():
+        return '', 200
+
+    async def dashboard_response(load_filters):
+        try:
+            filters = await load_filters()
+
+            # Validação básica de tipos
+            error = validate_filters(filters)
+            if error:
+                return jsonify({"error": error}), 400
+
+            body = await dashboard_body(filters)
+            return Response(body, mimetype="application/json"), 200
+
+        except ValueError as e:
+            return jsonify({
+                "error": "Dados inválidos",
+                "details": str(e)
+            }), 400
+        except Exception as e:
+            return jsonify({
+                "error": "Erro ao processar requisição",
+                "details": str(e)
+            }), 500
+
+    @dashboard_blueprint.route("/", methods=["GET"])
+    @require_auth
+    @conditional
+    async def get_yield_data_by_query():
+        # Forma GET, com os filtros na query string, revalidável com If-None-Match
+        async def load_filters():
+            return read_query_filters(request.args)
+        return await dashboard_response(load_filters)
+
+    @dashboard_blueprint.route("/", methods=["POST"])
+    @require_auth
+    @conditional
+    async def get_yield_data():
+        if not request.is_json:
+            return jsonify({"error": "O corpo da requisição deve ser JSON"}), 400
+
+        async def load_filters():
+            return read_filters(await request.get_json())
+        return await dashboard_response(load_filters)
+
+    @dashboard_blueprint.route("/filters", methods=["GET"])
+    @require_auth
+    async def get_filters():
+        try:
+            body, etag = await asyncio.to_thread(filter_catalog.get)
+        except PyMongoError as e:
+            print(f"Erro ao carregar catálogo de filtros: {str(e)}")
+            return jsonify({"error": "Erro ao consultar filtros"}), 503
+        matched = find_matching_etag(request.if_none_match, etag)
+        if matched is not None:
+            return not_modified(matched)
+        response = Response(body, mimetype="application/json")
+        response.set_etag(etag)
+        response.headers["Cache-Control"] = "no-cache"
+        return response
+
+    return dashboard_blueprint
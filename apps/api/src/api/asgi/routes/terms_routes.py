@@ -0,0 +1,157 @@
+from datetime import datetime
+from quart import Blueprint, jsonify, request
+from api.asgi.middleware import require_auth
+from api.service.terms_service import compliance
+
+
+def create_terms_blueprint(db):
+    assert db is not None
+
+    terms_collection = db.get_collection('terms_of_use_collection')
+    user_acceptance_collection = db.get_collection('user_acceptance_collection')
+    assert terms_collection is not None
+    assert user_acceptance_collection is not None
+
+    terms_blueprint = Blueprint('terms', __name__, url_prefix="/terms")
+
+    @terms_blueprint.route('/new', methods=['POST'])
+    @require_auth
+    async def create_terms():
+        data = await request.get_json()
+
+        required_fields = ['text', 'status', 'topics']
+        if not all(field in data for field in required_fields):
+            return jsonify({'error': 'Campos obrigatórios ausentes'}), 400
+
+        inserted = await terms_collection.insert_one(data)
+        return jsonify({'message': 'Termo criado com sucesso', 'id': str(inserted.inserted_id)}), 201
+
+    @terms_blueprint.route('/', methods=['GET'])
+    @require_auth
+    async def list_terms():
+        terms = await terms_collection.find().to_list()
+        return jsonify(terms), 200
+
+    @terms_blueprint.route('/user/<user_id>', methods=['GET'])
+    @require_auth
+    async def get_user_acceptance(user_id):
+        acceptance = await user_acceptance_collection.find_one({'user_id': user_id})
+
+        if not acceptance:
+            return jsonify({'message': 'Nenhuma aceitação encontrada para este usuário'}), 404
+
+        return jsonify(acceptance), 200
+
+    @terms_blueprint.route('/user/accept', methods=['POST'])
+    @require_auth
+    async def create_user_acceptance():
+        data = await request.get_json()
+
+        required_fields = ['user_id', 'topics']
+        if not all(field in data for field in required_fields):
+            return jsonify({'error': 'Campos obrigatórios ausentes'}), 400
+
+        existing = await user_acceptance_collection.find_one({'user_id': data['user_id']})
+        if existing:
+            return jsonify({'error': 'Usuário já possui uma aceitação registrada'}), 400
+
+        result = await user_acceptance_collection.insert_one({
+            'user_id': data['user_id'],
+            'topics': data['topics'],
+            'created_at': datetime.utcnow()
+        })
+
+        if not result.inserted_id:
+            return jsonify({'error': 'Falha ao registrar aceitação'}), 500
+
+        return jsonify({
+            'message': 'Aceitação registrada com sucesso',
+            'id': str(result.inserted_id)
+        }), 201
+
+    @terms_blueprint.route('/active', methods=['GET'])
+    @require_auth
+    async def get_active_term():
+        active_term = await terms_collection.find_one({'status': 'ativo'})
+
+        if not active_term:
+            return jsonify({'message': 'Nenhum termo ativo encontrado'}), 404
+
+        return jsonify(active_term), 200
+
+    # Inativa os termos antigos e limpa as aceitações
+    @terms_blueprint.route('/new-version', methods=['POST'])
+    @require_auth
+    async def create_new_term_version():
+        data = await request.get_json()
+
+        required_fields = ['text', 'topics']
+        if not all(field in data for field in required_fields):
+            return jsonify({'error': 'Campos obrigatórios ausentes'}), 400
+
+        await terms_collection.update_many(
+            {'status': 'ativo'},
+            {'$set': {'status': 'inativo'}}
+        )
+
+        await user_acceptance_collection.delete_many({})
+
+        term_data = {
+            'text': data['text'],
+            'status': 'ativo',
+            'topics': data['topics'],
+            'created_at': datetime.utcnow()
+        }
+
+        if 'version' in data:
+            term_data['version'] = data['version']
+
+        result = await terms_collection.insert_one(term_data)
+
+        return jsonify({
+            'message': 'Nova versão de termo criada com sucesso',
+            'id': str(result.inserted_id)
+        }), 201
+
+    @terms_blueprint.route('/user/update/<user_id>', methods=['PUT'])
+    @require_auth
+    async def update_acceptance(user_id):
+        data = await request.get_json()
+
+        if 'topics' not in data:
+            return jsonify({'error': 'Campo topics é obrigatório'}), 400
+
+        try:
+            result = await user_acceptance_collection.update_one(
+                {"user_id": str(user_id)},
+                {"$set": {"topics": data['topics']}}
+            )
+            success = result.matched_count > 0
+        except Exception as e:
+            print(f"Erro ao atualizar aceitação: {e}")
+            success = False
+
+        if not success:
+            return jsonify({'error': 'Falha ao atualizar aceitação'}), 400
+
+        return jsonify({'message': 'Aceitação atualizada com sucesso'}), 200
+
+    @terms_blueprint.route('/user/compliance/<user_id>', methods=['GET'])
+    @require_auth
+    async def check_user_compliance(user_id):
+        active_term = await terms_collection.find_one({'status': 'ativo'})
+        user_acceptance = await user_acceptance_collection.find_one(
+            {'user_id': user_id},
+            sort=[('accepted_at', -1)]
+        )
+
+        compliant, non_compliant_topics = (False, [])
+        if active_term and user_acceptance:
+            compliant, non_compliant_topics = compliance(active_term, user_acceptance)
+
+        return jsonify({
+            'compliant': compliant,
+            'non_compliant_topics': non_compliant_topics
+        }), 200
+
+    return terms_blueprint
@@ -0,0 +1,46 @@
+from quart import Blueprint, jsonify, request
+from api.asgi.middleware import require_auth
+from api.models.yield_predict_model import AsyncYieldPredictModel
+from api.routes.filters import read_filters, validate_filters
+from api.service.yield_predict_service import FILTER_OPTIONS, get_filtered_yield_predict_data_async
+
+
+def create_blueprint(db, model=None):
+    model = model or AsyncYieldPredictModel(db)
+
+    yield_predict_blueprint = Blueprint(
+        'projection', __name__, url_prefix="/projection"
+    )
+
+    @yield_predict_blueprint.route('/', methods=['OPTIONS'])
+    async def options():
+        return '', 200
+
+    @yield_predict_blueprint.route("/", methods=["POST"])
+    @require_auth
+    async def get_yield_predict_data():
+        if not request.is_json:
+            return jsonify({"error": "O corpo da requisição deve ser JSON"}), 400
+
+        try:
+            filters = read_filters(await request.get_json())
+
+            # Validação básica de tipos
+            error = validate_filters(filters)
+            if error:
+                return jsonify({"error": error}), 400
+
+            filtered_data = await get_filtered_yield_predict_data_async(**filters, model=model)
+
+            return jsonify(filtered_data), 200
+
+        except Exception as e:
+            print(f"Erro ao consultar os dados: {str(e)}")
+            return jsonify({"error": "Erro ao consultar dados"}), 500
+
+    @yield_predict_blueprint.route("/filters", methods=["GET"])
+    @require_auth
+    async def get_filters():
+        return jsonify(FILTER_OPTIONS)
+
+    return yield_predict_blueprint
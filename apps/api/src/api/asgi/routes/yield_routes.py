@@ -0,0 +1,146 @@
+import asyncio
+from quart import Blueprint, Response, jsonify, request
+from api.asgi.middleware import conditional, require_auth
+from api.models.yield_model import (
+    create_yield_event,
+    get_yield_events_filter_async,
+    on_yield_change,
+    update_yield_event,
+)
+from api.routes.filters import build_yield_filter
+from api.routes.pagination import Pagination, invalidate_counts
+from api.service.yield_export import EXPORT_FORMATS, stream_export_async
+
+
+def create_blueprint(db, sync_db):
+
+    assert db is not None
+
+    yield_collection = db.get_collection('yield_collection')
+    # Escritas passam por create_yield_event/update_yield_event (validação,
+    # cubo, versão dos dados e listeners), executadas fora do event loop
+    sync_yield_collection = sync_db.get_collection('yield_collection')
+
+    yield_blueprint = Blueprint('yield', __name__, url_prefix="/yield")
+
+    on_yield_change(invalidate_counts)
+
+    async def cursor_response(data, query_filter):
+        """Keyset-paginated response, used when the request sends `cursor`."""
+        size, cursor, error = Pagination.parse_cursor_values(data)
+        if error:
+            return jsonify({'error': error}), 400
+
+        with_total = bool(data.get('withTotal', False))
+        try:
+            items, metadata = await Pagination.cursor_page_async(
+                yield_collection, size, cursor, query_filter, with_total=with_total)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+        return jsonify({
+            'items': items,
+            **metadata
+        })
+
+    @yield_blueprint.route('/', methods=['OPTIONS'])
+    async def options():
+        return '', 200
+
+    @yield_blueprint.route('/new', methods=['POST'])
+    @require_auth
+    async def create():
+        data = await request.get_json()
+        result = await asyncio.to_thread(create_yield_event, sync_yield_collection, data)
+        return jsonify(result)
+
+    @yield_blueprint.route('/', methods=['POST'])
+    @require_auth
+    @conditional
+    async def read():
+        data = await request.get_json() or {}
+        if Pagination.is_cursor_request(data):
+            return await cursor_response(data, {})
+
+        page, size, error = Pagination.parse_values(data)
+        if error:
+            return jsonify({'error': error}), 400
+
+        items, metadata = await Pagination.offset_page_async(
+            yield_collection, page, size, with_total=Pagination.with_total(data))
+
+        return jsonify({
+            'items': items,
+            **metadata
+        })
+
+    @yield_blueprint.route('/all', methods=['GET'])
+    @require_auth
+    @conditional
+    async def read_all():
+        filters = request.args.to_dict()
+        result = await get_yield_events_filter_async(yield_collection, filters)
+        return jsonify(result)
+
+    @yield_blueprint.route('/export', methods=['GET', 'POST'])
+    @require_auth
+    async def export():
+        export_format = request.args.get('format', 'ndjson').lower()
+        if export_format not in EXPORT_FORMATS:
+            return jsonify({"error": "format deve ser ndjson ou csv"}), 400
+
+        # Mesmos filtros de /yield/filter, enviados no corpo da requisição
+        filters = await request.get_json(silent=True) or {}
+        mongo_filter, error = build_yield_filter(filters)
+        if error:
+            return jsonify({"error": error}), 400
+
+        response = Response(
+            stream_export_async(yield_collection, mongo_filter, export_format),
+            mimetype=EXPORT_FORMATS[export_format]
+        )
+        response.headers['Content-Disposition'] = \
+            f'attachment; filename="yield.{export_format}"'
+        return response
+
+    @yield_blueprint.route('/', methods=['PUT'])
+    @require_auth
+    async def update():
+        data = await request.get_json()
+        crop = data.get('crop')
+        crop_year = data.get('crop_year')
+        update_data = data.get('update_data')
+        result = await asyncio.to_thread(
+            update_yield_event, sync_yield_collection, crop, crop_year, update_data)
+        return jsonify(result)
+
+    @yield_blueprint.route('/filter', methods=['POST'])
+    @require_auth
+    @conditional
+    async def read_filtered():
+        data = await request.get_json() or {}
+
+        # Paginação
+        page, size, error = Pagination.parse_values(data)
+        if error:
+            return jsonify({'error': error}), 400
+
+        # Recebe os filtros enviados no corpo da requisição
+        mongo_filter, error = build_yield_filter(data)
+        if error:
+            return jsonify({"error": error}), 400
+
+        if Pagination.is_cursor_request(data):
+            return await cursor_response(data, mongo_filter)
+
+        # Consulta paginada com filtros
+        items, metadata = await Pagination.offset_page_async(
+            yield_collection, page, size, mongo_filter,
+            with_total=Pagination.with_total(data))
+
+        return jsonify({
+            'items': items,
+            **metadata
+        })
+
+    return yield_blueprint
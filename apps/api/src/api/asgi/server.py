@@ -0,0 +1,73 @@
+import asyncio
+from quart import Quart, jsonify
+from quart_cors import cors
+from api.asgi.middleware import close_http_client, init_compression, require_auth
+from api.asgi.routes import create_blueprints
+from api.json_provider import ORJSONProvider
+from api.middleware.auth import check_auth_config
+from api.middleware.conditional import DATA_VERSION_EXTENSION
+from api.server import create_data_version_watcher, startup_database
+from api.warmup import add_warmup, warm_up_async, warmup_enabled
+from db.mongo import MongoDB
+
+
+def create_app():
+    """
+    Aplicação ASGI (Quart) com as mesmas rotas da aplicação Flask de
+    api.server. As consultas das rotas usam o AsyncMongoClient, e a
+    introspecção de tokens usa o httpx, então um processo atende muitas
+    requisições simultâneas sem uma thread por requisição. O MongoClient
+    síncrono continua sendo usado no que roda fora do event loop.
+    """
+    check_auth_config()
+    sync_db = startup_database()
+    client = MongoDB.async_client()
+    db = client[MongoDB.database_name()]
+
+    app = Quart(__name__)
+    # Serializa ObjectId, datetime e NumPy direto, sem conversões nas rotas
+    app.json = ORJSONProvider(app)
+    app = cors(app)
+
+    watcher = create_data_version_watcher(sync_db)
+    app.extensions[DATA_VERSION_EXTENSION] = watcher
+    init_compression(app)
+
+    @app.before_request
+    async def check_data_version():
+        if watcher.due():
+            await asyncio.to_thread(watcher.check)
+
+    # Aquecimento antes do primeiro acesso, já no event loop que atende as
+    # rotas: abre o pool do AsyncMongoClient e prepara os caches dos blueprints
+    add_warmup(app, "pool do AsyncMongoClient", lambda: db.command("ping"))
+
+    @app.before_serving
+    async def warm_up():
+        if warmup_enabled():
+            await warm_up_async(app)
+
+    @app.after_serving
+    async def close_clients():
+        await client.close()
+        await close_http_client()
+
+    @app.route("/")
+    async def home():
+        return jsonify({"message": "Hello from Quart!"})
+
+    @app.route("/metrics/mongo")
+    @require_auth
+    async def mongo_metrics():
+        return jsonify(MongoDB.pool_stats())
+
+    for blueprint in create_blueprints(db, sync_db):
+        app.register_blueprint(blueprint)
+
+    return app
+
+
+def run():
+    app = create_app()
+
+    app.run(debug=True, host="0.0.0.0", port=5000)
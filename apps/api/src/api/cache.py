@@ -0,0 +1,154 @@
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Any, Optional
+
+from pymongo.errors import PyMongoError
+
+
+class MemoryCache:
+    """
+    Cache em memória do processo com expiração (TTL) e remoção LRU.
+
+    O limite é dado em número de entradas e, opcionalmente, em bytes
+    (para valores `bytes`). Seguro para uso entre threads.
+    """
+
+    def __init__(self, ttl: float = 300, max_entries: int = 256, max_bytes: Optional[int] = None):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                self._remove(key)
+                return None
+
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        size = self._sizeof(value)
+        if self.max_bytes is not None and size > self.max_bytes:
+            return
+
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+            self._entries[key] = (expires_at, value)
+            self._size += size
+
+            while len(self._entries) > self.max_entries or (
+                self.max_bytes is not None and self._size > self.max_bytes
+            ):
+                self._remove(next(iter(self._entries)))
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _remove(self, key: str) -> None:
+        _, value = self._entries.pop(key)
+        self._size -= self._sizeof(value)
+
+    @staticmethod
+    def _sizeof(value: Any) -> int:
+        return len(value) if isinstance(value, (bytes, bytearray, str)) else 0
+
+
+class MongoCache:
+    """
+    Cache compartilhado entre processos guardado em uma coleção do MongoDB.
+
+    A expiração usa um índice TTL em `expires_at`; como o MongoDB remove os
+    documentos expirados periodicamente, a leitura também confere a validade.
+    Cada instância usa um `namespace`, permitindo limpar apenas suas chaves.
+    """
+
+    def __init__(self, collection, namespace: str, ttl: float = 300):
+        self.collection = collection
+        self.namespace = namespace
+        self.ttl = ttl
+        try:
+            self.collection.create_index("expires_at", expireAfterSeconds=0)
+        except PyMongoError as e:
+            print(f"Erro ao criar índice TTL do cache: {str(e)}")
+
+    def get(self, key: str) -> Optional[Any]:
+        try:
+            document = self.collection.find_one({
+                "_id": self._id(key),
+                "expires_at": {"$gt": self._now()},
+            })
+        except PyMongoError as e:
+            print(f"Erro ao ler cache: {str(e)}")
+            return None
+        return document["value"] if document else None
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        expires_at = self._now() + timedelta(seconds=self.ttl if ttl is None else ttl)
+        try:
+            self.collection.replace_one(
+                {"_id": self._id(key)},
+                {"namespace": self.namespace, "value": value, "expires_at": expires_at},
+                upsert=True
+            )
+        except PyMongoError as e:
+            print(f"Erro ao gravar cache: {str(e)}")
+
+    def delete(self, key: str) -> None:
+        try:
+            self.collection.delete_one({"_id": self._id(key)})
+        except PyMongoError as e:
+            print(f"Erro ao remover do cache: {str(e)}")
+
+    def clear(self) -> None:
+        try:
+            self.collection.delete_many({"namespace": self.namespace})
+        except PyMongoError as e:
+            print(f"Erro ao limpar cache: {str(e)}")
+
+    def _id(self, key: str) -> str:
+        return f"{self.namespace}:{key}"
+
+    @staticmethod
+    def _now() -> datetime:
+        # BSON guarda datas sem fuso; o PyMongo converte para UTC
+        return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+class NullCache:
+    """Cache desativado: nunca guarda nada"""
+
+    def get(self, key: str) -> None:
+        return None
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        pass
+
+    def delete(self, key: str) -> None:
+        pass
+
+    def clear(self) -> None:
+        pass
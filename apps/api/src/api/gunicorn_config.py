@@ -0,0 +1,88 @@
+"""
+Configuração do gunicorn, o servidor de produção da API:
+
+    gunicorn --config python:api.gunicorn_config
+
+(ou `python main.py` com FLASK_ENV=production). A aplicação é carregada
+uma vez no processo mestre (API_PRELOAD) e aquecida ali, antes do fork:
+os workers herdam os caches prontos e abrem os próprios pools antes de
+aceitar conexões.
+
+Recarga graciosa: `kill -HUP <mestre>` relê esta configuração e troca os
+workers, que terminam as requisições em andamento (até API_GRACEFUL_TIMEOUT)
+antes de sair. Com preload, o código novo só entra com `kill -USR2` (sobe
+um mestre novo ao lado do atual, ver API_PIDFILE) seguido de `kill -TERM`
+no mestre antigo.
+"""
+import multiprocessing
+import os
+import sys
+from flask import Flask
+from api.warmup import warm_up, warm_up_connections, warmup_enabled
+from db.mongo import MongoDB
+
+# wsgi: Flask (api.server) | asgi: Quart (api.asgi.server) em workers do uvicorn
+_server = os.getenv("API_SERVER", "wsgi").lower()
+
+wsgi_app = "api.asgi.server:create_app()" if _server == "asgi" else "api.server:create_app()"
+bind = os.getenv("API_BIND", "0.0.0.0:5000")
+workers = int(os.getenv("API_WORKERS", str(multiprocessing.cpu_count())))
+worker_class = os.getenv(
+    "API_WORKER_CLASS",
+    "uvicorn_worker.UvicornWorker" if _server == "asgi" else "gthread",
+)
+# Threads por worker; só valem para o worker gthread
+threads = int(os.getenv("API_THREADS", "4"))
+preload_app = os.getenv("API_PRELOAD", "true") == "true"
+timeout = int(os.getenv("API_TIMEOUT", "60"))
+graceful_timeout = int(os.getenv("API_GRACEFUL_TIMEOUT", "30"))
+keepalive = int(os.getenv("API_KEEPALIVE", "5"))
+# Recicla cada worker após N requisições (0 desliga); o jitter evita que
+# todos reiniciem ao mesmo tempo
+max_requests = int(os.getenv("API_MAX_REQUESTS", "0"))
+max_requests_jitter = int(os.getenv("API_MAX_REQUESTS_JITTER", "0"))
+pidfile = os.getenv("API_PIDFILE") or None
+accesslog = os.getenv("API_ACCESS_LOG", "-")
+
+# Engines do SQLAlchemy criadas na importação destes módulos
+SQL_ENGINE_MODULES = ("db.keys", "db.postgres")
+
+
+def dispose_sql_engines():
+    """
+    Descarta, no worker, as conexões do SQLAlchemy herdadas do mestre sem
+    fechá-las (close=False), já que os sockets continuam sendo do mestre.
+    Só os módulos já importados: o modo local de auth importa db.keys sob
+    demanda.
+    """
+    for name in SQL_ENGINE_MODULES:
+        module = sys.modules.get(name)
+        if module is not None:
+            module.Session.kw["bind"].dispose(close=False)
+
+
+def when_ready(server):
+    # Com preload, a aplicação Flask já existe no mestre: os caches aquecidos
+    # aqui são herdados por todos os workers no fork. A aplicação Quart se
+    # aquece em cada worker, no event loop dele (before_serving)
+    if not (preload_app and warmup_enabled()):
+        return
+    app = server.app.wsgi()
+    if isinstance(app, Flask):
+        warm_up(app)
+
+
+def post_fork(server, worker):
+    # Fecha o MongoClient herdado do mestre sem usá-lo e cria o do worker;
+    # o pool é aberto pelo aquecimento em post_worker_init
+    MongoDB.after_fork()
+    dispose_sql_engines()
+
+
+def post_worker_init(worker):
+    # Roda no worker antes de aceitar conexões
+    if not warmup_enabled():
+        return
+    warm_up_connections()
+    if not worker.cfg.preload_app and isinstance(worker.wsgi, Flask):
+        warm_up(worker.wsgi)
@@ -0,0 +1,101 @@
+import dataclasses
+import json
+from datetime import date, time
+from decimal import Decimal
+from typing import Any
+from uuid import UUID
+
+import numpy as np
+import orjson
+from bson import ObjectId
+from bson.decimal128 import Decimal128
+from flask.json.provider import JSONProvider
+from werkzeug.http import http_date
+
+# Tipos nativos do orjson: UUID, dataclasses e, com OPT_SERIALIZE_NUMPY,
+# arrays e escalares do NumPy. Chaves não-string (ex.: os anos de
+# yearly_crop_stats) são convertidas com OPT_NON_STR_KEYS. Datas passam
+# por `default` (OPT_PASSTHROUGH_DATETIME) para manter o formato HTTP
+# (RFC 1123) do provider padrão do Flask.
+BASE_OPTIONS = (
+    orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+)
+
+
+def default(o: Any) -> Any:
+    """
+    Tipos que o orjson não conhece (ou repassa), vindos do MongoDB e dos
+    modelos. Também cobre os tipos nativos do orjson para a serialização
+    pelo json da biblioteca padrão (ver `dumps_bytes`).
+    """
+    if isinstance(o, date):
+        # Como o DefaultJSONProvider: "Mon, 01 Jan 2024 00:00:00 GMT"
+        return http_date(o)
+    if isinstance(o, time):
+        return o.isoformat()
+    if isinstance(o, ObjectId):
+        return str(o)
+    if isinstance(o, Decimal128):
+        return str(o.to_decimal())
+    if isinstance(o, (Decimal, UUID)):
+        return str(o)
+    if isinstance(o, (set, frozenset)):
+        return list(o)
+    if isinstance(o, np.generic):
+        return o.item()
+    if isinstance(o, np.ndarray):
+        return o.tolist()
+    if dataclasses.is_dataclass(o) and not isinstance(o, type):
+        return dataclasses.asdict(o)
+    raise TypeError(f"Object of type {type(o).__name__} is not JSON serializable")
+
+
+def dumps_bytes(obj: Any, sort_keys: bool = True, indent: bool = False) -> bytes:
+    options = BASE_OPTIONS
+    if sort_keys:
+        options |= orjson.OPT_SORT_KEYS
+    if indent:
+        options |= orjson.OPT_INDENT_2
+    try:
+        return orjson.dumps(obj, default=default, option=options)
+    except orjson.JSONEncodeError:
+        # O orjson só aceita inteiros de até 64 bits; o json da biblioteca
+        # padrão serializa qualquer inteiro, com a mesma saída. Tipos
+        # realmente desconhecidos continuam gerando TypeError.
+        return json.dumps(
+            obj,
+            default=default,
+            ensure_ascii=False,
+            sort_keys=sort_keys,
+            indent=2 if indent else None,
+            separators=None if indent else (",", ":"),
+        ).encode()
+
+
+class ORJSONProvider(JSONProvider):
+    """
+    Provider de JSON do Flask baseado no orjson.
+
+    Serializa ObjectId, datetime e valores do NumPy sem conversão prévia,
+    então as rotas e os modelos devolvem os documentos do MongoDB como vêm.
+    Segue as opções do DefaultJSONProvider: chaves ordenadas e saída
+    indentada apenas em modo debug.
+    """
+
+    sort_keys = True
+    compact = None
+    mimetype = "application/json"
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        return dumps_bytes(obj, kwargs.get("sort_keys", self.sort_keys)).decode()
+
+    def loads(self, s, **kwargs: Any) -> Any:
+        return orjson.loads(s)
+
+    def response(self, *args: Any, **kwargs: Any):
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = self.compact is False or (self.compact is None and self._app.debug)
+        return self._app.response_class(
+            dumps_bytes(obj, self.sort_keys, indent) + b"\n",
+            mimetype=self.mimetype
+        )
@@ -1,28 +1,187 @@
+import hashlib
 import os
+import threading
+import time
 import requests
 from functools import wraps
 from flask import request, jsonify
+from requests.adapters import HTTPAdapter
+from api.cache import MemoryCache
+from .local_auth import ENTITY_TYPES, LocalVerifier, RevocationSet
 
-AUTH_INTROSPECT_URL = "http://localhost:3000/validate"
+# "introspect" asks the auth app (cached below); "local" verifies the JWT
+# signature, expiry and revocation in-process
+AUTH_MODE = os.getenv("AUTH_MODE", "introspect").lower()
+
+AUTH_INTROSPECT_URL = os.getenv("AUTH_INTROSPECT_URL", "http://localhost:3000/validate")
+AUTH_INTROSPECT_TIMEOUT = float(os.getenv("AUTH_INTROSPECT_TIMEOUT", "5"))
+
+# Valid tokens are cached for at most AUTH_CACHE_TTL seconds (and never past
+# their `exp`), so a logout takes up to that long to reach this API.
+AUTH_CACHE_TTL = float(os.getenv("AUTH_CACHE_TTL", "30"))
+AUTH_CACHE_NEGATIVE_TTL = float(os.getenv("AUTH_CACHE_NEGATIVE_TTL", "10"))
+
+# Answers that say something about the token itself. Anything else (5xx,
+# 429, ...) is a problem of the auth app and must not stick to the token.
+REJECTED_STATUSES = frozenset({400, 401, 403})
+
+_token_cache = MemoryCache(
+    ttl=AUTH_CACHE_TTL,
+    max_entries=int(os.getenv("AUTH_CACHE_MAX_ENTRIES", "10000")),
+)
+_stats = {"hits": 0, "misses": 0, "rejected_hits": 0, "errors": 0}
+_stats_lock = threading.Lock()
+
+
+def _create_session():
+    session = requests.Session()
+    pool_size = int(os.getenv("AUTH_POOL_SIZE", "10"))
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+_session = _create_session()
+
+
+_local_verifier = None
+_local_verifier_lock = threading.Lock()
+
+
+def get_local_verifier():
+    global _local_verifier
+    if _local_verifier is None:
+        with _local_verifier_lock:
+            if _local_verifier is None:
+                # Like the auth app, refuse to run without the secret: a
+                # default would let anyone sign valid tokens
+                secret = os.getenv("AUTH_JWT_SECRET")
+                if not secret:
+                    raise RuntimeError("AUTH_JWT_SECRET must be set when AUTH_MODE=local")
+                entity_types = os.getenv("AUTH_JWT_ENTITY_TYPES", ",".join(ENTITY_TYPES))
+                _local_verifier = LocalVerifier(
+                    secret,
+                    RevocationSet(interval=float(os.getenv("AUTH_REVOCATION_REFRESH", "30"))),
+                    leeway=float(os.getenv("AUTH_JWT_LEEWAY", "60")),
+                    entity_types=[t.strip() for t in entity_types.split(",") if t.strip()],
+                )
+    return _local_verifier
+
+
+def check_auth_config():
+    """Fail at startup, not on the first request, when local mode is misconfigured."""
+    if AUTH_MODE == "local":
+        get_local_verifier()
+
+
+def _count(metric):
+    with _stats_lock:
+        _stats[metric] += 1
+
+
+def auth_cache_stats():
+    """Hit/miss counters of the token cache, plus its current size."""
+    with _stats_lock:
+        return {**_stats, "size": len(_token_cache)}
+
+
+def clear_auth_cache():
+    _token_cache.clear()
+    with _stats_lock:
+        for metric in _stats:
+            _stats[metric] = 0
+
+
+def _positive_ttl(response):
+    """Cache lifetime of a valid token, bounded by its `exp` claim."""
+    try:
+        exp = response.json().get("exp")
+    except (ValueError, AttributeError):
+        exp = None
+    if exp is None:
+        return AUTH_CACHE_TTL
+    return min(AUTH_CACHE_TTL, float(exp) - time.time())
+
+
+def introspect(token):
+    """
+    Return whether the token is valid, asking the auth app only on a cache
+    miss. Rejected tokens (400/401/403) are cached briefly too; other error
+    statuses are not cached, and connection errors propagate to the caller.
+    """
+    key, cached = cached_introspection(token)
+    if cached is not None:
+        return cached
+
+    try:
+        response = _session.post(
+            AUTH_INTROSPECT_URL, json={"token": token}, timeout=AUTH_INTROSPECT_TIMEOUT)
+    except Exception:
+        _count("errors")
+        raise
+
+    return store_introspection(key, response)
+
+
+def cached_introspection(token):
+    """
+    Cache lookup shared by `introspect` and the async version in api.asgi:
+    returns the cache key and the cached result (None on a miss).
+    """
+    key = hashlib.sha256(token.encode()).hexdigest()
+    cached = _token_cache.get(key)
+    if cached is not None:
+        _count("hits" if cached else "rejected_hits")
+    else:
+        _count("misses")
+    return key, cached
+
+
+def store_introspection(key, response):
+    """Cache the auth app's answer (a requests or httpx response) and return it."""
+    if response.status_code in REJECTED_STATUSES:
+        _token_cache.set(key, False, ttl=AUTH_CACHE_NEGATIVE_TTL)
+        return False
+    if response.status_code != 200:
+        _count("errors")
+        return False
+
+    ttl = _positive_ttl(response)
+    if ttl > 0:
+        _token_cache.set(key, True, ttl=ttl)
+    return True
+
+
+def count_introspection_error():
+    _count("errors")
+
+
+def bearer_token(header):
+    """Token of an Authorization header, without the "Bearer " prefix."""
+    if header and header.startswith("Bearer "):
+        return header[7:]
+    return header
+
+
+def auth_bypassed():
+    return os.getenv("API_BYPASS_AUTH") == "true"
 
 
 def require_auth(f):
     @wraps(f)
     def decorated(*args, **kwargs):
-        if os.getenv("API_BYPASS_AUTH") == "true":
+        if auth_bypassed():
             return f(*args, **kwargs)
 
-        token = request.headers.get("Authorization", None)
+        token = bearer_token(request.headers.get("Authorization", None))
         if not token:
             return jsonify({"error": "Missing token"}), 403
-        # Remove "Bearer " prefix if present
-        if token.startswith("Bearer "):
-            token = token[7:]
-        # Call the auth app introspection endpoint
         try:
-            response = requests.post(
-                AUTH_INTROSPECT_URL, json={"token": token})
-            if response.status_code != 200:
+            if AUTH_MODE == "local":
+                get_local_verifier().verify(token)
+            # Call the auth app introspection endpoint (cached per token)
+            elif not introspect(token):
                 return jsonify({"error": "Token introspection failed"}), 403
 
         except Exception as e:
@@ -0,0 +1,179 @@
+import gzip
+import os
+from flask import request
+from api.cache import MemoryCache
+
+try:
+    import brotli
+except ImportError:  # optional: pip install brotli
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # optional: pip install zstandard
+    zstandard = None
+
+COMPRESSIBLE_TYPES = {
+    "application/json",
+    "application/x-ndjson",
+    "text/csv",
+    "text/html",
+    "text/plain",
+}
+
+
+def _gzip(data: bytes, level: int) -> bytes:
+    return gzip.compress(data, compresslevel=level, mtime=0)
+
+
+def _brotli(data: bytes, level: int) -> bytes:
+    return brotli.compress(data, quality=level)
+
+
+def _zstd(data: bytes, level: int) -> bytes:
+    return zstandard.ZstdCompressor(level=level).compress(data)
+
+
+# encoding -> (compress function, default level, available)
+CODECS = {
+    "zstd": (_zstd, 3, zstandard is not None),
+    "br": (_brotli, 5, brotli is not None),
+    "gzip": (_gzip, 6, True),
+}
+
+
+def available_encodings(preference):
+    return [name for name in preference if name in CODECS and CODECS[name][2]]
+
+
+def choose_encoding(accept_encodings, encodings):
+    """
+    Picks the encoding with the highest q-value in Accept-Encoding; ties go
+    to the server preference order in `encodings`.
+    """
+    best, best_quality = None, 0
+    for name in encodings:
+        quality = accept_encodings.quality(name)
+        if quality > best_quality:
+            best, best_quality = name, quality
+    return best
+
+
+class Compressor:
+    """
+    Compresses buffered responses by Accept-Encoding (zstd, br or gzip, as
+    installed) once they are larger than `min_size` bytes.
+
+    Responses that carry a strong ETag (see api.middleware.conditional and
+    /dashboard/filters) get the encoding appended to it, and their compressed
+    body is kept in a small cache keyed by that ETag, so repeat loads of the
+    same data are compressed only once.
+    """
+
+    def __init__(self, min_size=1024, encodings=None, levels=None, cache_entries=64,
+                 cache_bytes=32 * 1024 * 1024):
+        self.min_size = min_size
+        self.encodings = available_encodings(encodings or list(CODECS))
+        self.levels = {name: CODECS[name][1] for name in CODECS}
+        self.levels.update(levels or {})
+        self._cache = MemoryCache(
+            ttl=3600, max_entries=cache_entries, max_bytes=cache_bytes
+        ) if cache_entries else None
+
+    def compress(self, data: bytes, encoding: str) -> bytes:
+        return CODECS[encoding][0](data, self.levels[encoding])
+
+    def should_compress(self, response) -> bool:
+        return (
+            not response.is_streamed
+            and not response.direct_passthrough
+            and self.compressible(response)
+        )
+
+    def compressible(self, response) -> bool:
+        """Checks that do not depend on werkzeug's response (shared with api.asgi)."""
+        return (
+            response.status_code == 200
+            and "Content-Encoding" not in response.headers
+            and response.mimetype in COMPRESSIBLE_TYPES
+            and (response.content_length or 0) >= self.min_size
+        )
+
+    def negotiate(self, response, accept_encodings):
+        response.vary.add("Accept-Encoding")
+        return choose_encoding(accept_encodings, self.encodings)
+
+    def cache_key(self, response, encoding):
+        etag, weak = response.get_etag()
+        return f"{etag}-{encoding}" if etag and not weak else None
+
+    def cached_body(self, cache_key):
+        if self._cache is None or cache_key is None:
+            return None
+        return self._cache.get(cache_key)
+
+    def store(self, cache_key, body: bytes) -> None:
+        if self._cache is not None and cache_key is not None:
+            self._cache.set(cache_key, body)
+
+    def finish(self, response, body: bytes, encoding: str, cache_key):
+        response.set_data(body)
+        response.headers["Content-Encoding"] = encoding
+        if cache_key:
+            response.set_etag(cache_key)
+        return response
+
+    def after_request(self, response):
+        if not self.encodings or not self.should_compress(response):
+            return response
+
+        encoding = self.negotiate(response, request.accept_encodings)
+        if encoding is None:
+            return response
+
+        cache_key = self.cache_key(response, encoding)
+        body = self.cached_body(cache_key)
+        if body is None:
+            body = self.compress(response.get_data(), encoding)
+            self.store(cache_key, body)
+        return self.finish(response, body, encoding, cache_key)
+
+
+def init_compression(app):
+    """
+    Registers response compression on the app, configured by:
+
+    - COMPRESS_MIN_SIZE: smallest body compressed, in bytes (default 1024;
+      a negative value disables compression)
+    - COMPRESS_ENCODINGS: server preference order (default "zstd,br,gzip")
+    - COMPRESS_LEVEL_GZIP / COMPRESS_LEVEL_BR / COMPRESS_LEVEL_ZSTD
+    - COMPRESS_CACHE_ENTRIES: compressed bodies kept per process (default 64)
+    """
+    compressor = create_compressor()
+    if compressor is not None:
+        app.after_request(compressor.after_request)
+    return compressor
+
+
+def create_compressor():
+    """The Compressor configured by the environment, or None when disabled."""
+    min_size = int(os.getenv("COMPRESS_MIN_SIZE", "1024"))
+    if min_size < 0:
+        return None
+
+    encodings = [
+        name.strip()
+        for name in os.getenv("COMPRESS_ENCODINGS", "zstd,br,gzip").split(",")
+        if name.strip()
+    ]
+    levels = {
+        name: int(os.environ[f"COMPRESS_LEVEL_{name.upper()}"])
+        for name in CODECS
+        if os.getenv(f"COMPRESS_LEVEL_{name.upper()}")
+    }
+    return Compressor(
+        min_size,
+        encodings,
+        levels,
+        int(os.getenv("COMPRESS_CACHE_ENTRIES", "64")),
+    )
@@ -0,0 +1,99 @@
+import hashlib
+from functools import wraps
+from flask import current_app, request
+
+# Key under app.extensions holding the DataVersionWatcher of the app
+DATA_VERSION_EXTENSION = "data_version"
+
+# Only these methods may answer a matching If-None-Match with 304; for any
+# other method the precondition fails with 412 (RFC 9110, section 13.1.2)
+SAFE_METHODS = frozenset(("GET", "HEAD"))
+
+
+def request_etag(version) -> str:
+    """
+    Strong ETag for the current request at the given data version. The
+    response is fully determined by the data plus the request itself
+    (method, path, query string and body), so nothing has to be computed.
+    """
+    return compute_etag(
+        version, request.method, request.path, request.query_string,
+        request.get_data(cache=True))
+
+
+def compute_etag(version, method: str, path: str, query_string: bytes, body: bytes) -> str:
+    """Framework-independent part of `request_etag`, shared with api.asgi."""
+    # HEAD describes the same representation as GET
+    if method == "HEAD":
+        method = "GET"
+    digest = hashlib.sha256()
+    for part in (str(version).encode(), method.encode(), path.encode(), query_string, body):
+        digest.update(part)
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def current_data_version():
+    watcher = current_app.extensions.get(DATA_VERSION_EXTENSION)
+    return None if watcher is None else watcher.version
+
+
+def matching_etag(etag: str):
+    """
+    Returns the If-None-Match tag that refers to `etag`, either the tag
+    itself or one of its compressed variants ("<etag>-gzip", ...), or None.
+    """
+    return find_matching_etag(request.if_none_match, etag)
+
+
+def find_matching_etag(if_none_match, etag: str):
+    """`matching_etag` for a parsed If-None-Match header (werkzeug ETags)."""
+    return next((
+        match for match in if_none_match.as_set(include_weak=True)
+        if match == etag or match.startswith(f"{etag}-")
+    ), None)
+
+
+def not_modified(etag: str):
+    response = current_app.response_class(status=304)
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = "no-cache"
+    return response
+
+
+def precondition_failed():
+    return current_app.response_class(status=412)
+
+
+def conditional(f):
+    """
+    Adds a data-version ETag to successful GET/HEAD responses of a read
+    endpoint backed by yield_collection and answers a matching
+    If-None-Match with 304 before running the view. Compressed variants
+    carry the encoding as a suffix (see api.middleware.compression) and
+    match as well.
+
+    Other methods (the POST forms of the read endpoints) never get a 304
+    nor an ETag; a matching If-None-Match sent with them gets 412.
+
+    Apply below @require_auth so that a 304 is only sent to authorized
+    requests.
+    """
+    @wraps(f)
+    def decorated(*args, **kwargs):
+        version = current_data_version()
+        safe = request.method in SAFE_METHODS
+        if version is None or not (safe or request.if_none_match):
+            return f(*args, **kwargs)
+
+        etag = request_etag(version)
+        matched = matching_etag(etag)
+        if matched is not None:
+            return not_modified(matched) if safe else precondition_failed()
+
+        response = current_app.make_response(f(*args, **kwargs))
+        if safe and response.status_code == 200 and "ETag" not in response.headers:
+            response.set_etag(etag)
+            response.headers["Cache-Control"] = "no-cache"
+        return response
+    return decorated
@@ -0,0 +1,159 @@
+import base64
+import binascii
+import hashlib
+import hmac
+import json
+import os
+import threading
+import time
+import uuid
+
+
+# EntityType of the auth app: the prefix of every token subject
+ENTITY_TYPES = ("user", "external_client", "authorized_client")
+
+
+class InvalidToken(Exception):
+    pass
+
+
+def _b64decode(segment):
+    return base64.urlsafe_b64decode(segment + "=" * (-len(segment) % 4))
+
+
+def decode_jwt(token, secret, leeway=60, now=None, entity_types=ENTITY_TYPES):
+    """
+    Verify an HS256 token signed by the auth app and return its claims.
+
+    Mirrors `verify_jwt` in the auth app (jsonwebtoken's default validation):
+    HS256 signature, required `exp` with leeway and a base64 "type:id" subject
+    whose type is one of `entity_types`.
+    """
+    try:
+        header_b64, payload_b64, signature_b64 = token.split(".")
+        header = json.loads(_b64decode(header_b64))
+        signature = _b64decode(signature_b64)
+    except (ValueError, binascii.Error) as e:
+        raise InvalidToken("Malformed token") from e
+
+    if header.get("alg") != "HS256":
+        raise InvalidToken("Unsupported algorithm")
+
+    expected = hmac.new(
+        secret.encode(), f"{header_b64}.{payload_b64}".encode(), hashlib.sha256).digest()
+    if not hmac.compare_digest(expected, signature):
+        raise InvalidToken("Invalid signature")
+
+    try:
+        claims = json.loads(_b64decode(payload_b64))
+        exp = float(claims["exp"])
+        subject = base64.b64decode(claims["sub"]).decode()
+    except (ValueError, KeyError, TypeError, binascii.Error) as e:
+        raise InvalidToken("Invalid claims") from e
+
+    if exp + leeway < (time.time() if now is None else now):
+        raise InvalidToken("Token expired")
+    entity_type, separator, entity_id = subject.partition(":")
+    if not separator or not entity_id:
+        raise InvalidToken("Invalid subject")
+    if entity_type not in entity_types:
+        raise InvalidToken("Invalid entity type")
+    return claims
+
+
+def _compact_jti(jti):
+    """UUID jtis are kept as 16 raw bytes instead of a 36-character string."""
+    try:
+        return uuid.UUID(jti).bytes
+    except (ValueError, AttributeError, TypeError):
+        return jti
+
+
+def load_revoked_tokens(since=None):
+    """Read (jti, revoked_at) rows from db.keys.RevokedToken, optionally incrementally."""
+    # Imported here so the keys database is only touched in local mode
+    from db.keys import RevokedToken, Session
+
+    with Session() as session:
+        query = session.query(RevokedToken.jti, RevokedToken.revoked_at)
+        if since is not None:
+            # >= so rows sharing the last timestamp are not missed
+            query = query.filter(RevokedToken.revoked_at >= since)
+        return query.all()
+
+
+class RevocationSet:
+    """
+    In-memory set of revoked `jti`s.
+
+    Loaded in bulk on first use, then refreshed every `interval` seconds by a
+    background thread that only fetches rows with a newer `revoked_at`. If a
+    refresh fails, the last known set keeps being used.
+    """
+
+    def __init__(self, loader=load_revoked_tokens, interval=30):
+        self.loader = loader
+        self.interval = interval
+        self.last_revoked_at = None
+        self.last_sync = None
+        self._jtis = set()
+        self._lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+
+    def __contains__(self, jti):
+        self.start()
+        return _compact_jti(jti) in self._jtis
+
+    def __len__(self):
+        return len(self._jtis)
+
+    def refresh(self):
+        rows = self.loader(self.last_revoked_at)
+        with self._lock:
+            for jti, revoked_at in rows:
+                self._jtis.add(_compact_jti(jti))
+                if self.last_revoked_at is None or revoked_at > self.last_revoked_at:
+                    self.last_revoked_at = revoked_at
+            self.last_sync = time.monotonic()
+
+    def start(self):
+        """Load the set and start the sync thread, once per process."""
+        if self._pid == os.getpid():
+            return
+        with self._start_lock:
+            if self._pid == os.getpid():
+                return
+            # A failed first load propagates, so tokens are rejected rather
+            # than checked against an empty set
+            self.refresh()
+            self._thread = threading.Thread(target=self._sync, daemon=True)
+            self._thread.start()
+            self._pid = os.getpid()
+
+    def _sync(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"Error refreshing revoked tokens: {str(e)}")
+
+
+class LocalVerifier:
+    """Validate tokens without calling the auth app."""
+
+    def __init__(self, secret, revoked=None, leeway=60, entity_types=ENTITY_TYPES):
+        if not secret:
+            raise ValueError("A JWT secret is required")
+        self.secret = secret
+        self.revoked = RevocationSet() if revoked is None else revoked
+        self.leeway = leeway
+        self.entity_types = tuple(entity_types)
+
+    def verify(self, token):
+        claims = decode_jwt(token, self.secret, self.leeway, entity_types=self.entity_types)
+        if claims.get("jti") in self.revoked:
+            raise InvalidToken("Token revoked")
+        return claims
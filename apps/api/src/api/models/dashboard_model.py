@@ -1,17 +1,81 @@
-from typing import Union, List, Optional, Dict, Any
+from typing import Union, List, Optional, Dict, Any, Tuple
 from bson import ObjectId
+from bson.codec_options import CodecOptions
 from pymongo.errors import PyMongoError
 from db.mongo import MongoDB
+from db.yield_rollup import ROLLUP_COLLECTION
+from api.service.yield_aggregation import GROUP_FIELDS, NUMERIC_FIELDS
+
+# Decodificação fixa dos documentos de yield, independente das opções do cliente
+CODEC_OPTIONS = CodecOptions(document_class=dict, tz_aware=False)
+
+# Um ramo do $facet por agregado do dashboard, cada um no grão que o
+# resultado usa: trafegam dezenas de grupos, não uma célula por combinação
+# de ano, estação, cultura e estado (ver aggregate_facets)
+AGGREGATE_FACETS = {
+    "totals": [{"$group": {
+        "_id": None,
+        "count": {"$sum": 1},
+        "production": {"$sum": "$production"},
+        "area": {"$sum": "$area"},
+    }}],
+    "by_state": [{"$group": {
+        "_id": "$state",
+        "production": {"$sum": "$production"},
+        "area": {"$sum": "$area"},
+    }}],
+    "by_crop": [{"$group": {
+        "_id": "$crop",
+        "production": {"$sum": "$production"},
+        "area": {"$sum": "$area"},
+    }}],
+    "year_season": [{"$group": {
+        "_id": {"crop_year": "$crop_year", "season": "$season"},
+        "production": {"$sum": "$production"},
+    }}],
+    "year_crop": [{"$group": {
+        "_id": {"crop_year": "$crop_year", "crop": "$crop"},
+        "count": {"$sum": 1},
+        **{field: {"$sum": f"${field}"} for field in NUMERIC_FIELDS},
+    }}],
+}
+
+# Células do cubo no formato esperado por aggregate_cells
+ROLLUP_PROJECTION = {
+    "_id": 0,
+    "count": 1,
+    **{field: 1 for field in GROUP_FIELDS + NUMERIC_FIELDS},
+}
+ROLLUP_SORT = [(field, 1) for field in GROUP_FIELDS]
+
+# Colunas exibidas nas linhas de prévia do dashboard (AgriculturalData no web).
+# Contém os campos das agregações: no modo python uma única leitura atende
+# os agregados e a prévia
+PREVIEW_PROJECTION = {
+    field: 1 for field in GROUP_FIELDS + NUMERIC_FIELDS + ("yield",)
+}
+
+UNIQUE_FIELDS = {
+    "crop_years": "crop_year",
+    "seasons": "season",
+    "crops": "crop",
+    "states": "state"
+}
 
 
 class DashboardModel:
-    def __init__(self, db_name: str = "reforestation"):
+    def __init__(self, db=None):
         """
-        Inicializa o modelo com a conexão existente
+        Inicializa o modelo com a conexão existente. A API cria uma única
+        instância em create_blueprints e a reutiliza em todas as requisições;
+        sem `db`, usa a conexão padrão de MongoDB.connect()
         """
         try:
-            self.db = MongoDB.connect()
-            self.collection = self.db["yield_collection"]
+            self.db = db if db is not None else MongoDB.connect()
+            self.collection = self.db.get_collection(
+                "yield_collection", codec_options=CODEC_OPTIONS)
+            self.rollup = self.db.get_collection(
+                ROLLUP_COLLECTION, codec_options=CODEC_OPTIONS)
 
             # Verificação segura da coleção
             if not hasattr(self.collection, 'name') or self.collection.name != "yield_collection":
@@ -21,20 +85,27 @@ class DashboardModel:
             raise RuntimeError(
                 f"Falha ao inicializar DashboardModel: {str(e)}")
 
+        # Estágios montados uma vez e reutilizados a cada consulta
+        self._unique_values_pipeline = [{"$group": {
+            "_id": None,
+            **{key: {"$addToSet": f"${field}"} for key, field in UNIQUE_FIELDS.items()},
+        }}]
+
     def get_filtered_data(
         self,
         crop_year: Optional[Union[int, str, List[Union[int, str]]]] = None,
         season: Optional[Union[str, List[str]]] = None,
         crop: Optional[Union[str, List[str]]] = None,
-        state: Optional[Union[str, List[str]]] = None
+        state: Optional[Union[str, List[str]]] = None,
+        limit: int = 0
     ) -> List[Dict[str, Any]]:
         """
-        Filtra dados com tratamento robusto de erros
+        Filtra dados com tratamento robusto de erros, retornando só as
+        colunas exibidas (até `limit` linhas; 0 não limita)
         """
         try:
             query = self._build_query(crop_year, season, crop, state)
-            cursor = self.collection.find(query)
-            return self._convert_documents(cursor)
+            return list(self.collection.find(query, PREVIEW_PROJECTION, limit=limit))
         except PyMongoError as e:
             print(f"Erro ao consultar MongoDB: {str(e)}")
             return []
@@ -42,6 +113,66 @@ class DashboardModel:
             print(f"Erro inesperado: {str(e)}")
             return []
 
+    def get_aggregated_data(
+        self,
+        crop_year: Optional[Union[int, str, List[Union[int, str]]]] = None,
+        season: Optional[Union[str, List[str]]] = None,
+        crop: Optional[Union[str, List[str]]] = None,
+        state: Optional[Union[str, List[str]]] = None,
+        preview_limit: int = 500
+    ) -> Tuple[List[Dict[str, Any]], Dict[str, List[Dict[str, Any]]]]:
+        """
+        Agrega os dados no próprio MongoDB em uma única consulta ($facet):
+        as primeiras linhas para exibição e um ramo por agregado do
+        dashboard (ver AGGREGATE_FACETS)
+        """
+        try:
+            pipeline = self._aggregation_pipeline(
+                self._build_query(crop_year, season, crop, state), preview_limit)
+            result = next(self.collection.aggregate(pipeline), None) or {}
+            return result.pop("preview", []), result
+        except PyMongoError as e:
+            print(f"Erro ao agregar dados no MongoDB: {str(e)}")
+            return [], {}
+        except Exception as e:
+            print(f"Erro inesperado: {str(e)}")
+            return [], {}
+
+    def get_rollup_cells(
+        self,
+        crop_year: Optional[Union[int, str, List[Union[int, str]]]] = None,
+        season: Optional[Union[str, List[str]]] = None,
+        crop: Optional[Union[str, List[str]]] = None,
+        state: Optional[Union[str, List[str]]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Lê as células do cubo (db.yield_rollup) que atendem aos filtros, já
+        agrupadas por (crop_year, season, crop, state) como no $facet "cells"
+        """
+        try:
+            query = self._build_query(crop_year, season, crop, state)
+            return list(self.rollup.find(query, ROLLUP_PROJECTION).sort(ROLLUP_SORT))
+        except PyMongoError as e:
+            print(f"Erro ao consultar o cubo de yield: {str(e)}")
+            return []
+        except Exception as e:
+            print(f"Erro inesperado: {str(e)}")
+            return []
+
+    @staticmethod
+    def _aggregation_pipeline(query: Dict[str, Any], preview_limit: int) -> List[Dict[str, Any]]:
+        """Pipeline de get_aggregated_data: prévia e agregados em um $facet"""
+        return [
+            {"$match": query},
+            {"$facet": {
+                "preview": [
+                    {"$limit": preview_limit},
+                    {"$project": PREVIEW_PROJECTION},
+                ],
+                **AGGREGATE_FACETS,
+            }},
+        ]
+
     def _build_query(
         self,
         crop_year: Optional[Union[int, str, List[Union[int, str]]]],
@@ -89,14 +220,6 @@ class DashboardModel:
 
         return query
 
-    def _convert_documents(self, cursor) -> List[Dict[str, Any]]:
-        """Converte documentos MongoDB para dicionários Python"""
-        try:
-            return [{**doc, "_id": str(doc["_id"])} for doc in cursor]
-        except Exception as e:
-            print(f"Erro ao converter documentos: {str(e)}")
-            return []
-
     def get_filter_possible_values(self, field: str) -> List[str]:
         """
         Obtém valores distintos para um campo com tratamento de erros
@@ -113,18 +236,121 @@ class DashboardModel:
 
     def get_all_unique_values(self) -> Dict[str, List[str]]:
         """
-        Obtém todos os valores únicos para os campos principais
+        Obtém todos os valores únicos para os campos principais em uma única agregação
+        """
+        try:
+            return self.load_unique_values()
+        except PyMongoError as e:
+            print(f"Erro ao obter valores distintos: {str(e)}")
+        except Exception as e:
+            print(f"Erro inesperado: {str(e)}")
+        return self._unique_values({})
+
+    def load_unique_values(self) -> Dict[str, List[str]]:
+        """
+        Mesmo que get_all_unique_values, mas propaga erros do MongoDB em vez
+        de devolver listas vazias: usado por quem guarda o resultado (ver
+        api.service.filter_catalog)
         """
-        fields_mapping = {
-            "crop_years": "crop_year",
-            "seasons": "season",
-            "crops": "crop",
-            "states": "state"
+        result = next(self.collection.aggregate(self._unique_values_pipeline), None) or {}
+        return self._unique_values(result)
+
+    @staticmethod
+    def _unique_values(result: Dict[str, Any]) -> Dict[str, List[str]]:
+        return {
+            key: sorted({str(v) for v in result.get(key, []) if v is not None})
+            for key in UNIQUE_FIELDS
         }
 
-        results = {}
-        for result_key, field in fields_mapping.items():
-            values = self.get_filter_possible_values(field)
-            results[result_key] = sorted(values) if values else []
 
-        return results
+class AsyncDashboardModel(DashboardModel):
+    """
+    DashboardModel sobre o driver assíncrono (pymongo.AsyncMongoClient),
+    usado pelo servidor ASGI (api.asgi). Monta as mesmas consultas e
+    pipelines; só a leitura do MongoDB é aguardada em vez de bloquear.
+    """
+
+    def __init__(self, db):
+        # O banco assíncrono vem do AsyncMongoClient criado em api.asgi.server
+        super().__init__(db)
+
+    async def get_filtered_data(
+        self,
+        crop_year: Optional[Union[int, str, List[Union[int, str]]]] = None,
+        season: Optional[Union[str, List[str]]] = None,
+        crop: Optional[Union[str, List[str]]] = None,
+        state: Optional[Union[str, List[str]]] = None,
+        limit: int = 0
+    ) -> List[Dict[str, Any]]:
+        try:
+            query = self._build_query(crop_year, season, crop, state)
+            return await self.collection.find(query, PREVIEW_PROJECTION, limit=limit).to_list()
+        except PyMongoError as e:
+            print(f"Erro ao consultar MongoDB: {str(e)}")
+            return []
+        except Exception as e:
+            print(f"Erro inesperado: {str(e)}")
+            return []
+
+    async def get_aggregated_data(
+        self,
+        crop_year: Optional[Union[int, str, List[Union[int, str]]]] = None,
+        season: Optional[Union[str, List[str]]] = None,
+        crop: Optional[Union[str, List[str]]] = None,
+        state: Optional[Union[str, List[str]]] = None,
+        preview_limit: int = 500
+    ) -> Tuple[List[Dict[str, Any]], Dict[str, List[Dict[str, Any]]]]:
+        try:
+            pipeline = self._aggregation_pipeline(
+                self._build_query(crop_year, season, crop, state), preview_limit)
+            cursor = await self.collection.aggregate(pipeline)
+            result = next(iter(await cursor.to_list(1)), None) or {}
+            return result.pop("preview", []), result
+        except PyMongoError as e:
+            print(f"Erro ao agregar dados no MongoDB: {str(e)}")
+            return [], {}
+        except Exception as e:
+            print(f"Erro inesperado: {str(e)}")
+            return [], {}
+
+    async def get_rollup_cells(
+        self,
+        crop_year: Optional[Union[int, str, List[Union[int, str]]]] = None,
+        season: Optional[Union[str, List[str]]] = None,
+        crop: Optional[Union[str, List[str]]] = None,
+        state: Optional[Union[str, List[str]]] = None
+    ) -> List[Dict[str, Any]]:
+        try:
+            query = self._build_query(crop_year, season, crop, state)
+            return await self.rollup.find(query, ROLLUP_PROJECTION).sort(ROLLUP_SORT).to_list()
+        except PyMongoError as e:
+            print(f"Erro ao consultar o cubo de yield: {str(e)}")
+            return []
+        except Exception as e:
+            print(f"Erro inesperado: {str(e)}")
+            return []
+
+    async def get_filter_possible_values(self, field: str) -> List[str]:
+        try:
+            values = await self.collection.distinct(field)
+            return [str(v) for v in values if v is not None]
+        except PyMongoError as e:
+            print(f"Erro ao obter valores distintos para {field}: {str(e)}")
+            return []
+        except Exception as e:
+            print(f"Erro inesperado: {str(e)}")
+            return []
+
+    async def get_all_unique_values(self) -> Dict[str, List[str]]:
+        try:
+            return await self.load_unique_values()
+        except PyMongoError as e:
+            print(f"Erro ao obter valores distintos: {str(e)}")
+        except Exception as e:
+            print(f"Erro inesperado: {str(e)}")
+        return self._unique_values({})
+
+    async def load_unique_values(self) -> Dict[str, List[str]]:
+        cursor = await self.collection.aggregate(self._unique_values_pipeline)
+        result = next(iter(await cursor.to_list(1)), None) or {}
+        return self._unique_values(result)
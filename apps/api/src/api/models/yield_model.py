@@ -1,5 +1,7 @@
 from pydantic import BaseModel, Field
+from pymongo import ReturnDocument
 from typing import Optional
+from db.yield_rollup import apply_rollup_change
 
 
 class YieldEvent(BaseModel):
@@ -16,10 +18,45 @@ class YieldEvent(BaseModel):
     yield_: float = Field(..., alias="yield")
 
 
+_change_listeners = []
+
+
+def on_yield_change(listener):
+    """
+    Registra uma função chamada após cada escrita feita por create_yield_event
+    ou update_yield_event, com a ação ("insert" ou "update") e o documento gravado.
+    A lista é do processo: registrar de novo a mesma função não a duplica, então
+    quem cria um objeto por aplicação registra uma função do módulo uma vez e
+    guarda os objetos vivos à parte (ver api.service.dashboard_cache)
+    """
+    if listener not in _change_listeners:
+        _change_listeners.append(listener)
+    return listener
+
+
+def notify_yield_change(action: str, document: Optional[dict] = None):
+    for listener in _change_listeners:
+        try:
+            listener(action, document)
+        except Exception as e:
+            print(f"Erro ao notificar alteração em yield: {str(e)}")
+
+
+def update_rollup(collection, removed: Optional[dict] = None, added: Optional[dict] = None):
+    """Mantém o cubo do dashboard (db.yield_rollup) em dia com a escrita"""
+    try:
+        apply_rollup_change(collection.database, removed, added)
+    except Exception as e:
+        print(f"Erro ao atualizar o cubo de yield: {str(e)}")
+
+
 def create_yield_event(collection, event_data: dict):
     try:
         event = YieldEvent(**event_data)
-        result = collection.insert_one(event.model_dump(by_alias=True))
+        document = event.model_dump(by_alias=True)
+        result = collection.insert_one(document)
+        update_rollup(collection, added=document)
+        notify_yield_change("insert", document)
         return str(result.inserted_id)
     except Exception as e:
         return {"error": str(e)}
@@ -31,13 +68,28 @@ def get_yield_events_filter(collection, filters: Optional[dict] = None):
     return events
 
 
+async def get_yield_events_filter_async(collection, filters: Optional[dict] = None):
+    """get_yield_events_filter para uma AsyncCollection (servidor ASGI)"""
+    query = filters if filters else {}
+    return await collection.find(query, {"_id": 0}).to_list()
+
+
 def update_yield_event(collection, crop: str, crop_year: str, update_data: dict):
     try:
         update_data.pop("_id", None)
         validated_update = YieldEvent(**update_data).model_dump(by_alias=True)
-        result = collection.update_one(
-            {"crop": crop, "crop_year": crop_year}, {"$set": validated_update}
+        # O documento anterior é necessário para retirar seus valores do cubo
+        previous = collection.find_one_and_update(
+            {"crop": crop, "crop_year": crop_year},
+            {"$set": validated_update},
+            return_document=ReturnDocument.BEFORE
+        )
+        modified = previous is not None and any(
+            previous.get(field) != value for field, value in validated_update.items()
         )
-        return {"modified_count": result.modified_count}
+        if modified:
+            update_rollup(collection, removed=previous, added={**previous, **validated_update})
+            notify_yield_change("update", validated_update)
+        return {"modified_count": int(modified)}
     except Exception as e:
         return {"error": str(e)}
@@ -2,16 +2,29 @@ from typing import Union, List, Optional, Dict, Any
 from bson import ObjectId
 from pymongo.errors import PyMongoError
 from db.mongo import MongoDB
+from api.models.dashboard_model import CODEC_OPTIONS
+
+# Colunas exibidas na página de projeção; o _id não é usado pelo web
+PREVIEW_PROJECTION = {
+    "_id": 0,
+    **{field: 1 for field in (
+        "Crop", "Crop_year", "Year", "Season", "State", "Area",
+        "Annual_Rainfall", "Predicted_Production", "Predicted_Fertilizer",
+        "Predicted_Pesticide",
+    )},
+}
 
 
 class YieldPredictModel:
-    def __init__(self, db_name: str = "predictive_yield"):
+    def __init__(self, db=None):
         """
-        Inicializa o modelo com a conexão existente
+        Inicializa o modelo com a conexão existente (ou MongoDB.connect(),
+        quando `db` não é informado). A API usa uma única instância.
         """
         try:
-            self.db = MongoDB.connect()
-            self.collection = self.db["yield_predict_collection"]
+            self.db = db if db is not None else MongoDB.connect()
+            self.collection = self.db.get_collection(
+                "yield_predict_collection", codec_options=CODEC_OPTIONS)
 
             # Verificação segura da coleção
             if not hasattr(self.collection, 'name') or self.collection.name != "yield_predict_collection":
@@ -26,15 +39,16 @@ class YieldPredictModel:
         crop_year: Optional[Union[int, str, List[Union[int, str]]]] = None,
         season: Optional[Union[str, List[str]]] = None,
         crop: Optional[Union[str, List[str]]] = None,
-        state: Optional[Union[str, List[str]]] = None
+        state: Optional[Union[str, List[str]]] = None,
+        limit: int = 0
     ) -> List[Dict[str, Any]]:
         """
-        Filtra dados com tratamento robusto de erros
+        Filtra dados com tratamento robusto de erros, trazendo só as colunas
+        exibidas (até `limit` linhas; 0 não limita)
         """
         try:
             query = self._build_query(crop_year, season, crop, state)
-            cursor = self.collection.find(query)
-            return self._convert_documents(cursor)
+            return list(self.collection.find(query, PREVIEW_PROJECTION, limit=limit))
         except PyMongoError as e:
             print(f"Erro ao consultar MongoDB: {str(e)}")
             return []
@@ -82,14 +96,6 @@ class YieldPredictModel:
 
         return query
 
-    def _convert_documents(self, cursor) -> List[Dict[str, Any]]:
-        """Converte documentos MongoDB para dicionários Python"""
-        try:
-            return [{**doc, "_id": str(doc["_id"])} for doc in cursor]
-        except Exception as e:
-            print(f"Erro ao converter documentos: {str(e)}")
-            return []
-
     def get_filter_possible_values(self, field: str) -> List[str]:
         """
         Obtém valores distintos para um campo com tratamento de erros
@@ -121,3 +127,31 @@ class YieldPredictModel:
             results[result_key] = sorted(values) if values else []
 
         return results
+
+
+class AsyncYieldPredictModel(YieldPredictModel):
+    """
+    YieldPredictModel sobre o driver assíncrono, usado pelo servidor ASGI
+    (api.asgi); monta as mesmas consultas do modelo síncrono
+    """
+
+    def __init__(self, db):
+        super().__init__(db)
+
+    async def get_filtered_data(
+        self,
+        crop_year: Optional[Union[int, str, List[Union[int, str]]]] = None,
+        season: Optional[Union[str, List[str]]] = None,
+        crop: Optional[Union[str, List[str]]] = None,
+        state: Optional[Union[str, List[str]]] = None,
+        limit: int = 0
+    ) -> List[Dict[str, Any]]:
+        try:
+            query = self._build_query(crop_year, season, crop, state)
+            return await self.collection.find(query, PREVIEW_PROJECTION, limit=limit).to_list()
+        except PyMongoError as e:
+            print(f"Erro ao consultar MongoDB: {str(e)}")
+            return []
+        except Exception as e:
+            print(f"Erro inesperado: {str(e)}")
+            return []
@@ -1,11 +1,17 @@
+from api.models.dashboard_model import DashboardModel
+from api.models.yield_predict_model import YieldPredictModel
 from . import yield_routes, dashboard_routes, yield_predict_routes, terms_routes
 
 
 def create_blueprints(db):
+    # Modelos compartilhados por todas as requisições da aplicação
+    dashboard_model = DashboardModel(db)
+    yield_predict_model = YieldPredictModel(db)
+
     return [
         yield_routes.create_blueprint(db),
-        dashboard_routes.create_blueprint(db),
-        yield_predict_routes.create_blueprint(db),
+        dashboard_routes.create_blueprint(db, dashboard_model),
+        yield_predict_routes.create_blueprint(db, yield_predict_model),
         terms_routes.create_terms_blueprint(db),
 
     ]
@@ -1,60 +1,54 @@
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, Response, jsonify, request
+from pymongo.errors import PyMongoError
 from api.middleware.auth import require_auth
-from api.service.dashboard_service import (
-    get_filtered_yield_data,
-    get_filter,
-)
+from api.middleware.conditional import conditional, matching_etag, not_modified
+from api.models.dashboard_model import DashboardModel
+from api.service.dashboard_cache import create_dashboard_cache, make_cache_key
+from api.service.dashboard_service import build_dashboard_payload, get_filtered_yield_data
+from api.service.filter_catalog import create_filter_catalog
+from api.warmup import add_warmup
+from .filters import read_filters, read_query_filters, validate_filters
 
 
-def create_blueprint(db):
+def create_blueprint(db, model=None):
+    model = model or DashboardModel(db)
+    cache = create_dashboard_cache(db)
+    filter_catalog = create_filter_catalog(db, model)
+
     dashboard_blueprint = Blueprint(
         'dashboard', __name__, url_prefix="/dashboard")
 
+    def dashboard_body(filters):
+        """Corpo JSON do dashboard para os filtros; respostas iguais vêm do cache"""
+        cache_key = make_cache_key(**filters)
+        body = cache.get(cache_key)
+        if body is None:
+            results = get_filtered_yield_data(**filters, model=model)
+            body = jsonify(build_dashboard_payload(results)).get_data()
+            cache.set(cache_key, body)
+        return body
+
+    @dashboard_blueprint.record_once
+    def register_warmup(state):
+        # Catálogo de filtros e dashboard sem filtros (a primeira tela do
+        # web) prontos antes do primeiro acesso
+        add_warmup(state.app, "catálogo de filtros", filter_catalog.get)
+        add_warmup(state.app, "dashboard", lambda: dashboard_body(read_filters({})))
+
     @dashboard_blueprint.route('/', methods=['OPTIONS'])
     def options():
         return '', 200
 
-    @dashboard_blueprint.route("/", methods=["POST"])
-    @require_auth
-    def get_yield_data():
-        if not request.is_json:
-            return jsonify({"error": "O corpo da requisição deve ser JSON"}), 400
-
+    def dashboard_response(load_filters):
         try:
-            filters = request.get_json()
-
-            # Extrai filtros com fallback para None
-            crop_year = filters.get("crop_year")
-            season = filters.get("season")
-            crop = filters.get("crop")
-            state = filters.get("state")
+            filters = load_filters()
 
             # Validação básica de tipos
-            if crop_year and not isinstance(crop_year, (int, list)):
-                return jsonify({"error": "crop_year deve ser inteiro ou lista"}), 400
-
-            # Chama o service
-            data, total_production, season_totals, states_totals, yearly_crop_stats, metrics, crops_totals = get_filtered_yield_data(
-                crop_year=crop_year,
-                season=season,
-                crop=crop,
-                state=state
-            )
+            error = validate_filters(filters)
+            if error:
+                return jsonify({"error": error}), 400
 
-            response = jsonify({
-                "data": data,
-                "calculations": {
-                    "total_production": total_production,
-                    "item_count": len(data)
-                },
-                "season_totals": season_totals,
-                "states_totals": states_totals,
-                "yearly_crop_stats": yearly_crop_stats,
-                "metrics": metrics,
-                "crops_totals": crops_totals
-            })
-
-            return response, 200
+            return Response(dashboard_body(filters), mimetype="application/json"), 200
 
         except ValueError as e:
             return jsonify({
@@ -67,15 +61,38 @@ def create_blueprint(db):
                 "details": str(e)
             }), 500
 
+    @dashboard_blueprint.route("/", methods=["GET"])
+    @require_auth
+    @conditional
+    def get_yield_data_by_query():
+        # Forma GET, com os filtros na query string: o navegador guarda a
+        # resposta e revalida com If-None-Match, recebendo 304 se nada mudou
+        return dashboard_response(lambda: read_query_filters(request.args))
+
+    @dashboard_blueprint.route("/", methods=["POST"])
+    @require_auth
+    @conditional
+    def get_yield_data():
+        if not request.is_json:
+            return jsonify({"error": "O corpo da requisição deve ser JSON"}), 400
+        return dashboard_response(lambda: read_filters(request.get_json()))
+
     @dashboard_blueprint.route("/filters", methods=["GET"])
     @require_auth
     def get_filters():
-        crop_years, seasons, crops, states = get_filter()
-        return jsonify({
-            "crop_years": crop_years,
-            "seasons": seasons,
-            "crops": crops,
-            "states": states
-        })
+        try:
+            body, etag = filter_catalog.get()
+        except PyMongoError as e:
+            print(f"Erro ao carregar catálogo de filtros: {str(e)}")
+            return jsonify({"error": "Erro ao consultar filtros"}), 503
+        # O navegador revalida com If-None-Match e recebe 304 se nada mudou,
+        # inclusive quando guardou a versão comprimida ("<etag>-gzip")
+        matched = matching_etag(etag)
+        if matched is not None:
+            return not_modified(matched)
+        response = Response(body, mimetype="application/json")
+        response.set_etag(etag)
+        response.headers["Cache-Control"] = "no-cache"
+        return response
 
     return dashboard_blueprint
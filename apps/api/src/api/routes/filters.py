@@ -0,0 +1,70 @@
+from typing import Any, Dict, Optional, Tuple
+
+# Filtros aceitos no corpo das rotas de dashboard, projeção e yield. As
+# funções deste módulo não dependem do framework e são usadas tanto pelos
+# blueprints do Flask quanto pelos do servidor ASGI (api.asgi).
+FILTER_FIELDS = ("crop_year", "season", "crop", "state")
+
+
+def read_filters(body: dict) -> Dict[str, Any]:
+    """Extrai os filtros do corpo da requisição, com fallback para None"""
+    return {field: body.get(field) for field in FILTER_FIELDS}
+
+
+def read_query_filters(args) -> Dict[str, Any]:
+    """
+    Extrai os filtros da query string da forma GET das rotas
+    (?crop_year=2001&crop_year=2003&state=Acre): um valor vira escalar e
+    vários viram lista, como no corpo JSON. ValueError se crop_year não
+    for inteiro
+    """
+    filters = {}
+    for field in FILTER_FIELDS:
+        values = args.getlist(field)
+        if field == "crop_year":
+            try:
+                values = [int(value) for value in values]
+            except ValueError:
+                raise ValueError("crop_year deve conter apenas inteiros") from None
+        filters[field] = values[0] if len(values) == 1 else values or None
+    return filters
+
+
+def _has_invalid_items(value: Any, types: tuple) -> bool:
+    """Se uma lista traz itens de outro tipo (listas aninhadas, objetos...)"""
+    return isinstance(value, list) and not all(
+        item is None or isinstance(item, types) for item in value)
+
+
+def validate_filters(filters: dict) -> Optional[str]:
+    """Validação básica de tipos; retorna a mensagem de erro ou None"""
+    crop_year = filters.get("crop_year")
+    if crop_year and not isinstance(crop_year, (int, list)):
+        return "crop_year deve ser inteiro ou lista"
+    if _has_invalid_items(crop_year, (int, str)):
+        return "crop_year deve conter apenas inteiros"
+    for field in ("season", "crop", "state"):
+        value = filters.get(field)
+        if value and not isinstance(value, (str, list)):
+            return f"{field} deve ser string ou lista"
+        if _has_invalid_items(value, (str,)):
+            return f"{field} deve conter apenas strings"
+    return None
+
+
+def build_yield_filter(filters: dict) -> Tuple[Optional[dict], Optional[str]]:
+    """
+    Valida os filtros de /yield/filter e monta a consulta do MongoDB.
+    Retorna (filtro, mensagem de erro).
+    """
+    error = validate_filters(filters)
+    if error:
+        return None, error
+
+    # Construindo o dicionário de filtros para o MongoDB
+    mongo_filter = {}
+    for field, value in read_filters(filters).items():
+        if value:
+            mongo_filter[field] = {'$in': value if isinstance(value, list) else [value]}
+
+    return mongo_filter, None
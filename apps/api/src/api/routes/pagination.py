@@ -1,17 +1,36 @@
+import base64
+import json
+import os
 from math import ceil
+from bson import ObjectId, json_util
+from bson.errors import InvalidId
 from flask import request, jsonify
+from api.cache import MemoryCache
 
 
 class Pagination:
     """Utility class for handling pagination."""
+    # Counts of filtered queries, cleared by `invalidate_counts` on writes
+    _counts = MemoryCache(
+        ttl=float(os.getenv("PAGINATION_COUNT_TTL", "60")),
+        max_entries=1024,
+    )
+
     def __new__(cls, *args, **kwargs):
         raise TypeError(f"{cls.__name__} cannot be instantiated")
 
     @staticmethod
     def parse():
         """Extract and validate pagination parameters from request JSON."""
-        data = request.get_json()
+        page, size, error = Pagination.parse_values(request.get_json())
+        if error:
+            return None, None, jsonify({'error': error}), 400
+
+        return page, size, None, None
 
+    @staticmethod
+    def parse_values(data):
+        """Validate `page` and `size` of a request body; returns (page, size, error)."""
         page = data.get('page', 1)
         size = data.get('size', 50)
 
@@ -21,23 +40,256 @@ class Pagination:
             if page < 1 or size < 1:
                 raise ValueError
         except ValueError:
-            return None, None, jsonify({
-                'error': 'Page and size must be positive integers',
-            }), 400
+            return None, None, 'Page and size must be positive integers'
 
-        return page, size, None, None
+        return page, size, None
 
     @staticmethod
     def get_metadata(collection, size, query_filter=None):
         """Return pagination metadata for a collection, with optional filtering."""
-        if query_filter is None:
-            query_filter = {}
-
-        total = collection.count_documents(query_filter)
+        return Pagination._metadata(Pagination.count(collection, query_filter), size)
 
+    @staticmethod
+    def _metadata(total, size):
         pages = ceil(total / size)
         return {
             'total': total,
             'totalPages': pages,
             'size': size,
         }
+
+    @staticmethod
+    def count(collection, query_filter=None):
+        """
+        Count documents using the cheapest suitable strategy: collection
+        metadata (`estimated_document_count`) for unfiltered queries and a
+        TTL cache per collection and filter for filtered ones.
+        """
+        if not query_filter:
+            return collection.estimated_document_count()
+
+        key = Pagination._count_key(collection, query_filter)
+        total = Pagination._counts.get(key)
+        if total is None:
+            total = collection.count_documents(query_filter)
+            Pagination._counts.set(key, total)
+        return total
+
+    @staticmethod
+    async def count_async(collection, query_filter=None):
+        """`count` for an AsyncCollection, sharing the same count cache."""
+        if not query_filter:
+            return await collection.estimated_document_count()
+
+        key = Pagination._count_key(collection, query_filter)
+        total = Pagination._counts.get(key)
+        if total is None:
+            total = await collection.count_documents(query_filter)
+            Pagination._counts.set(key, total)
+        return total
+
+    @staticmethod
+    async def get_metadata_async(collection, size, query_filter=None):
+        return Pagination._metadata(await Pagination.count_async(collection, query_filter), size)
+
+    @staticmethod
+    def _count_key(collection, query_filter):
+        return f"{collection.full_name}:{json_util.dumps(query_filter, sort_keys=True)}"
+
+    @staticmethod
+    def invalidate_counts():
+        """Drop cached counts after the underlying data changed."""
+        Pagination._counts.clear()
+
+    @staticmethod
+    def with_total(data=None):
+        """Whether the request asked for the total count (default) or only `hasMore`."""
+        if data is None:
+            data = request.get_json(silent=True) or {}
+        return bool(data.get('withTotal', True))
+
+    @staticmethod
+    def offset_page(collection, page, size, query_filter=None, with_total=True):
+        """
+        Return one page using skip/limit. Without the total, one extra
+        document is fetched to tell whether there is a next page.
+        """
+        if query_filter is None:
+            query_filter = {}
+
+        cursor = collection.find(query_filter).skip((page - 1) * size)
+        if with_total:
+            items = list(cursor.limit(size))
+            return items, Pagination.get_metadata(collection, size, query_filter)
+
+        items = list(cursor.limit(size + 1))
+        return items[:size], {
+            'size': size,
+            'hasMore': len(items) > size,
+        }
+
+    @staticmethod
+    async def offset_page_async(collection, page, size, query_filter=None, with_total=True):
+        """`offset_page` for an AsyncCollection."""
+        if query_filter is None:
+            query_filter = {}
+
+        cursor = collection.find(query_filter).skip((page - 1) * size)
+        if with_total:
+            items = await cursor.limit(size).to_list()
+            return items, await Pagination.get_metadata_async(collection, size, query_filter)
+
+        items = await cursor.limit(size + 1).to_list()
+        return items[:size], {
+            'size': size,
+            'hasMore': len(items) > size,
+        }
+
+    @staticmethod
+    def is_cursor_request(data=None):
+        """Cursor mode is selected by sending a `cursor` key (null for the first page)."""
+        if data is None:
+            data = request.get_json(silent=True) or {}
+        return 'cursor' in data
+
+    @staticmethod
+    def parse_cursor():
+        """Extract and validate cursor pagination parameters from request JSON."""
+        size, cursor, error = Pagination.parse_cursor_values(request.get_json())
+        if error:
+            return None, None, jsonify({'error': error}), 400
+
+        return size, cursor, None, None
+
+    @staticmethod
+    def parse_cursor_values(data):
+        """Validate `size` and `cursor` of a request body; returns (size, cursor, error)."""
+        size = data.get('size', 50)
+        token = data.get('cursor')
+
+        try:
+            size = int(size)
+            if size < 1:
+                raise ValueError
+        except (ValueError, TypeError):
+            return None, None, 'Size must be a positive integer'
+
+        try:
+            cursor = Pagination.decode_cursor(token) if token else None
+        except ValueError:
+            return None, None, 'Invalid cursor'
+
+        return size, cursor, None
+
+    @staticmethod
+    def encode_cursor(item, direction, sort_field=None):
+        """Build an opaque token from the item's sort key and `_id`."""
+        payload = {'d': direction, 'id': str(item['_id'])}
+        if sort_field:
+            payload['f'] = sort_field
+            payload['v'] = item.get(sort_field)
+        raw = json.dumps(payload, separators=(',', ':')).encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+    @staticmethod
+    def decode_cursor(token):
+        """Decode a token created by `encode_cursor`, raising ValueError if invalid."""
+        try:
+            padded = token + '=' * (-len(token) % 4)
+            payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+            if payload['d'] not in ('next', 'prev'):
+                raise ValueError
+            payload['id'] = ObjectId(payload['id'])
+            return payload
+        except (ValueError, TypeError, KeyError, InvalidId) as e:
+            raise ValueError('Invalid cursor') from e
+
+    @staticmethod
+    def cursor_page(collection, size, cursor=None, query_filter=None,
+                    sort_field=None, with_total=False):
+        """
+        Return one page using keyset pagination on (sort_field, _id).
+
+        Instead of skipping documents, each page starts right after the
+        sort key of the previous page, so deep pages cost the same as the
+        first one. Returns the items and metadata with `next`/`prev` tokens.
+        """
+        query, sort = Pagination._keyset_query(cursor, query_filter, sort_field)
+        items = list(collection.find(query).sort(sort).limit(size + 1))
+        items, metadata = Pagination._keyset_page(items, size, cursor, sort_field)
+        if with_total:
+            metadata.update(Pagination.get_metadata(collection, size, query_filter))
+
+        return items, metadata
+
+    @staticmethod
+    async def cursor_page_async(collection, size, cursor=None, query_filter=None,
+                                sort_field=None, with_total=False):
+        """`cursor_page` for an AsyncCollection."""
+        query, sort = Pagination._keyset_query(cursor, query_filter, sort_field)
+        items = await collection.find(query).sort(sort).limit(size + 1).to_list()
+        items, metadata = Pagination._keyset_page(items, size, cursor, sort_field)
+        if with_total:
+            metadata.update(await Pagination.get_metadata_async(collection, size, query_filter))
+
+        return items, metadata
+
+    @staticmethod
+    def _keyset_query(cursor, query_filter, sort_field):
+        """Query and sort of a keyset page, after validating the cursor."""
+        if query_filter is None:
+            query_filter = {}
+
+        direction = cursor['d'] if cursor else 'next'
+        if cursor and cursor.get('f', None) != sort_field:
+            raise ValueError('Cursor does not match the requested sort')
+
+        query = query_filter
+        if cursor:
+            query = {'$and': [query_filter, Pagination._keyset_filter(cursor, sort_field)]}
+
+        order = 1 if direction == 'next' else -1
+        sort = [(sort_field, order)] if sort_field else []
+        sort.append(('_id', order))
+        return query, sort
+
+    @staticmethod
+    def _keyset_page(items, size, cursor, sort_field):
+        """Trim the size + 1 fetched items and build the `next`/`prev` metadata."""
+        direction = cursor['d'] if cursor else 'next'
+        has_more = len(items) > size
+        items = items[:size]
+        if direction == 'prev':
+            items.reverse()
+
+        if direction == 'next':
+            has_next, has_prev = has_more, cursor is not None
+        else:
+            has_next, has_prev = True, has_more
+
+        metadata = {
+            'size': size,
+            'next': Pagination.encode_cursor(items[-1], 'next', sort_field)
+            if items and has_next else None,
+            'prev': Pagination.encode_cursor(items[0], 'prev', sort_field)
+            if items and has_prev else None,
+            'hasMore': has_next,
+        }
+        return items, metadata
+
+    @staticmethod
+    def _keyset_filter(cursor, sort_field):
+        operator = '$gt' if cursor['d'] == 'next' else '$lt'
+        if not sort_field:
+            return {'_id': {operator: cursor['id']}}
+
+        value = cursor['v']
+        return {'$or': [
+            {sort_field: {operator: value}},
+            {sort_field: value, '_id': {operator: cursor['id']}},
+        ]}
+
+
+def invalidate_counts(action, document):
+    """`on_yield_change` listener: cached counts are stale after any write."""
+    Pagination.invalidate_counts()
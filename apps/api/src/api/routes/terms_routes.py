@@ -1,4 +1,4 @@
-from api.service.terms_service import update_user_acceptance
+from api.service.terms_service import check_user_acceptance_compliance, update_user_acceptance
 from flask import Blueprint, jsonify, request
 from bson import ObjectId
 from datetime import datetime
@@ -41,10 +41,6 @@ def create_terms_blueprint(db):
     @require_auth
     def list_terms():
         terms = list(terms_collection.find())
-
-        for term in terms:
-            term['_id'] = str(term['_id'])
-
         return jsonify(terms), 200
 
     # 1. Endpoint para verificar aceitação do usuário
@@ -55,8 +51,7 @@ def create_terms_blueprint(db):
         
         if not acceptance:
             return jsonify({'message': 'Nenhuma aceitação encontrada para este usuário'}), 404
-        
-        acceptance['_id'] = str(acceptance['_id'])
+
         return jsonify(acceptance), 200
 
     # 2. Endpoint para cadastrar aceitação do usuário
@@ -95,8 +90,7 @@ def create_terms_blueprint(db):
         
         if not active_term:
             return jsonify({'message': 'Nenhum termo ativo encontrado'}), 404
-        
-        active_term['_id'] = str(active_term['_id'])
+
         return jsonify(active_term), 200
 
     # 4. Endpoint para adicionar novo termo (inativa os antigos e limpa aceitações)
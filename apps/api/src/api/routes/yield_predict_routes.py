@@ -1,9 +1,13 @@
 from flask import Blueprint, jsonify, request
 from api.middleware.auth import require_auth
-from api.service.yield_predict_service import get_filtered_yield_predict_data
+from api.models.yield_predict_model import YieldPredictModel
+from api.service.yield_predict_service import FILTER_OPTIONS, get_filtered_yield_predict_data
+from .filters import read_filters, validate_filters
 
 
-def create_blueprint(db):
+def create_blueprint(db, model=None):
+    model = model or YieldPredictModel(db)
+
     yield_predict_blueprint = Blueprint(
         'projection', __name__, url_prefix="/projection"
     )
@@ -20,31 +24,15 @@ def create_blueprint(db):
 
         try:
             # Recebendo os filtros via POST
-            filters = request.get_json()
-
-            # Extrai filtros com fallback para None
-            crop_year = filters.get("crop_year")
-            season = filters.get("season")
-            crop = filters.get("crop")
-            state = filters.get("state")
+            filters = read_filters(request.get_json())
 
             # Validação básica de tipos
-            if crop_year and not isinstance(crop_year, (int, list)):
-                return jsonify({"error": "crop_year deve ser inteiro ou lista"}), 400
-            if season and not isinstance(season, (str, list)):
-                return jsonify({"error": "season deve ser string ou lista"}), 400
-            if crop and not isinstance(crop, (str, list)):
-                return jsonify({"error": "crop deve ser string ou lista"}), 400
-            if state and not isinstance(state, (str, list)):
-                return jsonify({"error": "state deve ser string ou lista"}), 400
+            error = validate_filters(filters)
+            if error:
+                return jsonify({"error": error}), 400
 
             # Obtendo os dados filtrados
-            filtered_data = get_filtered_yield_predict_data(
-                crop_year=crop_year,
-                season=season,
-                crop=crop,
-                state=state
-            )
+            filtered_data = get_filtered_yield_predict_data(**filters, model=model)
 
             return jsonify(filtered_data), 200
 
@@ -55,11 +43,6 @@ def create_blueprint(db):
     @yield_predict_blueprint.route("/filters", methods=["GET"])
     @require_auth
     def get_filters():
-        return jsonify({
-            "crop_years": [2021, 2022, 2023],
-            "seasons": ["Spring", "Summer", "Autumn", "Winter"],
-            "crops": ["Corn", "Soybean", "Wheat"],
-            "states": ["California", "Texas", "Iowa"]
-        })
+        return jsonify(FILTER_OPTIONS)
 
     return yield_predict_blueprint
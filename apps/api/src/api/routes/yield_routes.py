@@ -1,11 +1,15 @@
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, Response, jsonify, request
 from api.middleware.auth import require_auth
+from api.middleware.conditional import conditional
 from api.models.yield_model import (
     create_yield_event,
     get_yield_events_filter,
+    on_yield_change,
     update_yield_event,
 )
-from .pagination import Pagination
+from api.service.yield_export import EXPORT_FORMATS, stream_export
+from .filters import build_yield_filter
+from .pagination import Pagination, invalidate_counts
 
 
 def create_blueprint(db):
@@ -18,6 +22,26 @@ def create_blueprint(db):
 
     yield_blueprint = Blueprint('yield', __name__, url_prefix="/yield")
 
+    on_yield_change(invalidate_counts)
+
+    def cursor_response(query_filter):
+        """Keyset-paginated response, used when the request sends `cursor`."""
+        size, cursor, error_response, status_code = Pagination.parse_cursor()
+        if error_response:
+            return error_response, status_code
+
+        with_total = bool(request.get_json().get('withTotal', False))
+        try:
+            items, metadata = Pagination.cursor_page(
+                yield_collection, size, cursor, query_filter, with_total=with_total)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+        return jsonify({
+            'items': items,
+            **metadata
+        })
+
     @yield_blueprint.route('/', methods=['OPTIONS'])
     def options():
         return '', 200
@@ -31,29 +55,52 @@ def create_blueprint(db):
 
     @yield_blueprint.route('/', methods=['POST'])
     @require_auth
+    @conditional
     def read():
+        if Pagination.is_cursor_request():
+            return cursor_response({})
+
         page, size, error_response, status_code = Pagination.parse()
         if error_response:
             return error_response, status_code
 
-        items = list(yield_collection.find().skip(
-            (page - 1) * size).limit(size))
-
-        for item in items:
-            item['_id'] = str(item['_id'])  # Convert ObjectId to string
+        items, metadata = Pagination.offset_page(
+            yield_collection, page, size, with_total=Pagination.with_total())
 
         return jsonify({
             'items': items,
-            **Pagination.get_metadata(yield_collection, size)
+            **metadata
         })
 
     @yield_blueprint.route('/all', methods=['GET'])
     @require_auth
+    @conditional
     def read_all():
         filters = request.args.to_dict()
         result = get_yield_events_filter(yield_collection, filters)
         return jsonify(result)
 
+    @yield_blueprint.route('/export', methods=['GET', 'POST'])
+    @require_auth
+    def export():
+        export_format = request.args.get('format', 'ndjson').lower()
+        if export_format not in EXPORT_FORMATS:
+            return jsonify({"error": "format deve ser ndjson ou csv"}), 400
+
+        # Mesmos filtros de /yield/filter, enviados no corpo da requisição
+        filters = request.get_json(silent=True) or {}
+        mongo_filter, error = build_yield_filter(filters)
+        if error:
+            return jsonify({"error": error}), 400
+
+        response = Response(
+            stream_export(yield_collection, mongo_filter, export_format),
+            mimetype=EXPORT_FORMATS[export_format]
+        )
+        response.headers['Content-Disposition'] = \
+            f'attachment; filename="yield.{export_format}"'
+        return response
+
     @yield_blueprint.route('/', methods=['PUT'])
     @require_auth
     def update():
@@ -67,6 +114,7 @@ def create_blueprint(db):
     
     @yield_blueprint.route('/filter', methods=['POST'])
     @require_auth
+    @conditional
     def read_filtered():
         # Paginação
         page, size, error_response, status_code = Pagination.parse()
@@ -76,47 +124,21 @@ def create_blueprint(db):
         # Recebe os filtros enviados no corpo da requisição
         filters = request.get_json() or {}
 
-        crop_year = filters.get("crop_year")
-        season = filters.get("season")
-        crop = filters.get("crop")
-        state = filters.get("state")
-
-        # Validação básica
-        if crop_year and not isinstance(crop_year, (int, list)):
-            return jsonify({"error": "crop_year deve ser inteiro ou lista"}), 400
-        if season and not isinstance(season, (str, list)):
-            return jsonify({"error": "season deve ser string ou lista"}), 400
-        if crop and not isinstance(crop, (str, list)):
-            return jsonify({"error": "crop deve ser string ou lista"}), 400
-        if state and not isinstance(state, (str, list)):
-            return jsonify({"error": "state deve ser string ou lista"}), 400
-
-        # Construindo o dicionário de filtros para o MongoDB
-        mongo_filter = {}
-
-        if crop_year:
-            mongo_filter['crop_year'] = {'$in': crop_year if isinstance(crop_year, list) else [crop_year]}
-        if season:
-            mongo_filter['season'] = {'$in': season if isinstance(season, list) else [season]}
-        if crop:
-            mongo_filter['crop'] = {'$in': crop if isinstance(crop, list) else [crop]}
-        if state:
-            mongo_filter['state'] = {'$in': state if isinstance(state, list) else [state]}
+        mongo_filter, error = build_yield_filter(filters)
+        if error:
+            return jsonify({"error": error}), 400
 
-        # Consulta paginada com filtros
-        items = list(
-            yield_collection.find(mongo_filter)
-            .skip((page - 1) * size)
-            .limit(size)
-        )
+        if Pagination.is_cursor_request():
+            return cursor_response(mongo_filter)
 
-        # Converte ObjectId para string
-        for item in items:
-            item['_id'] = str(item['_id'])
+        # Consulta paginada com filtros
+        items, metadata = Pagination.offset_page(
+            yield_collection, page, size, mongo_filter,
+            with_total=Pagination.with_total())
 
         return jsonify({
             'items': items,
-            **Pagination.get_metadata(yield_collection, size, mongo_filter)
+            **metadata
         })
 
     return yield_blueprint
@@ -1,22 +1,69 @@
+import atexit
+import os
+import sys
 from flask import Flask, jsonify
 from flask_cors import CORS
+from api.json_provider import ORJSONProvider
+from api.middleware.auth import check_auth_config, require_auth
+from api.middleware.compression import init_compression
+from api.middleware.conditional import DATA_VERSION_EXTENSION
 from api.routes import create_blueprints
+from api.service.dashboard_service import get_aggregation_mode
+from api.service.data_version import DataVersionWatcher
 from db.mongo import MongoDB
+from db.indexes import ensure_indexes
+from db.yield_rollup import ensure_rollup
 from dev import print_routes
 
 
-def create_app():
-    db = MongoDB.connect()
+def startup_database():
+    """
+    Conecta ao MongoDB e prepara índices e cubo conforme o ambiente; usado
+    também pelo servidor ASGI (api.asgi.server)
+    """
+    db = MongoDB.startup()
+    atexit.register(MongoDB.shutdown)
+
+    if os.getenv("API_ENSURE_INDEXES") == "true":
+        ensure_indexes(db)
+
+    if get_aggregation_mode() == "rollup":
+        ensure_rollup(db)
+
+    return db
 
-    MongoDB.test()
+
+def create_data_version_watcher(db):
+    # Descarta os caches locais quando outra carga de dados altera o yield
+    watcher = DataVersionWatcher(db, float(os.getenv("DATA_VERSION_POLL", "5")))
+    watcher.check()
+    return watcher
+
+
+def create_app():
+    check_auth_config()
+    db = startup_database()
 
     app = Flask(__name__)
+    # Serializa ObjectId, datetime e NumPy direto, sem conversões nas rotas
+    app.json = ORJSONProvider(app)
     CORS(app)
 
+    watcher = create_data_version_watcher(db)
+    app.before_request(watcher.check)
+    # A versão dos dados também compõe os ETags das rotas de leitura
+    app.extensions[DATA_VERSION_EXTENSION] = watcher
+    init_compression(app)
+
     @app.route("/")
     def home():
         return jsonify({"message": "Hello from Flask!"})
 
+    @app.route("/metrics/mongo")
+    @require_auth
+    def mongo_metrics():
+        return jsonify(MongoDB.pool_stats())
+
     for blueprint in create_blueprints(db):
         app.register_blueprint(blueprint)
 
@@ -29,3 +76,14 @@ def run():
     print_routes(app)
 
     app.run(debug=True, host="0.0.0.0", port=5000)
+
+
+def run_production():
+    """
+    Sobe a API no gunicorn com api.gunicorn_config: vários workers, com a
+    aplicação pré-carregada e aquecida antes de receber tráfego
+    """
+    from gunicorn.app.wsgiapp import run as run_gunicorn
+
+    sys.argv = [sys.argv[0], "--config", "python:api.gunicorn_config"]
+    run_gunicorn()
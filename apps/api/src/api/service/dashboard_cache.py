@@ -0,0 +1,86 @@
+import hashlib
+import json
+import os
+import weakref
+from typing import Any, Dict, List, Optional, Union
+
+from api.cache import MemoryCache, MongoCache, NullCache
+from api.models.yield_model import on_yield_change
+
+# Caches do dashboard das aplicações vivas; os de aplicações descartadas
+# (testes, recriação do app) saem do conjunto quando são coletados
+_caches = weakref.WeakSet()
+
+
+def _clear_caches(action, document):
+    for cache in list(_caches):
+        cache.clear()
+
+
+def create_dashboard_cache(db):
+    """
+    Cria o cache de respostas do /dashboard conforme o ambiente:
+
+    - DASHBOARD_CACHE_BACKEND: "memory" (padrão), "mongo" (compartilhado
+      entre workers, na coleção api_cache) ou "none"
+    - DASHBOARD_CACHE_TTL: validade das entradas em segundos (padrão 300)
+    - DASHBOARD_CACHE_MAX_ENTRIES: limite de entradas do cache em memória
+
+    O cache é limpo sempre que create_yield_event/update_yield_event gravam.
+    Com o backend em memória, escritas feitas por outro worker só aparecem
+    após o TTL.
+    """
+    backend = os.getenv("DASHBOARD_CACHE_BACKEND", "memory").lower()
+    ttl = float(os.getenv("DASHBOARD_CACHE_TTL", "300"))
+
+    if backend == "mongo":
+        cache = MongoCache(db.get_collection("api_cache"), "dashboard", ttl=ttl)
+    elif backend == "memory":
+        max_entries = int(os.getenv("DASHBOARD_CACHE_MAX_ENTRIES", "256"))
+        cache = MemoryCache(ttl=ttl, max_entries=max_entries)
+    else:
+        cache = NullCache()
+
+    _caches.add(cache)
+    on_yield_change(_clear_caches)
+    return cache
+
+
+def _normalize_values(value: Optional[Union[Any, List[Any]]]) -> Optional[List[Any]]:
+    values = value if isinstance(value, list) else [value]
+    values = sorted({v for v in values if v is not None}, key=str)
+    return values or None
+
+
+def _normalize_years(crop_year: Optional[Union[int, str, List[Union[int, str]]]]) -> Optional[List[int]]:
+    years = set()
+    for year in crop_year if isinstance(crop_year, list) else [crop_year]:
+        try:
+            years.add(int(year))
+        except (ValueError, TypeError):
+            continue
+    return sorted(years) or None
+
+
+def normalize_filters(
+    crop_year: Optional[Union[int, str, List[Union[int, str]]]] = None,
+    season: Optional[Union[str, List[str]]] = None,
+    crop: Optional[Union[str, List[str]]] = None,
+    state: Optional[Union[str, List[str]]] = None
+) -> Dict[str, List[Any]]:
+    """
+    Forma canônica dos filtros: mesma semântica de DashboardModel._build_query,
+    sem depender de ordem, duplicatas ou de valor único vs. lista
+    """
+    normalized = {
+        "crop_year": _normalize_years(crop_year),
+        "season": _normalize_values(season),
+        "crop": _normalize_values(crop),
+        "state": _normalize_values(state),
+    }
+    return {field: values for field, values in normalized.items() if values is not None}
+
+
+def make_cache_key(**filters) -> str:
+    canonical = json.dumps(normalize_filters(**filters), sort_keys=True, default=str)
+    return hashlib.sha256(canonical.encode()).hexdigest()
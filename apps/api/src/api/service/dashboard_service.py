@@ -1,15 +1,40 @@
+import asyncio
+import os
 from typing import Dict, List, Tuple
 from typing import List, Dict
 from collections import defaultdict
 from typing import List, Dict, Tuple, Union, Optional
-from api.models.dashboard_model import DashboardModel
+from api.models.dashboard_model import AsyncDashboardModel, DashboardModel
+from api.service.yield_aggregation import (
+    aggregate_cells,
+    aggregate_columns,
+    aggregate_facets,
+    build_dashboard_results,
+    load_yield_columns,
+)
+
+PREVIEW_LIMIT = 500
+
+
+def get_aggregation_mode() -> str:
+    """
+    Define onde os agregados do dashboard são calculados:
+    "python" (padrão), "mongo" (pipelines de agregação no MongoDB) ou
+    "rollup" (células pré-agregadas do cubo de db.yield_rollup).
+
+    Os modos mongo e rollup somam no servidor: totais de valores não
+    inteiros podem diferir do modo python nos últimos bits (ver
+    aggregate_facets); a estrutura e a ordem da resposta são as mesmas.
+    """
+    return os.getenv("DASHBOARD_AGGREGATION_MODE", "python").lower()
 
 
 def get_filtered_yield_data(
     crop_year: Optional[Union[int, List[int]]] = None,
     season: Optional[Union[str, List[str]]] = None,
     crop: Optional[Union[str, List[str]]] = None,
-    state: Optional[Union[str, List[str]]] = None
+    state: Optional[Union[str, List[str]]] = None,
+    model: Optional[DashboardModel] = None
 ) -> Tuple[List[Dict], float]:
     """
     Obtém dados de yield filtrados do MongoDB e retorna processados
@@ -19,31 +44,136 @@ def get_filtered_yield_data(
         season: Estação ou lista de estações
         crop: Cultura ou lista de culturas
         state: Estado ou lista de estados
+        model: Instância do DashboardModel da aplicação (criada se omitida)
 
     Returns:
         Lista de dicionários com os dados processados
     """
-    # 1. Importa/cria a instância do modelo
-    yield_model = DashboardModel()
-
-    # 2. Aplica os filtros e armazena o resultado
-    filtered_data = yield_model.get_filtered_data(
+    # 1. Usa o modelo da aplicação ou cria uma instância
+    yield_model = model or DashboardModel()
+
+    mode = get_aggregation_mode()
+
+    if mode == "rollup":
+        # O cubo já tem as somas por célula: só as linhas exibidas vêm do yield
+        cells = yield_model.get_rollup_cells(
+            crop_year=crop_year,
+            season=season,
+            crop=crop,
+            state=state
+        )
+        preview = yield_model.get_filtered_data(
+            crop_year=crop_year,
+            season=season,
+            crop=crop,
+            state=state,
+            limit=PREVIEW_LIMIT
+        ) if cells else []
+        return (preview, *build_dashboard_results(aggregate_cells(cells)))
+
+    if mode == "mongo":
+        # Agregação feita no MongoDB: trafegam só as linhas exibidas e as somas
+        preview, facets = yield_model.get_aggregated_data(
+            crop_year=crop_year,
+            season=season,
+            crop=crop,
+            state=state,
+            preview_limit=PREVIEW_LIMIT
+        )
+        return (preview, *build_dashboard_results(aggregate_facets(facets)))
+
+    # 2. Uma única leitura com as colunas da prévia, que incluem os campos
+    # das somas: agrega todas as linhas e exibe as primeiras
+    rows = yield_model.get_filtered_data(
         crop_year=crop_year,
         season=season,
         crop=crop,
         state=state
     )
 
-    total_production = calculate_total_production(filtered_data)
-    season_totals = get_yearly_season_totals(filtered_data)
-    states_totals = get_production_by_state(filtered_data)
-    yearly_crop_stats = get_yearly_crop_statistics(filtered_data)
-    metrics = get_general_metrics(filtered_data)
-    crops_totals = get_production_by_crop(filtered_data)
+    total_production, season_totals, states_totals, yearly_crop_stats, metrics, crops_totals = \
+        aggregate_yield_data(rows)
+
+    return rows[:PREVIEW_LIMIT], total_production, season_totals, states_totals, yearly_crop_stats, metrics, crops_totals
+
+
+async def get_filtered_yield_data_async(
+    crop_year: Optional[Union[int, List[int]]] = None,
+    season: Optional[Union[str, List[str]]] = None,
+    crop: Optional[Union[str, List[str]]] = None,
+    state: Optional[Union[str, List[str]]] = None,
+    model: Optional[AsyncDashboardModel] = None
+) -> Tuple:
+    """
+    Versão de get_filtered_yield_data para o servidor ASGI: as consultas são
+    feitas pelo AsyncDashboardModel e os agregados pelas mesmas funções
+    """
+    filters = {"crop_year": crop_year, "season": season, "crop": crop, "state": state}
+    mode = get_aggregation_mode()
+
+    if mode == "rollup":
+        cells = await model.get_rollup_cells(**filters)
+        preview = await model.get_filtered_data(**filters, limit=PREVIEW_LIMIT) if cells else []
+        return (preview, *build_dashboard_results(aggregate_cells(cells)))
+
+    if mode == "mongo":
+        preview, facets = await model.get_aggregated_data(**filters, preview_limit=PREVIEW_LIMIT)
+        return (preview, *build_dashboard_results(aggregate_facets(facets)))
 
-    filtered_data = filtered_data[0:500]
+    rows = await model.get_filtered_data(**filters)
+    # A agregação em NumPy roda fora do event loop
+    results = await asyncio.to_thread(aggregate_yield_data, rows)
+    return (rows[:PREVIEW_LIMIT], *results)
+
+
+def build_dashboard_payload(results: Tuple) -> Dict:
+    """Corpo da resposta do /dashboard a partir do retorno de get_filtered_yield_data"""
+    data, total_production, season_totals, states_totals, yearly_crop_stats, metrics, crops_totals = results
+    return {
+        "data": data,
+        "calculations": {
+            "total_production": total_production,
+            "item_count": len(data)
+        },
+        "season_totals": season_totals,
+        "states_totals": states_totals,
+        "yearly_crop_stats": yearly_crop_stats,
+        "metrics": metrics,
+        "crops_totals": crops_totals
+    }
+
+
+def aggregate_yield_data(filtered_data: List[Dict]) -> Tuple:
+    """
+    Calcula os seis agregados do dashboard carregando os dados uma única vez
+    em colunas (ver api.service.yield_aggregation).
+
+    Quando os dados não estão no formato esperado, recorre às funções
+    individuais abaixo, que continuam sendo a referência do resultado.
+
+    Args:
+        filtered_data: Lista de dicionários com os dados de produção
+
+    Returns:
+        Tupla (total_production, season_totals, states_totals,
+               yearly_crop_stats, metrics, crops_totals)
+    """
+    columns = load_yield_columns(filtered_data) if filtered_data else None
+
+    if columns is None:
+        return (
+            calculate_total_production(filtered_data),
+            get_yearly_season_totals(filtered_data),
+            get_production_by_state(filtered_data),
+            get_yearly_crop_statistics(filtered_data),
+            get_general_metrics(filtered_data),
+            get_production_by_crop(filtered_data),
+        )
+
+    if 'production' not in filtered_data[0]:
+        raise ValueError("O campo 'production' não foi encontrado nos dados")
 
-    return filtered_data, total_production, season_totals, states_totals, yearly_crop_stats, metrics, crops_totals
+    return build_dashboard_results(aggregate_columns(columns))
 
 
 def calculate_total_production(filtered_data: List[Dict]) -> float:
@@ -204,8 +334,8 @@ def get_production_by_state(filtered_data: List[Dict]) -> List[Dict[str, Union[s
     return result
 
 
-def get_filter():
-    model = DashboardModel()
+def get_filter(model: Optional[DashboardModel] = None):
+    model = model or DashboardModel()
     unique_values = model.get_all_unique_values()
     return unique_values["crop_years"], unique_values["seasons"], unique_values["crops"], unique_values["states"]
 
@@ -0,0 +1,104 @@
+import threading
+import time
+import weakref
+
+from pymongo.errors import PyMongoError
+
+from api.models.yield_model import notify_yield_change, on_yield_change
+from db.data_version import bump_data_version, get_data_version
+
+# Watchers das aplicações vivas; um único listener do módulo atende todos
+_watchers = weakref.WeakSet()
+
+
+def _bump_versions(action, document) -> None:
+    """
+    Incrementa a versão uma vez por banco a cada escrita desta API, mesmo
+    com várias aplicações (e watchers) sobre o mesmo banco no processo.
+    """
+    if action == "import":
+        return
+    by_db = {}
+    for watcher in list(_watchers):
+        by_db.setdefault(id(watcher.db), []).append(watcher)
+
+    changed = False
+    for watchers in by_db.values():
+        try:
+            version = bump_data_version(watchers[0].db)
+        except PyMongoError as e:
+            print(f"Erro ao incrementar versão dos dados: {str(e)}")
+            version = None
+        for watcher in watchers:
+            changed = watcher._local_write(version) or changed
+
+    # Outro processo também alterou os dados desde a última consulta
+    if changed:
+        notify_yield_change("import")
+
+
+class DataVersionWatcher:
+    """
+    Acompanha o contador de versão dos dados de yield (db.data_version),
+    incrementado por cargas externas como db.yield_import. Ao perceber uma
+    nova versão, notifica os listeners de on_yield_change com a ação
+    "import", descartando os caches deste processo.
+
+    O banco é consultado no máximo uma vez a cada `interval` segundos.
+
+    Escritas feitas por esta API (create_yield_event/update_yield_event)
+    também incrementam o contador, para que os outros workers percebam a
+    mudança; `version` identifica assim o estado atual dos dados e é usada
+    nos ETags das respostas (api.middleware.conditional).
+    """
+
+    def __init__(self, db, interval: float = 5):
+        self.db = db
+        self.interval = interval
+        self.version = None
+        self._checked_at = None
+        self._lock = threading.Lock()
+        # Versão perdida por uma falha; a próxima lida é tratada como mudança
+        self._lost = False
+        _watchers.add(self)
+        on_yield_change(_bump_versions)
+
+    def _local_write(self, version) -> bool:
+        """
+        Aplica a versão gerada por uma escrita local. Sem ela (falha ao
+        incrementar), `version` fica None até o próximo check() bem-sucedido,
+        e o @conditional deixa de responder 304 com um ETag que já não
+        descreve os dados. Retorna se houve escrita de outro processo.
+        """
+        if version is None:
+            self.version = None
+            self._checked_at = None
+            self._lost = True
+            return False
+        previous, self.version = self.version, version
+        return previous is not None and version != previous + 1
+
+    def due(self) -> bool:
+        """Se a próxima chamada de check() consultaria o banco"""
+        return self._checked_at is None or time.monotonic() - self._checked_at >= self.interval
+
+    def check(self) -> None:
+        now = time.monotonic()
+        if self._checked_at is not None and now - self._checked_at < self.interval:
+            return
+        if not self._lock.acquire(blocking=False):
+            return
+        try:
+            self._checked_at = now
+            version = get_data_version(self.db)
+            changed = version != self.version and (self.version is not None or self._lost)
+            self.version = version
+            self._lost = False
+        except PyMongoError as e:
+            print(f"Erro ao consultar versão dos dados: {str(e)}")
+            return
+        finally:
+            self._lock.release()
+
+        if changed:
+            notify_yield_change("import")
@@ -0,0 +1,173 @@
+import hashlib
+import json
+import os
+import threading
+import weakref
+from typing import Callable, Dict, List, Optional, Tuple
+
+from pymongo.errors import PyMongoError
+
+from api.models.dashboard_model import DashboardModel
+from api.models.yield_model import on_yield_change
+
+CATALOG_FIELDS = {
+    "crop_years": "crop_year",
+    "seasons": "season",
+    "crops": "crop",
+    "states": "state"
+}
+CATALOG_ID = "dashboard_filters"
+
+
+class FilterCatalog:
+    """
+    Catálogo dos valores possíveis de cada filtro do dashboard.
+
+    É calculado uma vez (ou lido da coleção de metadados, quando informada),
+    mantido em memória já serializado junto com seu ETag e atualizado de
+    forma incremental quando novos eventos de yield são gravados.
+    """
+
+    def __init__(
+        self,
+        loader: Callable[[], Dict[str, List[str]]],
+        metadata_collection=None
+    ):
+        self.loader = loader
+        self.metadata_collection = metadata_collection
+        self._values: Optional[Dict[str, set]] = None
+        self._body = b""
+        self._etag = ""
+        self._lock = threading.Lock()
+
+    def get(self) -> Tuple[bytes, str]:
+        """
+        Retorna o catálogo serializado em JSON e seu ETag. Erros do loader
+        são propagados: um catálogo vazio por falha transitória do MongoDB
+        não fica em memória nem é gravado para os outros processos
+        """
+        if self._values is None:
+            with self._lock:
+                if self._values is None:
+                    persisted = self._load_persisted()
+                    self._set_values(persisted or self.loader())
+                    if persisted is None:
+                        self._persist()
+        return self._body, self._etag
+
+    def values(self) -> Dict[str, List[str]]:
+        self.get()
+        return {key: sorted(values) for key, values in self._values.items()}
+
+    def refresh(self) -> None:
+        """Recalcula todo o catálogo a partir da coleção de yield"""
+        with self._lock:
+            self._set_values(self.loader())
+            self._persist()
+
+    def invalidate(self) -> None:
+        """Descarta o catálogo em memória; ele é recarregado no próximo get()"""
+        with self._lock:
+            self._values = None
+
+    def add_document(self, document: Optional[dict]) -> None:
+        """Inclui no catálogo os valores de um documento inserido ou atualizado"""
+        if not document:
+            return
+
+        with self._lock:
+            current = self._values or {key: set() for key in CATALOG_FIELDS}
+            additions = {
+                key: {str(document[field])} - current[key]
+                for key, field in CATALOG_FIELDS.items()
+                if document.get(field) is not None
+            }
+            additions = {key: values for key, values in additions.items() if values}
+            if not additions:
+                return
+
+            if self._values is not None:
+                self._set_values({
+                    key: values | additions.get(key, set())
+                    for key, values in self._values.items()
+                })
+
+            if self.metadata_collection is not None:
+                try:
+                    # Sem upsert: um catálogo parcial nunca deve ser criado aqui
+                    self.metadata_collection.update_one(
+                        {"_id": CATALOG_ID},
+                        {"$addToSet": {
+                            key: {"$each": sorted(values)}
+                            for key, values in additions.items()
+                        }}
+                    )
+                except PyMongoError as e:
+                    print(f"Erro ao atualizar catálogo de filtros: {str(e)}")
+
+    def _set_values(self, values: Dict[str, List[str]]) -> None:
+        self._values = {key: set(values.get(key, [])) for key in CATALOG_FIELDS}
+        self._body = json.dumps(
+            {key: sorted(items) for key, items in self._values.items()},
+            sort_keys=True,
+            separators=(",", ":")
+        ).encode()
+        self._etag = hashlib.sha256(self._body).hexdigest()
+
+    def _load_persisted(self) -> Optional[Dict[str, List[str]]]:
+        if self.metadata_collection is None:
+            return None
+        try:
+            document = self.metadata_collection.find_one({"_id": CATALOG_ID})
+        except PyMongoError as e:
+            print(f"Erro ao ler catálogo de filtros: {str(e)}")
+            return None
+        if not document:
+            return None
+        return {key: document.get(key, []) for key in CATALOG_FIELDS}
+
+    def _persist(self) -> None:
+        if self.metadata_collection is None:
+            return
+        try:
+            self.metadata_collection.replace_one(
+                {"_id": CATALOG_ID},
+                {key: sorted(values) for key, values in self._values.items()},
+                upsert=True
+            )
+        except PyMongoError as e:
+            print(f"Erro ao gravar catálogo de filtros: {str(e)}")
+
+
+# Catálogos das aplicações vivas, atualizados por um único listener
+_catalogs = weakref.WeakSet()
+
+
+def _update_catalogs(action, document):
+    for catalog in list(_catalogs):
+        # Cargas externas podem alterar ou remover valores: recalcula tudo
+        if action == "import":
+            catalog.invalidate()
+        else:
+            catalog.add_document(document)
+
+
+def create_filter_catalog(db, model: Optional[DashboardModel] = None) -> FilterCatalog:
+    """
+    Cria o catálogo de filtros do dashboard. Com DASHBOARD_FILTERS_PERSIST=true
+    o catálogo também é guardado na coleção metadata_collection, para que
+    novos workers não precisem recalculá-lo.
+    """
+    model = model or DashboardModel(db)
+    metadata_collection = None
+    if os.getenv("DASHBOARD_FILTERS_PERSIST") == "true":
+        metadata_collection = db.get_collection("metadata_collection")
+
+    catalog = FilterCatalog(
+        model.load_unique_values,
+        metadata_collection
+    )
+
+    _catalogs.add(catalog)
+    on_yield_change(_update_catalogs)
+    return catalog
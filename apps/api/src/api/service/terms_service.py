@@ -182,6 +182,17 @@ def check_user_acceptance_compliance(user_acceptance_collection, terms_collectio
     if not user_acceptance:
         return (False, [])
 
+    return compliance(active_term, user_acceptance)
+
+
+def compliance(active_term, user_acceptance):
+    """
+    Compara a aceitação do usuário com o termo ativo, já carregados (usada
+    também pelas rotas do servidor ASGI).
+
+    Returns:
+        tuple: (bool: se está em conformidade, list: tópicos não conformes)
+    """
     non_compliant_topics = []
 
     # Verifica tópicos obrigatórios ativos
@@ -0,0 +1,394 @@
+from operator import itemgetter, methodcaller
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+
+GROUP_FIELDS = ("crop_year", "season", "crop", "state")
+NUMERIC_FIELDS = ("production", "area", "fertilizer", "pesticide", "annual_rainfall")
+FIXED_SEASONS = ["Spring", "Summer", "Autumn", "Winter"]
+WHOLE_YEAR = "Whole Year"
+
+
+class YieldColumns:
+    """
+    Dados de yield carregados uma única vez em colunas.
+
+    As dimensões (crop_year, season, crop, state) viram códigos inteiros
+    (na ordem da primeira aparição) e cada campo numérico é guardado como
+    array float64 e como array de objetos com os valores originais.
+    """
+
+    def __init__(self, rows: List[Dict[str, Any]]):
+        self.size = len(rows)
+        columns = dict(zip(GROUP_FIELDS + NUMERIC_FIELDS, _read_columns(rows)))
+
+        self.codes = {}
+        self.labels = {}
+        for field in GROUP_FIELDS:
+            self.codes[field], self.labels[field] = _factorize(columns[field])
+
+        self.values = {}
+        self.floats = {}
+        for field in NUMERIC_FIELDS:
+            values = columns[field]
+            if not set(map(type, values)) <= {int, float}:
+                raise TypeError(f"Valores não numéricos em '{field}'")
+            self.values[field] = np.array(values, dtype=object)
+            self.floats[field] = np.array(values, dtype=np.float64)
+
+
+class YieldAggregates:
+    """
+    Somas agrupadas que alimentam os seis resultados do dashboard.
+
+    Os dicionários seguem a ordem da primeira aparição de cada grupo. Somas
+    com semântica de `sum()` (int quando todos os valores são inteiros)
+    ficam em `total_production` e `year_crop`; as demais são sempre float.
+    """
+
+    def __init__(self):
+        self.row_count = 0
+        self.total_production = 0
+        self.year_season: Dict[Tuple[Any, Any], float] = {}
+        self.years: List[Any] = []
+        self.state: Dict[Any, Dict[str, float]] = {}
+        self.crop: Dict[Any, Dict[str, float]] = {}
+        self.year_crop: Dict[Tuple[Any, Any], Dict[str, Any]] = {}
+        self.metrics_production = 0.0
+        self.metrics_area = 0.0
+        self.species_count = 0
+        self.states_count = 0
+
+
+def _read_columns(rows: List[Dict[str, Any]]) -> List[Tuple]:
+    """
+    Lê todos os campos em uma única passada pelas linhas. Campos numéricos
+    ausentes valem 0, como nos cálculos originais.
+    """
+    try:
+        return list(zip(*map(itemgetter(*GROUP_FIELDS, *NUMERIC_FIELDS), rows)))
+    except KeyError:
+        groups = list(zip(*map(itemgetter(*GROUP_FIELDS), rows)))
+        return groups + [
+            tuple(map(methodcaller("get", field, 0), rows))
+            for field in NUMERIC_FIELDS
+        ]
+
+
+def _factorize(values: Tuple) -> Tuple[np.ndarray, List[Any]]:
+    """Converte uma coluna em códigos inteiros e a lista de rótulos únicos"""
+    labels = list(dict.fromkeys(values))
+    if None in labels:
+        raise TypeError("Valores nulos em campo de agrupamento")
+    index = {label: code for code, label in enumerate(labels)}
+    codes = np.fromiter(map(index.__getitem__, values), dtype=np.intp, count=len(values))
+    return codes, labels
+
+
+def _group_sums(codes: np.ndarray, weights: np.ndarray, size: int) -> np.ndarray:
+    """
+    Soma float por grupo. O bincount acumula na ordem das linhas, o que
+    reproduz exatamente o `+=` sequencial da implementação original.
+    """
+    return np.bincount(codes, weights=weights, minlength=size)
+
+
+def _segment_sums(values: np.ndarray, order: np.ndarray, bounds: np.ndarray) -> List[Any]:
+    """Aplica `sum()` em cada grupo mantendo a ordem original das linhas"""
+    ordered = values[order].tolist()
+    return [sum(ordered[start:end]) for start, end in zip(bounds[:-1], bounds[1:])]
+
+
+def aggregate_columns(columns: YieldColumns) -> YieldAggregates:
+    """Calcula todos os agrupamentos do dashboard em uma única passada"""
+    aggregates = YieldAggregates()
+    aggregates.row_count = columns.size
+
+    year_codes = columns.codes["crop_year"]
+    season_codes = columns.codes["season"]
+    crop_codes = columns.codes["crop"]
+    state_codes = columns.codes["state"]
+    years = columns.labels["crop_year"]
+    seasons = columns.labels["season"]
+    crops = columns.labels["crop"]
+    states = columns.labels["state"]
+
+    production = columns.floats["production"]
+    area = columns.floats["area"]
+
+    aggregates.total_production = sum(columns.values["production"].tolist())
+    aggregates.years = years
+
+    # Ano x estação
+    n_seasons = len(seasons)
+    year_season_codes = year_codes * n_seasons + season_codes
+    cells = len(years) * n_seasons
+    counts = np.bincount(year_season_codes, minlength=cells)
+    totals = _group_sums(year_season_codes, production, cells)
+    for code in np.flatnonzero(counts).tolist():
+        year_index, season_index = divmod(code, n_seasons)
+        aggregates.year_season[(years[year_index], seasons[season_index])] = float(totals[code])
+
+    # Estado e cultura
+    for labels, codes, target in (
+        (states, state_codes, aggregates.state),
+        (crops, crop_codes, aggregates.crop),
+    ):
+        group_production = _group_sums(codes, production, len(labels))
+        group_area = _group_sums(codes, area, len(labels))
+        for index, label in enumerate(labels):
+            target[label] = {
+                "production": float(group_production[index]),
+                "area": float(group_area[index]),
+            }
+
+    # Ano x cultura
+    n_crops = len(crops)
+    year_crop_codes = year_codes * n_crops + crop_codes
+    order = np.argsort(year_crop_codes, kind="stable")
+    present, starts, group_counts = np.unique(
+        year_crop_codes[order], return_index=True, return_counts=True)
+    bounds = np.append(starts, len(order))
+    sums = {
+        field: _segment_sums(columns.values[field], order, bounds)
+        for field in NUMERIC_FIELDS
+    }
+    # Ordena os grupos pela primeira aparição do ano, como o agrupamento original
+    for position in np.argsort(present // n_crops, kind="stable").tolist():
+        year_index, crop_index = divmod(int(present[position]), n_crops)
+        aggregates.year_crop[(years[year_index], crops[crop_index])] = {
+            "count": int(group_counts[position]),
+            **{field: sums[field][position] for field in NUMERIC_FIELDS},
+        }
+
+    # Métricas gerais
+    single_group = np.zeros(columns.size, dtype=np.intp)
+    aggregates.metrics_production = float(_group_sums(single_group, production, 1)[0])
+    aggregates.metrics_area = float(_group_sums(single_group, area, 1)[0])
+    aggregates.species_count = sum(1 for crop in crops if crop)
+    aggregates.states_count = sum(1 for state in states if state)
+
+    return aggregates
+
+
+def aggregate_cells(cells: List[Dict[str, Any]]) -> YieldAggregates:
+    """
+    Combina células já agrupadas por (crop_year, season, crop, state).
+
+    Cada célula traz os quatro campos de agrupamento, `count` e a soma de
+    cada campo numérico. Usado quando os agrupamentos vêm prontos do MongoDB.
+    """
+    aggregates = YieldAggregates()
+    crops = set()
+    states = set()
+
+    for cell in cells:
+        year, season, crop, state = (cell.get(field) for field in GROUP_FIELDS)
+        production = cell["production"]
+        area = cell["area"]
+
+        aggregates.row_count += cell["count"]
+        aggregates.total_production += production
+        aggregates.metrics_production += production
+        aggregates.metrics_area += area
+
+        if year not in aggregates.years:
+            aggregates.years.append(year)
+
+        key = (year, season)
+        aggregates.year_season[key] = aggregates.year_season.get(key, 0.0) + production
+
+        for label, target in ((state, aggregates.state), (crop, aggregates.crop)):
+            # Linhas sem estado ou cultura ficam fora dos rankings, como em
+            # get_production_by_state e get_production_by_crop
+            if label is None:
+                continue
+            stats = target.setdefault(label, {"production": 0.0, "area": 0.0})
+            stats["production"] += production
+            stats["area"] += area
+
+        stats = aggregates.year_crop.setdefault(
+            (year, crop), {"count": 0, **{field: 0 for field in NUMERIC_FIELDS}})
+        stats["count"] += cell["count"]
+        for field in NUMERIC_FIELDS:
+            stats[field] += cell[field]
+
+        if crop:
+            crops.add(crop)
+        if state:
+            states.add(state)
+
+    aggregates.species_count = len(crops)
+    aggregates.states_count = len(states)
+
+    return aggregates
+
+
+def aggregate_facets(facets: Dict[str, List[Dict[str, Any]]]) -> YieldAggregates:
+    """
+    Monta os agrupamentos a partir dos ramos do $facet de
+    DashboardModel.get_aggregated_data, cada um já agrupado no grão do
+    resultado que alimenta (totais, estado, cultura, ano x estação e
+    ano x cultura).
+
+    O $sum do MongoDB soma floats com compensação de erro, e não na ordem
+    das linhas como o caminho em Python: somas de valores não inteiros
+    podem diferir nos últimos bits (erro relativo da ordem de 1e-15).
+    Inteiros e frações binárias exatas (ex.: múltiplos de 0.25) coincidem.
+    """
+    aggregates = YieldAggregates()
+    totals = next(iter(facets.get("totals", [])), None)
+    if totals is None:
+        return aggregates
+
+    aggregates.row_count = totals["count"]
+    aggregates.total_production = totals["production"]
+    aggregates.metrics_production = float(totals["production"])
+    aggregates.metrics_area = float(totals["area"])
+
+    years = {}
+    for group in facets.get("year_season", []):
+        # Campos ausentes não entram no _id composto do $group
+        year, season = group["_id"].get("crop_year"), group["_id"].get("season")
+        years[year] = None
+        aggregates.year_season[(year, season)] = float(group["production"])
+    aggregates.years = list(years)
+
+    for field, target in (("state", aggregates.state), ("crop", aggregates.crop)):
+        for group in facets.get(f"by_{field}", []):
+            if group["_id"] is None:
+                continue
+            target[group["_id"]] = {
+                "production": float(group["production"]),
+                "area": float(group["area"]),
+            }
+
+    for group in facets.get("year_crop", []):
+        key = (group["_id"].get("crop_year"), group["_id"].get("crop"))
+        aggregates.year_crop[key] = {
+            "count": group["count"],
+            **{field: group[field] for field in NUMERIC_FIELDS},
+        }
+
+    aggregates.species_count = sum(1 for crop in aggregates.crop if crop)
+    aggregates.states_count = sum(1 for state in aggregates.state if state)
+
+    return aggregates
+
+
+def build_dashboard_results(aggregates: YieldAggregates) -> Tuple[Any, Dict, List[Dict], Dict, Dict, List[Dict]]:
+    """
+    Monta os seis resultados do dashboard a partir dos agrupamentos, no mesmo
+    formato de calculate_total_production, get_yearly_season_totals,
+    get_production_by_state, get_yearly_crop_statistics, get_general_metrics
+    e get_production_by_crop.
+    """
+    if aggregates.row_count == 0:
+        total_production = 0.0
+    else:
+        total_production = aggregates.total_production
+
+    return (
+        total_production,
+        _build_season_totals(aggregates),
+        _build_efficiency_ranking(aggregates.state, "state"),
+        _build_yearly_crop_statistics(aggregates),
+        _build_general_metrics(aggregates),
+        _build_efficiency_ranking(aggregates.crop, "crop"),
+    )
+
+
+def _build_season_totals(aggregates: YieldAggregates) -> Dict[str, List]:
+    sorted_years = sorted(aggregates.years)
+    result = {
+        "years": sorted_years,
+        "total": [0] * len(sorted_years),
+        "production_average": [0] * len(sorted_years)
+    }
+    for season in FIXED_SEASONS:
+        result[season] = [0] * len(sorted_years)
+
+    for i, year in enumerate(sorted_years):
+        total_year_prod = 0
+        for season in FIXED_SEASONS:
+            production = aggregates.year_season.get((year, season), 0)
+            result[season][i] = production
+            total_year_prod += production
+        result["total"][i] = total_year_prod
+
+        if (year, WHOLE_YEAR) in aggregates.year_season:
+            result["production_average"][i] = aggregates.year_season[(year, WHOLE_YEAR)] / 4
+
+    return result
+
+
+def _build_efficiency_ranking(groups: Dict[Any, Dict[str, float]], label: str) -> List[Dict]:
+    result = []
+    for name, stats in groups.items():
+        efficiency = stats["production"] / \
+            stats["area"] if stats["area"] > 0 else 0.0
+        result.append({
+            label: name,
+            "total_production": stats["production"],
+            "total_area": stats["area"],
+            "efficiency": round(efficiency, 2)
+        })
+
+    result.sort(key=lambda x: (-x["efficiency"], x[label]))
+    return result
+
+
+def _build_yearly_crop_statistics(aggregates: YieldAggregates) -> Dict[Any, List[Dict]]:
+    result = {}
+    for (year, crop), stats in aggregates.year_crop.items():
+        result.setdefault(year, []).append({
+            "crop": crop,
+            "total_production": stats["production"],
+            "avg_area": stats["area"] / stats["count"],
+            "total_fertilizer": stats["fertilizer"],
+            "total_pesticide": stats["pesticide"],
+            "avg_rainfall": stats["annual_rainfall"] / stats["count"]
+        })
+
+    # Anos em ordem crescente, como em _build_season_totals: a ordem não
+    # depende da origem dos agrupamentos (linhas, $facet ou cubo)
+    return {
+        year: sorted(result[year], key=lambda x: x["crop"])
+        for year in sorted(result)
+    }
+
+
+def _build_general_metrics(aggregates: YieldAggregates) -> Dict[str, Any]:
+    if aggregates.row_count == 0:
+        return {
+            "production_efficiency": 0.0,
+            "total_production": 0.0,
+            "total_cultivated_area": 0.0,
+            "total_species": 0,
+            "total_states": 0
+        }
+
+    total_production = aggregates.metrics_production
+    total_area = aggregates.metrics_area
+    production_efficiency = total_production / total_area if total_area > 0 else 0.0
+
+    return {
+        "production_efficiency": round(production_efficiency, 2),
+        "total_production": round(total_production, 2),
+        "total_cultivated_area": round(total_area, 2),
+        "total_species": aggregates.species_count,
+        "total_states": aggregates.states_count
+    }
+
+
+def load_yield_columns(rows: List[Dict[str, Any]]) -> Optional[YieldColumns]:
+    """
+    Carrega as linhas em colunas. Retorna None quando os dados fogem do
+    formato esperado (campo de agrupamento ausente ou nulo, valor numérico
+    inválido), casos em que o cálculo original deve ser usado.
+    """
+    try:
+        return YieldColumns(rows)
+    except (KeyError, TypeError, ValueError, OverflowError):
+        return None
@@ -0,0 +1,109 @@
+import csv
+import io
+import json
+import os
+from typing import AsyncIterator, Iterable, Iterator, List, Optional
+
+from api.models.yield_model import YieldEvent
+
+EXPORT_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+EXPORT_FIELDS: List[str] = [
+    field.alias or name for name, field in YieldEvent.model_fields.items()
+]
+CHUNK_SIZE = 64 * 1024
+
+
+def get_export_batch_size() -> int:
+    return int(os.getenv("YIELD_EXPORT_BATCH_SIZE", "1000"))
+
+
+def find_for_export(collection, query_filter: Optional[dict] = None):
+    """Cursor sobre os eventos filtrados, lido do MongoDB em lotes"""
+    return collection.find(
+        query_filter or {},
+        {"_id": 0},
+        batch_size=get_export_batch_size()
+    )
+
+
+def iter_ndjson(documents: Iterable[dict], chunk_size: int = CHUNK_SIZE) -> Iterator[str]:
+    """Serializa um documento por linha, agrupando as linhas em blocos de ~chunk_size"""
+    buffer = []
+    buffered = 0
+    for document in documents:
+        line = json.dumps(document, default=str) + "\n"
+        buffer.append(line)
+        buffered += len(line)
+        if buffered >= chunk_size:
+            yield "".join(buffer)
+            buffer = []
+            buffered = 0
+    if buffer:
+        yield "".join(buffer)
+
+
+def iter_csv(
+    documents: Iterable[dict],
+    fields: List[str] = EXPORT_FIELDS,
+    chunk_size: int = CHUNK_SIZE,
+    header: bool = True
+) -> Iterator[str]:
+    """Serializa os documentos em CSV com cabeçalho, em blocos de ~chunk_size"""
+    output = io.StringIO()
+    writer = csv.DictWriter(output, fieldnames=fields, extrasaction="ignore")
+    if header:
+        writer.writeheader()
+    for document in documents:
+        writer.writerow(document)
+        if output.tell() >= chunk_size:
+            yield output.getvalue()
+            output.seek(0)
+            output.truncate()
+    if output.tell():
+        yield output.getvalue()
+
+
+def stream_export(collection, query_filter: Optional[dict], export_format: str) -> Iterator[str]:
+    """
+    Gera a exportação em blocos, sem materializar o resultado: a memória
+    usada fica limitada ao lote do cursor e a um bloco de saída.
+    O cursor é fechado mesmo se o cliente desconectar no meio.
+    """
+    serializer = iter_csv if export_format == "csv" else iter_ndjson
+    cursor = find_for_export(collection, query_filter)
+    try:
+        yield from serializer(cursor)
+    finally:
+        cursor.close()
+
+
+async def stream_export_async(
+    collection, query_filter: Optional[dict], export_format: str
+) -> AsyncIterator[str]:
+    """
+    stream_export para uma AsyncCollection (servidor ASGI): cada lote lido
+    do cursor é serializado pelas mesmas funções, com o cabeçalho do CSV
+    apenas no primeiro
+    """
+    batch_size = get_export_batch_size()
+    cursor = find_for_export(collection, query_filter)
+    first = True
+    try:
+        while True:
+            batch = await cursor.to_list(batch_size)
+            if not batch and not first:
+                break
+            if export_format == "csv":
+                chunks = iter_csv(batch, header=first)
+            else:
+                chunks = iter_ndjson(batch)
+            for chunk in chunks:
+                yield chunk
+            first = False
+            if len(batch) < batch_size:
+                break
+    finally:
+        await cursor.close()
@@ -1,27 +1,57 @@
 from typing import Dict, List, Tuple
 from typing import Union, Optional
-from api.models.yield_predict_model import YieldPredictModel
+from api.models.yield_predict_model import AsyncYieldPredictModel, YieldPredictModel
+
+PREVIEW_LIMIT = 300
+
+# Opções fixas dos filtros da página de projeção
+FILTER_OPTIONS = {
+    "crop_years": [2021, 2022, 2023],
+    "seasons": ["Spring", "Summer", "Autumn", "Winter"],
+    "crops": ["Corn", "Soybean", "Wheat"],
+    "states": ["California", "Texas", "Iowa"]
+}
 
 
 def get_filtered_yield_predict_data(
     crop_year: Optional[Union[int, List[int]]] = None,
     season: Optional[Union[str, List[str]]] = None,
     crop: Optional[Union[str, List[str]]] = None,
-    state: Optional[Union[str, List[str]]] = None
+    state: Optional[Union[str, List[str]]] = None,
+    model: Optional[YieldPredictModel] = None
 ) -> List[Dict]:
     """
-    Obtém dados de previsão de yield filtrados do MongoDB com base nos filtros opcionais
+    Obtém dados de previsão de yield filtrados do MongoDB com base nos filtros opcionais.
+    `model` é a instância da aplicação; sem ela, uma nova é criada.
     """
-    # 1. Importa/cria a instância do modelo
-    yield_predict_model = YieldPredictModel()
+    # 1. Usa o modelo da aplicação ou cria uma instância
+    yield_predict_model = model or YieldPredictModel()
 
     # 2. Aplica os filtros e armazena o resultado
     filtered_data = yield_predict_model.get_filtered_data(
         crop_year=crop_year,
         season=season,
         crop=crop,
-        state=state
+        state=state,
+        limit=PREVIEW_LIMIT
     )
 
     # 3. Retorna os dados filtrados
-    return filtered_data[:300]
+    return filtered_data
+
+
+async def get_filtered_yield_predict_data_async(
+    crop_year: Optional[Union[int, List[int]]] = None,
+    season: Optional[Union[str, List[str]]] = None,
+    crop: Optional[Union[str, List[str]]] = None,
+    state: Optional[Union[str, List[str]]] = None,
+    model: Optional[AsyncYieldPredictModel] = None
+) -> List[Dict]:
+    """Versão de get_filtered_yield_predict_data para o servidor ASGI"""
+    return await model.get_filtered_data(
+        crop_year=crop_year,
+        season=season,
+        crop=crop,
+        state=state,
+        limit=PREVIEW_LIMIT
+    )
@@ -0,0 +1,75 @@
+import inspect
+import os
+import time
+from api.middleware import auth
+from db.mongo import MongoDB
+
+WARMUP_EXTENSION = "warmup"
+
+
+def warmup_enabled():
+    return os.getenv("API_WARMUP", "true") == "true"
+
+
+def add_warmup(app, name, task):
+    """
+    Registra uma tarefa de aquecimento da aplicação: uma função (ou, no
+    Quart, uma corrotina) sem argumentos que prepara caches antes do
+    primeiro acesso. Os blueprints registram as suas com `record_once`.
+    """
+    app.extensions.setdefault(WARMUP_EXTENSION, []).append((name, task))
+
+
+def warm_up(app):
+    """
+    Executa as tarefas registradas, no contexto da aplicação Flask. Uma
+    tarefa que falha só é registrada no log: a requisição real refaz o
+    trabalho, então o aquecimento nunca impede o servidor de subir.
+    """
+    with app.app_context():
+        for name, task in app.extensions.get(WARMUP_EXTENSION, []):
+            _run(name, task)
+
+
+def warm_up_connections():
+    """
+    Abre as conexões do processo antes da primeira requisição: o pool do
+    MongoDB e, no modo local de auth, a lista de tokens revogados (com a
+    conexão ao banco de chaves). Cada worker chama isto depois do fork.
+    """
+    _run("pool do MongoDB", MongoDB.startup)
+    if auth.AUTH_MODE == "local":
+        _run("tokens revogados", auth.get_local_verifier().revoked.start)
+
+
+async def warm_up_async(app):
+    """Mesmo que `warm_up`, para a aplicação Quart (api.asgi.server)."""
+    async with app.app_context():
+        for name, task in app.extensions.get(WARMUP_EXTENSION, []):
+            start = time.perf_counter()
+            try:
+                result = task()
+                if inspect.isawaitable(result):
+                    await result
+            except Exception as e:
+                _report(name, start, e)
+            else:
+                _report(name, start)
+
+
+def _run(name, task):
+    start = time.perf_counter()
+    try:
+        task()
+    except Exception as e:
+        _report(name, start, e)
+    else:
+        _report(name, start)
+
+
+def _report(name, start, error=None):
+    elapsed = (time.perf_counter() - start) * 1000
+    if error is not None:
+        print(f"[{os.getpid()}] Aquecimento de {name} falhou: {error}")
+    else:
+        print(f"[{os.getpid()}] Aquecimento de {name}: {elapsed:.0f} ms")
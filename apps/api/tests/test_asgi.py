@@ -0,0 +1,325 @@
+import asyncio
+import itertools
+import json
+import random
+import pytest
+from flask import Flask
+from mongomock import MongoClient
+from quart import Quart
+from api.asgi.routes import create_blueprints as create_async_blueprints
+from api.json_provider import ORJSONProvider
+from api.middleware.conditional import DATA_VERSION_EXTENSION, compute_etag
+from api.models.dashboard_model import AsyncDashboardModel, DashboardModel
+from api.models.yield_predict_model import AsyncYieldPredictModel, YieldPredictModel
+from api.routes import create_blueprints
+from api.routes.pagination import Pagination
+from api.service.dashboard_service import get_filtered_yield_data, get_filtered_yield_data_async
+from api.service.data_version import DataVersionWatcher
+from api.service.yield_export import stream_export, stream_export_async
+from api.service.yield_predict_service import (
+    get_filtered_yield_predict_data,
+    get_filtered_yield_predict_data_async,
+)
+from db.yield_rollup import build_rollup
+
+
+class AsyncCursor:
+    """Interface do AsyncCursor do pymongo sobre um cursor do mongomock"""
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def sort(self, *args, **kwargs):
+        self._cursor.sort(*args, **kwargs)
+        return self
+
+    def skip(self, count):
+        self._cursor.skip(count)
+        return self
+
+    def limit(self, count):
+        self._cursor.limit(count)
+        return self
+
+    async def to_list(self, length=None):
+        return list(itertools.islice(self._cursor, length))
+
+    async def close(self):
+        self._cursor.close()
+
+
+class AsyncCollection:
+    """Interface da AsyncCollection do pymongo sobre uma coleção do mongomock"""
+
+    def __init__(self, collection):
+        self._collection = collection
+        self.name = collection.name
+        self.full_name = collection.full_name
+
+    def find(self, *args, **kwargs):
+        return AsyncCursor(self._collection.find(*args, **kwargs))
+
+    async def aggregate(self, pipeline, **kwargs):
+        return AsyncCursor(iter(list(self._collection.aggregate(pipeline, **kwargs))))
+
+    def __getattr__(self, name):
+        method = getattr(self._collection, name)
+
+        async def call(*args, **kwargs):
+            return method(*args, **kwargs)
+        return call
+
+
+class AsyncDatabase:
+    def __init__(self, db):
+        self._db = db
+
+    def get_collection(self, name, **kwargs):
+        return AsyncCollection(self._db.get_collection(name, **kwargs))
+
+    def __getitem__(self, name):
+        return self.get_collection(name)
+
+
+@pytest.fixture
+def mock_mongo():
+    rng = random.Random(11)
+    db = MongoClient()['test_db']
+    db['yield_collection'].insert_many([
+        {
+            "crop": rng.choice(["Wheat", "Rice", "Maize"]),
+            "crop_year": rng.randint(2000, 2004),
+            "season": rng.choice(["Whole Year", "Spring", "Autumn", "Summer", "Winter"]),
+            "state": rng.choice(["Acre", "Bahia", "Pará"]),
+            "area": rng.randint(1, 2000) / 2,
+            "production": rng.randint(0, 50000),
+            "annual_rainfall": rng.randint(600, 6000) / 2,
+            "fertilizer": rng.randint(0, 90000) / 4,
+            "pesticide": rng.randint(0, 4000) / 4,
+            "yield": 1.0,
+        }
+        for _ in range(300)
+    ])
+    db['yield_predict_collection'].insert_many([
+        {"Crop": "Corn", "Crop_year": 2021 + i % 3, "Season": "Summer", "State": "Iowa",
+         "Area": 1.0, "Predicted_Production": i}
+        for i in range(30)
+    ])
+    return db
+
+
+@pytest.fixture
+def async_mongo(mock_mongo):
+    return AsyncDatabase(mock_mongo)
+
+
+def as_json(results):
+    return json.dumps(results, sort_keys=True, default=str)
+
+
+@pytest.mark.parametrize("mode", ["python", "mongo", "rollup"])
+@pytest.mark.parametrize("filters", [
+    {},
+    {"crop_year": [2001, 2003], "season": "Spring"},
+    {"crop": ["Rice"], "state": "Acre"},
+])
+def test_async_dashboard_matches_sync(mock_mongo, async_mongo, monkeypatch, mode, filters):
+    monkeypatch.setenv("DASHBOARD_AGGREGATION_MODE", mode)
+    if mode == "rollup":
+        build_rollup(mock_mongo)
+
+    expected = get_filtered_yield_data(**filters, model=DashboardModel(mock_mongo))
+    result = asyncio.run(get_filtered_yield_data_async(
+        **filters, model=AsyncDashboardModel(async_mongo)))
+    assert as_json(result) == as_json(expected)
+
+
+def test_async_filters_and_projection_match_sync(mock_mongo, async_mongo):
+    assert asyncio.run(AsyncDashboardModel(async_mongo).get_all_unique_values()) == \
+        DashboardModel(mock_mongo).get_all_unique_values()
+
+    expected = get_filtered_yield_predict_data(
+        crop_year=2022, model=YieldPredictModel(mock_mongo))
+    result = asyncio.run(get_filtered_yield_predict_data_async(
+        crop_year=2022, model=AsyncYieldPredictModel(async_mongo)))
+    assert result == expected and len(result) == 10
+
+
+def test_async_pagination_matches_sync(mock_mongo, async_mongo):
+    Pagination.invalidate_counts()
+    collection = mock_mongo['yield_collection']
+    async_collection = async_mongo['yield_collection']
+    query = {"crop": {"$in": ["Rice"]}}
+
+    assert asyncio.run(Pagination.offset_page_async(async_collection, 2, 20, query)) == \
+        Pagination.offset_page(collection, 2, 20, query)
+
+    cursor = None
+    while True:
+        items, metadata = Pagination.cursor_page(collection, 40, cursor, query, with_total=True)
+        assert asyncio.run(Pagination.cursor_page_async(
+            async_collection, 40, cursor, query, with_total=True)) == (items, metadata)
+        if not metadata["next"]:
+            break
+        cursor = Pagination.decode_cursor(metadata["next"])
+
+
+@pytest.mark.parametrize("export_format", ["ndjson", "csv"])
+def test_async_export_matches_sync(mock_mongo, async_mongo, monkeypatch, export_format):
+    # Lote menor que o total, para o CSV atravessar vários lotes
+    monkeypatch.setenv("YIELD_EXPORT_BATCH_SIZE", "70")
+    query = {"state": {"$in": ["Acre", "Bahia"]}}
+
+    async def collect():
+        return [chunk async for chunk in stream_export_async(
+            async_mongo['yield_collection'], query, export_format)]
+
+    expected = "".join(stream_export(mock_mongo['yield_collection'], query, export_format))
+    assert "".join(asyncio.run(collect())) == expected
+
+
+# Rotas: as mesmas requisições nas duas aplicações
+
+def create_flask_app(mock_mongo):
+    app = Flask(__name__)
+    app.json = ORJSONProvider(app)
+    watcher = DataVersionWatcher(mock_mongo, interval=0)
+    watcher.check()
+    app.before_request(watcher.check)
+    app.extensions[DATA_VERSION_EXTENSION] = watcher
+    for blueprint in create_blueprints(mock_mongo):
+        app.register_blueprint(blueprint)
+    return app
+
+
+def create_quart_app(mock_mongo, async_mongo):
+    app = Quart(__name__)
+    app.json = ORJSONProvider(app)
+    watcher = DataVersionWatcher(mock_mongo, interval=0)
+    watcher.check()
+    app.before_request(lambda: watcher.check())
+    app.extensions[DATA_VERSION_EXTENSION] = watcher
+    for blueprint in create_async_blueprints(async_mongo, mock_mongo):
+        app.register_blueprint(blueprint)
+    return app
+
+
+class Clients:
+    """Envia a mesma requisição às aplicações Flask e Quart"""
+
+    def __init__(self, flask_app, quart_app):
+        self.flask = flask_app.test_client()
+        self.quart = quart_app.test_client()
+
+    def each(self, method, path, json=None, headers=None):
+        """Respostas (status, corpo, ETag) do Flask e do Quart"""
+        kwargs = {"headers": headers or {}}
+        if json is not None:
+            kwargs["json"] = json
+        flask_response = self.flask.open(path, method=method, **kwargs)
+
+        async def quart_request():
+            response = await self.quart.open(path, method=method, **kwargs)
+            return response, await response.get_data()
+
+        quart_response, quart_body = asyncio.run(quart_request())
+        return (
+            (flask_response.status_code, flask_response.get_data(), flask_response.headers.get("ETag")),
+            (quart_response.status_code, quart_body, quart_response.headers.get("ETag")),
+        )
+
+    def request(self, method, path, json=None):
+        flask_result, quart_result = self.each(method, path, json)
+        assert quart_result[:2] == flask_result[:2]
+        return flask_result
+
+
+@pytest.fixture
+def clients(mock_mongo, async_mongo, monkeypatch):
+    monkeypatch.setenv("API_BYPASS_AUTH", "true")
+    monkeypatch.setenv("DASHBOARD_CACHE_BACKEND", "none")
+    Pagination.invalidate_counts()
+    quart_app = create_quart_app(mock_mongo, async_mongo)
+    return Clients(create_flask_app(mock_mongo), quart_app)
+
+
+@pytest.mark.parametrize("method, path, body", [
+    ("POST", "/dashboard/", {"crop_year": [2001, 2002], "state": "Acre"}),
+    ("POST", "/dashboard/", {"crop_year": "2001"}),
+    ("GET", "/dashboard/?crop_year=2001&crop_year=2002&state=Acre", None),
+    ("GET", "/dashboard/?crop_year=abc", None),
+    ("GET", "/dashboard/filters", None),
+    ("POST", "/projection/", {"crop_year": 2021}),
+    ("POST", "/yield/", {"page": 2, "size": 25}),
+    ("POST", "/yield/", {"size": 25, "cursor": None, "withTotal": True}),
+    ("POST", "/yield/filter", {"page": 1, "size": 10, "crop": "Rice"}),
+    ("POST", "/yield/filter", {"page": 0}),
+    ("GET", "/yield/all?crop=Wheat", None),
+])
+def test_asgi_routes_match_flask_routes(clients, method, path, body):
+    clients.request(method, path, body)
+
+
+@pytest.mark.parametrize("path", ["/yield/all?crop=Wheat", "/dashboard/?crop_year=2001"])
+def test_asgi_revalidation_and_compliance(clients, mock_mongo, path):
+    flask_result, quart_result = clients.each("GET", path)
+    assert flask_result[2] and quart_result[2] == flask_result[2]
+    etag = flask_result[2].strip('"')
+
+    for method in ("GET", "HEAD"):
+        flask_result, quart_result = clients.each(method, path, headers={"If-None-Match": etag})
+        assert flask_result[0] == quart_result[0] == 304
+
+    mock_mongo['terms_of_use_collection'].insert_one({
+        "text": "Termo", "status": "ativo",
+        "topics": [{"description": "Uso", "status": "ativo", "required": True}],
+    })
+    mock_mongo['user_acceptance_collection'].insert_one({
+        "user_id": "7", "topics": [{"description": "Uso", "status": "ativo", "accepted": False}],
+    })
+    _, compliance, _ = clients.request("GET", "/terms/user/compliance/7")
+    assert json.loads(compliance) == {"compliant": False, "non_compliant_topics": ["Uso"]}
+
+
+@pytest.mark.parametrize("path, body", [
+    ("/dashboard/", {"crop_year": 2001}),
+    ("/yield/", {"page": 1, "size": 10}),
+])
+def test_asgi_post_never_gets_304(clients, path, body):
+    flask_result, quart_result = clients.each("POST", path, body)
+    assert flask_result[0] == quart_result[0] == 200
+    assert flask_result[2] is None and quart_result[2] is None
+
+    # Um If-None-Match que corresponde à requisição: com POST, a pré-condição falha
+    data = json.dumps(body).encode()
+    version = clients.flask.application.extensions[DATA_VERSION_EXTENSION].version
+    headers = {
+        "Content-Type": "application/json",
+        "If-None-Match": f'"{compute_etag(version, "POST", path, b"", data)}"',
+    }
+    assert clients.flask.post(path, data=data, headers=headers).status_code == 412
+
+    async def quart_request():
+        return (await clients.quart.post(path, data=data, headers=headers)).status_code
+    assert asyncio.run(quart_request()) == 412
+
+
+def test_asgi_dashboard_warmup_runs_in_app_context(mock_mongo, async_mongo, monkeypatch, capsys):
+    from api.asgi.routes import dashboard_routes
+    from api.warmup import warm_up_async
+
+    monkeypatch.setenv("API_BYPASS_AUTH", "true")
+    monkeypatch.setenv("DASHBOARD_CACHE_BACKEND", "memory")
+    app = create_quart_app(mock_mongo, async_mongo)
+
+    asyncio.run(warm_up_async(app))
+    output = capsys.readouterr().out
+    assert "Aquecimento de dashboard:" in output and "falhou" not in output
+
+    async def unavailable(**filters):
+        raise AssertionError("o dashboard aquecido deveria vir do cache")
+    monkeypatch.setattr(dashboard_routes, "get_filtered_yield_data_async", unavailable)
+
+    async def first_request():
+        return (await app.test_client().get("/dashboard/")).status_code
+    assert asyncio.run(first_request()) == 200
@@ -0,0 +1,238 @@
+import base64
+import datetime
+import hashlib
+import hmac
+import json
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, HTTPServer
+import pytest
+from flask import Flask, jsonify
+from mongomock import MongoClient
+from api import server
+from api.middleware import auth
+from api.middleware.local_auth import InvalidToken, LocalVerifier, RevocationSet, decode_jwt
+
+
+class IntrospectionStub(BaseHTTPRequestHandler):
+    calls = []
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        IntrospectionStub.calls.append(body["token"])
+
+        if body["token"].startswith("valid"):
+            status = 200
+            payload = {"sub": "dXNlcjox", "exp": int(time.time()) + 3600}
+        elif body["token"].startswith("expiring"):
+            status = 200
+            payload = {"sub": "dXNlcjox", "exp": int(time.time()) - 1}
+        elif body["token"].startswith("status-"):
+            # status-503-... answers with that status
+            status = int(body["token"].split("-")[1])
+            payload = {"error": "Auth app error"}
+        else:
+            status = 401
+            payload = {"error": "Invalid token"}
+
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def introspection_server(monkeypatch):
+    server = HTTPServer(("127.0.0.1", 0), IntrospectionStub)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    IntrospectionStub.calls = []
+    monkeypatch.setattr(
+        auth, "AUTH_INTROSPECT_URL", f"http://127.0.0.1:{server.server_port}/validate")
+    auth.clear_auth_cache()
+    yield IntrospectionStub
+    auth.clear_auth_cache()
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.delenv("API_BYPASS_AUTH", raising=False)
+    app = Flask(__name__)
+
+    @app.route("/protected")
+    @auth.require_auth
+    def protected():
+        return jsonify({"ok": True})
+
+    return app.test_client()
+
+
+def get(client, token):
+    return client.get("/protected", headers={"Authorization": f"Bearer {token}"})
+
+
+def test_valid_token_is_introspected_once(client, introspection_server):
+    assert get(client, "valid-token").status_code == 200
+    assert get(client, "valid-token").status_code == 200
+    assert get(client, "valid-other").status_code == 200
+
+    assert introspection_server.calls == ["valid-token", "valid-other"]
+    stats = auth.auth_cache_stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 2
+
+
+def test_rejected_token_is_negatively_cached(client, introspection_server):
+    assert get(client, "bad-token").status_code == 403
+    assert get(client, "bad-token").status_code == 403
+
+    assert introspection_server.calls == ["bad-token"]
+    assert auth.auth_cache_stats()["rejected_hits"] == 1
+
+
+@pytest.mark.parametrize("status", [400, 403])
+def test_client_error_statuses_are_negatively_cached(client, introspection_server, status):
+    token = f"status-{status}-token"
+    assert get(client, token).status_code == 403
+    assert get(client, token).status_code == 403
+
+    assert introspection_server.calls == [token]
+    assert auth.auth_cache_stats()["errors"] == 0
+
+
+@pytest.mark.parametrize("status", [429, 500, 503])
+def test_auth_app_errors_are_not_cached(client, introspection_server, status):
+    token = f"status-{status}-token"
+    assert get(client, token).status_code == 403
+    assert get(client, token).status_code == 403
+
+    assert introspection_server.calls == [token, token]
+    stats = auth.auth_cache_stats()
+    assert stats["errors"] == 2
+    assert stats["rejected_hits"] == 0
+    assert stats["size"] == 0
+
+
+def test_expired_token_is_not_cached(client, introspection_server):
+    assert get(client, "expiring-token").status_code == 200
+    assert get(client, "expiring-token").status_code == 200
+
+    assert introspection_server.calls == ["expiring-token", "expiring-token"]
+
+
+def test_missing_token_and_unreachable_server(client, monkeypatch):
+    auth.clear_auth_cache()
+    assert client.get("/protected").status_code == 403
+
+    monkeypatch.setattr(auth, "AUTH_INTROSPECT_URL", "http://127.0.0.1:1/validate")
+    assert get(client, "valid-token").status_code == 403
+    assert auth.auth_cache_stats()["errors"] == 1
+    assert auth.auth_cache_stats()["size"] == 0
+
+
+def b64url(data):
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+
+def make_token(secret="secret", exp_in=3600, jti=None, alg="HS256", subject=b"user:1"):
+    header = b64url(json.dumps({"typ": "JWT", "alg": alg}).encode())
+    payload = b64url(json.dumps({
+        "sub": base64.b64encode(subject).decode(),
+        "exp": int(time.time()) + exp_in,
+        "iat": int(time.time()),
+        "jti": jti or str(uuid.uuid4()),
+    }).encode())
+    signature = hmac.new(secret.encode(), f"{header}.{payload}".encode(), hashlib.sha256).digest()
+    return f"{header}.{payload}.{b64url(signature)}"
+
+
+def test_decode_jwt_checks_signature_expiry_and_algorithm():
+    assert decode_jwt(make_token(), "secret")["sub"] == base64.b64encode(b"user:1").decode()
+
+    for token in (
+        make_token(secret="other"),
+        make_token(exp_in=-120),
+        make_token(alg="none"),
+        make_token(subject=b"admin:1"),
+        make_token(subject=b"user1"),
+        make_token(subject=b"user:"),
+        "not.a.token",
+    ):
+        with pytest.raises(InvalidToken):
+            decode_jwt(token, "secret")
+
+
+def test_decode_jwt_restricts_entity_types():
+    token = make_token(subject=b"external_client:9")
+    assert decode_jwt(token, "secret")["sub"]
+    with pytest.raises(InvalidToken):
+        decode_jwt(token, "secret", entity_types=("user",))
+
+
+@pytest.mark.parametrize("secret", [None, ""])
+def test_local_mode_requires_jwt_secret(monkeypatch, secret):
+    if secret is None:
+        monkeypatch.delenv("AUTH_JWT_SECRET", raising=False)
+    else:
+        monkeypatch.setenv("AUTH_JWT_SECRET", secret)
+    monkeypatch.setattr(auth, "AUTH_MODE", "local")
+    monkeypatch.setattr(auth, "_local_verifier", None)
+
+    with pytest.raises(RuntimeError, match="AUTH_JWT_SECRET"):
+        auth.check_auth_config()
+
+
+def test_revocation_set_refreshes_incrementally():
+    first, second = str(uuid.uuid4()), str(uuid.uuid4())
+    start = datetime.datetime(2025, 1, 1)
+    rows = [(first, start)]
+    calls = []
+
+    def loader(since):
+        calls.append(since)
+        return [row for row in rows if since is None or row[1] >= since]
+
+    revoked = RevocationSet(loader, interval=3600)
+    assert first in revoked
+    assert second not in revoked
+
+    rows.append((second, start + datetime.timedelta(seconds=5)))
+    revoked.refresh()
+
+    assert second in revoked
+    assert calls == [None, start]
+    assert revoked.last_revoked_at == start + datetime.timedelta(seconds=5)
+
+
+def test_local_mode_skips_introspection(client, monkeypatch):
+    revoked_jti = str(uuid.uuid4())
+    verifier = LocalVerifier(
+        "secret", RevocationSet(lambda since: [(revoked_jti, datetime.datetime(2025, 1, 1))], 3600))
+    monkeypatch.setattr(auth, "AUTH_MODE", "local")
+    monkeypatch.setattr(auth, "_local_verifier", verifier)
+    monkeypatch.setattr(auth, "AUTH_INTROSPECT_URL", "http://127.0.0.1:1/validate")
+
+    assert get(client, make_token()).status_code == 200
+    assert get(client, make_token(jti=revoked_jti)).status_code == 403
+    assert get(client, make_token(secret="other")).status_code == 403
+
+
+def test_mongo_metrics_require_a_token(monkeypatch, introspection_server):
+    monkeypatch.delenv("API_BYPASS_AUTH", raising=False)
+    monkeypatch.setattr(server, "startup_database", lambda: MongoClient()["test_db"])
+    app = server.create_app()
+    test_client = app.test_client()
+
+    assert test_client.get("/metrics/mongo").status_code == 403
+    response = test_client.get("/metrics/mongo", headers={"Authorization": "Bearer valid-token"})
+    assert response.status_code == 200
+    assert "checkouts" in response.get_json()
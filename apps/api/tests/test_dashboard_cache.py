@@ -0,0 +1,146 @@
+from unittest.mock import patch
+import pytest
+from flask import Flask
+from mongomock import MongoClient
+from api.json_provider import ORJSONProvider
+from api.cache import MemoryCache, MongoCache
+from api.models import yield_model
+from api.models.yield_model import create_yield_event
+from api.routes import dashboard_routes
+from api.service import dashboard_cache
+from api.service.dashboard_cache import create_dashboard_cache, make_cache_key, normalize_filters
+
+
+@pytest.fixture
+def mock_mongo():
+    client = MongoClient()
+    return client['test_db']
+
+
+@pytest.fixture
+def sample_event():
+    return {
+        "crop": "Wheat",
+        "crop_year": "2024",
+        "season": "Winter",
+        "state": "California",
+        "area": 100.5,
+        "production": 5000,
+        "annual_rainfall": 800.2,
+        "fertilizer": 50.5,
+        "pesticide": 10.3,
+        "yield": 49.75,
+    }
+
+
+def test_memory_cache_evicts_least_recently_used():
+    cache = MemoryCache(ttl=60, max_entries=2)
+    cache.set("a", b"1")
+    cache.set("b", b"2")
+    cache.get("a")
+    cache.set("c", b"3")
+
+    assert cache.get("a") == b"1"
+    assert cache.get("b") is None
+    assert cache.get("c") == b"3"
+
+
+def test_memory_cache_respects_byte_limit():
+    cache = MemoryCache(ttl=60, max_entries=10, max_bytes=5)
+    cache.set("a", b"123")
+    cache.set("b", b"45")
+    cache.set("c", b"6")
+    cache.set("too-big", b"123456")
+
+    assert cache.get("a") is None
+    assert cache.get("b") == b"45"
+    assert cache.get("too-big") is None
+
+
+def test_memory_cache_expires_entries():
+    cache = MemoryCache(ttl=60)
+    with patch("api.cache.time.monotonic", return_value=0):
+        cache.set("a", b"1")
+    with patch("api.cache.time.monotonic", return_value=61):
+        assert cache.get("a") is None
+    assert len(cache) == 0
+
+
+def test_mongo_cache_shares_entries_between_instances(mock_mongo):
+    first = MongoCache(mock_mongo["api_cache"], "dashboard", ttl=60)
+    second = MongoCache(mock_mongo["api_cache"], "dashboard", ttl=60)
+    other = MongoCache(mock_mongo["api_cache"], "other", ttl=60)
+
+    first.set("key", b"value")
+    other.set("key", b"other")
+    assert second.get("key") == b"value"
+
+    second.clear()
+    assert first.get("key") is None
+    assert other.get("key") == b"other"
+
+
+def test_mongo_cache_ignores_expired_entries(mock_mongo):
+    cache = MongoCache(mock_mongo["api_cache"], "dashboard", ttl=60)
+    cache.set("key", b"value", ttl=-1)
+
+    assert cache.get("key") is None
+
+
+def test_normalize_filters_is_order_and_shape_independent():
+    assert normalize_filters(crop_year=["2001", 2000, 2001], season="Spring") == \
+        normalize_filters(crop_year=[2000, 2001], season=["Spring"])
+    assert make_cache_key(crop=["Rice", "Wheat"], state=[None]) == \
+        make_cache_key(crop=["Wheat", "Rice"])
+    assert make_cache_key(crop_year="invalid") == make_cache_key()
+    assert make_cache_key(crop="Rice") != make_cache_key(crop="Wheat")
+
+
+@pytest.fixture
+def client(mock_mongo, monkeypatch):
+    monkeypatch.setenv("API_BYPASS_AUTH", "true")
+    monkeypatch.setenv("DASHBOARD_CACHE_BACKEND", "memory")
+    app = Flask(__name__)
+    app.json = ORJSONProvider(app)
+    app.register_blueprint(dashboard_routes.create_blueprint(mock_mongo))
+    return app.test_client()
+
+
+def test_dashboard_response_is_cached_until_yield_write(client, mock_mongo, sample_event):
+    results = ([], 0.0, {}, [], {}, {}, [])
+    with patch.object(dashboard_routes, "get_filtered_yield_data", return_value=results) as service:
+        first = client.post("/dashboard/", json={"crop": ["Rice", "Wheat"]})
+        second = client.post("/dashboard/", json={"crop": ["Wheat", "Rice"]})
+
+        assert service.call_count == 1
+        assert second.get_data() == first.get_data()
+
+        create_yield_event(mock_mongo["yield_collection"], sample_event)
+        client.post("/dashboard/", json={"crop": ["Rice", "Wheat"]})
+
+        assert service.call_count == 2
+
+
+@pytest.mark.parametrize("body", [
+    {"crop": [["Rice"], "Wheat"]},
+    {"state": [{"name": "Acre"}]},
+    {"crop_year": [[2001]]},
+])
+def test_dashboard_rejects_nested_filter_values(client, body):
+    response = client.post("/dashboard/", json=body)
+
+    assert response.status_code == 400
+    assert "deve conter apenas" in response.get_json()["error"]
+
+
+def test_cache_listener_is_registered_once(mock_mongo, sample_event, monkeypatch):
+    monkeypatch.setattr(yield_model, "_change_listeners", [])
+    monkeypatch.setenv("DASHBOARD_CACHE_BACKEND", "memory")
+    caches = [create_dashboard_cache(mock_mongo) for _ in range(3)]
+    for cache in caches:
+        cache.set("key", b"{}")
+
+    create_yield_event(mock_mongo["yield_collection"], sample_event)
+
+    assert yield_model._change_listeners.count(dashboard_cache._clear_caches) == 1
+    assert all(cache.get("key") is None for cache in caches)
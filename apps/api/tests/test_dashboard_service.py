@@ -0,0 +1,301 @@
+import json
+import random
+from unittest.mock import patch
+import pytest
+from flask import Flask
+from mongomock import MongoClient
+from api.json_provider import ORJSONProvider
+from api.models.dashboard_model import DashboardModel
+from api.models.yield_model import create_yield_event, update_yield_event
+from api.models.yield_predict_model import YieldPredictModel
+from api.routes import create_blueprints
+from api.service.dashboard_service import (
+    PREVIEW_LIMIT,
+    build_dashboard_payload,
+    calculate_total_production,
+    get_filtered_yield_data,
+    get_general_metrics,
+    get_production_by_crop,
+    get_production_by_state,
+    get_yearly_crop_statistics,
+    get_yearly_season_totals,
+)
+from db.mongo import MongoDB
+from db.yield_rollup import build_rollup
+
+
+@pytest.fixture
+def mock_mongo():
+    client = MongoClient()
+    db = client['test_db']
+    yield db
+
+
+@pytest.fixture(autouse=True)
+def patch_connect(mock_mongo):
+    with patch.object(MongoDB, "connect", return_value=mock_mongo):
+        yield
+
+
+@pytest.fixture
+def yield_collection(mock_mongo):
+    rng = random.Random(7)
+    collection = mock_mongo['yield_collection']
+    collection.insert_many([
+        {
+            "crop": rng.choice(["Wheat", "Rice", "Maize"]),
+            "crop_year": rng.randint(2000, 2004),
+            "season": rng.choice(["Whole Year", "Spring", "Autumn", "Summer", "Winter"]),
+            "state": rng.choice(["Acre", "Bahia", "Pará"]),
+            # múltiplos de 0.5 somam de forma exata em qualquer ordem
+            "area": rng.randint(1, 2000) / 2,
+            "production": rng.randint(0, 50000),
+            "annual_rainfall": rng.randint(600, 6000) / 2,
+            "fertilizer": rng.randint(0, 90000) / 4,
+            "pesticide": rng.randint(0, 4000) / 4,
+            "yield": 1.0,
+        }
+        for _ in range(800)
+    ])
+    return collection
+
+
+def as_json(results):
+    return json.dumps(results, sort_keys=True, default=str)
+
+
+@pytest.mark.parametrize("filters", [
+    {},
+    {"crop_year": [2001, 2003]},
+    {"season": "Spring", "state": ["Acre", "Pará"]},
+    {"crop": "Nonexistent"},
+])
+def test_mongo_mode_matches_python_mode(yield_collection, monkeypatch, filters):
+    monkeypatch.setenv("DASHBOARD_AGGREGATION_MODE", "python")
+    python_results = get_filtered_yield_data(**filters)
+
+    monkeypatch.setenv("DASHBOARD_AGGREGATION_MODE", "mongo")
+    mongo_results = get_filtered_yield_data(**filters)
+
+    assert as_json(mongo_results) == as_json(python_results)
+
+
+def baseline_payload(rows):
+    """Payload montado pelas funções individuais, a referência original"""
+    return build_dashboard_payload((
+        rows[:PREVIEW_LIMIT],
+        calculate_total_production(rows),
+        get_yearly_season_totals(rows),
+        get_production_by_state(rows),
+        get_yearly_crop_statistics(rows),
+        get_general_metrics(rows),
+        get_production_by_crop(rows),
+    ))
+
+
+@pytest.mark.parametrize("mode", ["python", "mongo", "rollup"])
+@pytest.mark.parametrize("filters", [
+    {},
+    {"crop_year": [2001, 2003]},
+    {"season": "Spring", "crop": ["Rice", "Maize"]},
+    {"crop": "Nonexistent"},
+])
+def test_aggregation_modes_match_baseline_payload(yield_collection, mock_mongo, monkeypatch, mode, filters):
+    # Linhas sem estado ficam fora do ranking por estado, mas entram nos totais
+    yield_collection.insert_many([
+        {"crop": "Rice", "crop_year": 2001, "season": "Spring", "state": None,
+         "area": 10.5, "production": 300, "annual_rainfall": 1000.0,
+         "fertilizer": 12.25, "pesticide": 1.5, "yield": 1.0},
+        {"crop": "Maize", "crop_year": 2003, "season": "Whole Year", "state": None,
+         "area": 4.0, "production": 90, "annual_rainfall": 800.5,
+         "fertilizer": 3.0, "pesticide": 0.25, "yield": 1.0},
+    ])
+    build_rollup(mock_mongo)
+    rows = DashboardModel(mock_mongo).get_filtered_data(**filters)
+
+    monkeypatch.setenv("DASHBOARD_AGGREGATION_MODE", mode)
+    payload = build_dashboard_payload(get_filtered_yield_data(**filters))
+
+    assert as_json(payload) == as_json(baseline_payload(rows))
+
+
+def served_dashboard(mock_mongo, monkeypatch, mode):
+    """Corpo de /dashboard como enviado ao cliente, pelo provider de JSON da API"""
+    monkeypatch.setenv("API_BYPASS_AUTH", "true")
+    monkeypatch.setenv("DASHBOARD_CACHE_BACKEND", "none")
+    monkeypatch.setenv("DASHBOARD_AGGREGATION_MODE", mode)
+    app = Flask(__name__)
+    app.json = ORJSONProvider(app)
+    for blueprint in create_blueprints(mock_mongo):
+        app.register_blueprint(blueprint)
+    response = app.test_client().post("/dashboard/", json={})
+    assert response.status_code == 200
+    return response.get_data()
+
+
+def assert_close(actual, expected):
+    if isinstance(expected, dict):
+        assert list(actual) == list(expected)
+        for key in expected:
+            assert_close(actual[key], expected[key])
+    elif isinstance(expected, list):
+        assert len(actual) == len(expected)
+        for item, expected_item in zip(actual, expected):
+            assert_close(item, expected_item)
+    elif isinstance(expected, float):
+        assert actual == pytest.approx(expected, rel=1e-12, abs=0.01)
+    else:
+        assert actual == expected
+
+
+def test_served_body_with_fractional_values(mock_mongo, monkeypatch):
+    rng = random.Random(11)
+    mock_mongo["yield_collection"].insert_many([
+        {
+            "crop": rng.choice(["Wheat", "Rice", "Maize"]),
+            # Anos fora de ordem: a ordem de aparição não muda a resposta
+            "crop_year": rng.choice([2003, 2001, 2004, 2000]),
+            "season": rng.choice(["Whole Year", "Spring", "Autumn", "Summer", "Winter"]),
+            "state": rng.choice(["Acre", "Bahia", "Pará"]),
+            "area": rng.uniform(0.1, 999.9),
+            "production": rng.uniform(0, 50000),
+            "annual_rainfall": rng.uniform(600, 3000),
+            "fertilizer": rng.uniform(0, 20000),
+            "pesticide": rng.uniform(0, 1000),
+            "yield": rng.uniform(0, 10),
+        }
+        for _ in range(600)
+    ])
+    build_rollup(mock_mongo)
+    python_body = served_dashboard(mock_mongo, monkeypatch, "python")
+
+    # O mongomock soma na ordem das linhas, como o caminho em Python; o
+    # MongoDB compensa o erro e pode diferir nos últimos bits (ver
+    # aggregate_facets), assim como o cubo, que soma por célula
+    assert served_dashboard(mock_mongo, monkeypatch, "mongo") == python_body
+
+    rollup_body = served_dashboard(mock_mongo, monkeypatch, "rollup")
+    assert_close(json.loads(rollup_body), json.loads(python_body))
+
+
+def test_mongo_mode_returns_aggregates_not_cells(yield_collection, mock_mongo):
+    _, facets = DashboardModel(mock_mongo).get_aggregated_data()
+
+    # Um grupo por estado, cultura, ano x estação e ano x cultura, não uma
+    # célula por combinação dos quatro campos
+    assert len(facets["totals"]) == 1
+    assert len(facets["by_state"]) == 3
+    assert len(facets["by_crop"]) == 3
+    assert len(facets["year_season"]) <= 5 * 5
+    assert len(facets["year_crop"]) <= 5 * 3
+
+
+@pytest.mark.parametrize("filters", [
+    {},
+    {"crop_year": [2001, 2003]},
+    {"season": "Spring", "state": ["Acre", "Pará"]},
+    {"crop": "Nonexistent"},
+])
+def test_rollup_mode_matches_mongo_mode(yield_collection, mock_mongo, monkeypatch, filters):
+    build_rollup(mock_mongo)
+
+    monkeypatch.setenv("DASHBOARD_AGGREGATION_MODE", "mongo")
+    mongo_results = get_filtered_yield_data(**filters)
+
+    monkeypatch.setenv("DASHBOARD_AGGREGATION_MODE", "rollup")
+    rollup_results = get_filtered_yield_data(**filters)
+
+    assert as_json(rollup_results) == as_json(mongo_results)
+
+
+def test_rollup_follows_yield_writes(yield_collection, mock_mongo):
+    build_rollup(mock_mongo)
+    event = {
+        "crop": "Rice", "crop_year": "2030", "season": "Spring", "state": "Acre",
+        "area": 10.0, "production": 40, "annual_rainfall": 900.0,
+        "fertilizer": 2.5, "pesticide": 0.5, "yield": 4.0,
+    }
+    create_yield_event(yield_collection, event)
+    create_yield_event(yield_collection, {**event, "production": 60})
+    update_yield_event(yield_collection, "Rice", "2030", {**event, "state": "Bahia"})
+
+    model = DashboardModel(mock_mongo)
+    incremental = model.get_rollup_cells()
+    build_rollup(mock_mongo)
+
+    assert model.get_rollup_cells() == incremental
+    # YieldEvent grava crop_year como texto, que _build_query não filtra
+    assert [
+        (cell["state"], cell["count"], cell["production"])
+        for cell in incremental if cell["crop_year"] == "2030"
+    ] == [("Acre", 1, 60), ("Bahia", 1, 40)]
+
+
+
+def test_queries_fetch_only_needed_fields(yield_collection, mock_mongo):
+    yield_collection.update_many({}, {"$set": {"notes": "não exibido"}})
+    model = DashboardModel(mock_mongo)
+
+    preview = model.get_filtered_data(crop_year=2001, limit=5)
+
+    assert len(preview) == 5
+    assert all(set(row) == {
+        "_id", "crop_year", "season", "crop", "state", "yield",
+        "production", "area", "fertilizer", "pesticide", "annual_rainfall",
+    } for row in preview)
+
+
+def test_filter_possible_values(yield_collection, mock_mongo):
+    yield_collection.insert_one({"crop": "Rice", "crop_year": 2005, "season": None})
+    model = DashboardModel(mock_mongo)
+
+    assert sorted(model.get_filter_possible_values("season")) == [
+        "Autumn", "Spring", "Summer", "Whole Year", "Winter"]
+    assert "2005" in model.get_filter_possible_values("crop_year")
+
+
+def test_python_mode_reads_the_rows_once(yield_collection, mock_mongo, monkeypatch):
+    monkeypatch.setenv("DASHBOARD_AGGREGATION_MODE", "python")
+    model = DashboardModel(mock_mongo)
+
+    with patch.object(model.collection, "find", wraps=model.collection.find) as find:
+        data, total_production, *_ = get_filtered_yield_data(model=model)
+
+    assert find.call_count == 1
+    assert len(data) == PREVIEW_LIMIT
+    assert total_production == sum(row["production"] for row in yield_collection.find())
+
+
+def test_projection_rows_fetch_displayed_columns(mock_mongo):
+    mock_mongo["yield_predict_collection"].insert_many([
+        {"Crop": "Rice", "Crop_year": 2030, "Season": "Spring", "State": "Acre",
+         "Area": 10.0, "Predicted_Production": 5.0, "Model_version": "v1"}
+        for _ in range(400)
+    ])
+
+    rows = YieldPredictModel(mock_mongo).get_filtered_data(crop="Rice", limit=300)
+
+    assert len(rows) == 300
+    assert rows[0] == {
+        "Crop": "Rice", "Crop_year": 2030, "Season": "Spring", "State": "Acre",
+        "Area": 10.0, "Predicted_Production": 5.0,
+    }
+
+
+def test_app_models_are_reused_between_requests(yield_collection, mock_mongo, monkeypatch):
+    monkeypatch.setenv("API_BYPASS_AUTH", "true")
+    app = Flask(__name__)
+    app.json = ORJSONProvider(app)
+    for blueprint in create_blueprints(mock_mongo):
+        app.register_blueprint(blueprint)
+    client = app.test_client()
+
+    # Depois de create_blueprints nenhuma requisição deve criar modelos
+    with patch("api.models.dashboard_model.DashboardModel.__init__",
+               side_effect=AssertionError("DashboardModel recriado")), \
+            patch("api.models.yield_predict_model.YieldPredictModel.__init__",
+                  side_effect=AssertionError("YieldPredictModel recriado")):
+        for _ in range(2):
+            assert client.post("/dashboard/", json={"crop_year": 2001}).status_code == 200
+            assert client.post("/projection/", json={}).status_code == 200
+        assert client.get("/dashboard/filters").status_code == 200
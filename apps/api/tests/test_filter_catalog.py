@@ -0,0 +1,137 @@
+import json
+from unittest.mock import MagicMock, patch
+import pytest
+from flask import Flask
+from mongomock import MongoClient
+from pymongo.errors import AutoReconnect
+from api.json_provider import ORJSONProvider
+from api.models.yield_model import create_yield_event
+from api.routes import dashboard_routes
+from api.service.data_version import DataVersionWatcher
+from api.service.filter_catalog import FilterCatalog
+from db.data_version import bump_data_version
+from db.mongo import MongoDB
+
+
+@pytest.fixture
+def mock_mongo():
+    client = MongoClient()
+    db = client['test_db']
+    db['yield_collection'].insert_many([
+        {"crop": "Rice", "crop_year": 2001, "season": "Spring", "state": "Acre"},
+        {"crop": "Wheat", "crop_year": 2000, "season": "Winter", "state": "Acre"},
+    ])
+    return db
+
+
+@pytest.fixture(autouse=True)
+def patch_connect(mock_mongo):
+    with patch.object(MongoDB, "connect", return_value=mock_mongo):
+        yield
+
+
+@pytest.fixture
+def sample_event():
+    return {
+        "crop": "Maize",
+        "crop_year": "2024",
+        "season": "Winter",
+        "state": "Bahia",
+        "area": 100.5,
+        "production": 5000,
+        "annual_rainfall": 800.2,
+        "fertilizer": 50.5,
+        "pesticide": 10.3,
+        "yield": 49.75,
+    }
+
+
+def test_catalog_loads_once_and_adds_new_values():
+    loader = MagicMock(return_value={"crops": ["Rice"], "states": ["Acre"]})
+    catalog = FilterCatalog(loader)
+
+    catalog.get()
+    catalog.get()
+    catalog.add_document({"crop": "Wheat", "state": "Acre", "crop_year": 2000})
+
+    assert loader.call_count == 1
+    assert catalog.values() == {
+        "crop_years": ["2000"],
+        "seasons": [],
+        "crops": ["Rice", "Wheat"],
+        "states": ["Acre"],
+    }
+
+
+def test_catalog_uses_persisted_values(mock_mongo):
+    metadata = mock_mongo["metadata_collection"]
+    first = FilterCatalog(lambda: {"crops": ["Rice"]}, metadata)
+    first.get()
+    first.add_document({"crop": "Wheat"})
+
+    loader = MagicMock()
+    second = FilterCatalog(loader, metadata)
+
+    assert second.values()["crops"] == ["Rice", "Wheat"]
+    loader.assert_not_called()
+
+
+def test_failed_load_is_not_cached_or_persisted(mock_mongo):
+    metadata = mock_mongo["metadata_collection"]
+    loader = MagicMock(side_effect=[AutoReconnect("timeout"), {"crops": ["Rice"]}])
+    catalog = FilterCatalog(loader, metadata)
+
+    with pytest.raises(AutoReconnect):
+        catalog.get()
+    assert metadata.find_one({}) is None
+
+    assert catalog.values()["crops"] == ["Rice"]
+    assert metadata.find_one({})["crops"] == ["Rice"]
+
+
+@pytest.fixture
+def client(mock_mongo, monkeypatch):
+    monkeypatch.setenv("API_BYPASS_AUTH", "true")
+    app = Flask(__name__)
+    app.json = ORJSONProvider(app)
+    app.register_blueprint(dashboard_routes.create_blueprint(mock_mongo))
+    return app.test_client()
+
+
+def test_filters_route_supports_conditional_get(client, mock_mongo, sample_event):
+    response = client.get("/dashboard/filters")
+    assert response.status_code == 200
+    assert json.loads(response.get_data()) == {
+        "crop_years": ["2000", "2001"],
+        "seasons": ["Spring", "Winter"],
+        "crops": ["Rice", "Wheat"],
+        "states": ["Acre"],
+    }
+
+    etag = response.headers["ETag"]
+    cached = client.get("/dashboard/filters", headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+
+    create_yield_event(mock_mongo["yield_collection"], sample_event)
+    changed = client.get("/dashboard/filters", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert "Maize" in json.loads(changed.get_data())["crops"]
+
+
+def test_external_import_invalidates_catalog(client, mock_mongo):
+    watcher = DataVersionWatcher(mock_mongo, interval=0)
+    watcher.check()
+    assert "Maize" not in json.loads(client.get("/dashboard/filters").get_data())["crops"]
+
+    mock_mongo["yield_collection"].insert_one(
+        {"crop": "Maize", "crop_year": 2002, "season": "Spring", "state": "Bahia"})
+    bump_data_version(mock_mongo)
+    watcher.check()
+
+    assert "Maize" in json.loads(client.get("/dashboard/filters").get_data())["crops"]
+
+
+def test_filters_route_reports_unavailable_catalog(client):
+    with patch("mongomock.collection.Collection.aggregate", side_effect=AutoReconnect("timeout")):
+        assert client.get("/dashboard/filters").status_code == 503
+    assert client.get("/dashboard/filters").status_code == 200
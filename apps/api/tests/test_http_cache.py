@@ -0,0 +1,220 @@
+import gzip
+import json
+from unittest.mock import patch
+from pymongo.errors import PyMongoError
+import pytest
+from flask import Flask, jsonify, request
+from mongomock import MongoClient
+from api.json_provider import ORJSONProvider
+from api.middleware.compression import Compressor, choose_encoding, init_compression
+from api.middleware.conditional import DATA_VERSION_EXTENSION, current_data_version, request_etag
+from api.models import yield_model
+from api.models.yield_model import create_yield_event
+from api.routes import dashboard_routes, yield_routes
+from api.routes.pagination import Pagination
+from api.service.data_version import DataVersionWatcher
+from db.data_version import bump_data_version, get_data_version
+
+
+YIELD_DOCUMENT = {
+    "crop": "Maize", "crop_year": "2024", "season": "Winter", "state": "Bahia",
+    "area": 1.0, "production": 1, "annual_rainfall": 1.0,
+    "fertilizer": 1.0, "pesticide": 1.0, "yield": 1.0,
+}
+
+
+@pytest.fixture
+def mock_mongo():
+    db = MongoClient()['test_db']
+    db['yield_collection'].insert_many([
+        {"crop": "Rice", "crop_year": 2000 + i % 5, "season": "Spring", "state": "Acre",
+         "area": 1.0, "production": i}
+        for i in range(200)
+    ])
+    return db
+
+
+@pytest.fixture
+def app(mock_mongo, monkeypatch):
+    monkeypatch.setenv("API_BYPASS_AUTH", "true")
+    monkeypatch.setenv("COMPRESS_MIN_SIZE", "512")
+    Pagination.invalidate_counts()
+    app = Flask(__name__)
+    app.json = ORJSONProvider(app)
+    watcher = DataVersionWatcher(mock_mongo, interval=0)
+    watcher.check()
+    app.before_request(watcher.check)
+    app.extensions[DATA_VERSION_EXTENSION] = watcher
+    init_compression(app)
+    app.register_blueprint(yield_routes.create_blueprint(mock_mongo))
+    app.register_blueprint(dashboard_routes.create_blueprint(mock_mongo))
+    return app
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def test_repeat_get_gets_304_without_running_the_view(client, mock_mongo):
+    query = "/dashboard/?crop_year=2001&crop_year=2003&state=Acre"
+    first = client.get(query)
+    etag = first.headers["ETag"].strip('"')
+    assert first.status_code == 200
+    assert first.get_json()["yearly_crop_stats"].keys() == {"2001", "2003"}
+
+    with patch("api.routes.dashboard_routes.get_filtered_yield_data") as compute:
+        cached = client.get(query, headers={"If-None-Match": f'"{etag}"'})
+        head = client.head(query, headers={"If-None-Match": f'"{etag}"'})
+    assert cached.status_code == 304 and head.status_code == 304
+    compute.assert_not_called()
+
+    # Outros filtros são outra representação
+    other = client.get("/dashboard/?crop_year=2002", headers={"If-None-Match": f'"{etag}"'})
+    assert other.status_code == 200
+
+
+def test_get_and_post_forms_share_the_dashboard_cache(client):
+    posted = client.post("/dashboard/", json={"crop_year": [2003, 2001], "state": "Acre"})
+
+    with patch("api.routes.dashboard_routes.get_filtered_yield_data") as compute:
+        fetched = client.get("/dashboard/?crop_year=2001&crop_year=2003&state=Acre")
+    compute.assert_not_called()
+    assert fetched.get_data() == posted.get_data()
+
+    invalid = client.get("/dashboard/?crop_year=abc")
+    assert invalid.status_code == 400
+    assert invalid.get_json()["details"] == "crop_year deve conter apenas inteiros"
+
+
+def test_post_never_gets_304(client):
+    body = {"page": 1, "size": 50}
+    first = client.post("/yield/", json=body)
+    assert first.status_code == 200
+    assert "ETag" not in first.headers
+
+    # O ETag da forma POST não é divulgado; um If-None-Match que casa com
+    # ele falha a pré-condição em vez de virar 304 (RFC 9110)
+    with client.application.test_request_context("/yield/", method="POST", json=body):
+        etag = request_etag(current_data_version())
+    with patch.object(Pagination, "offset_page") as offset_page:
+        matched = client.post("/yield/", json=body, headers={"If-None-Match": f'"{etag}"'})
+    assert matched.status_code == 412
+    offset_page.assert_not_called()
+
+    unmatched = client.post("/yield/", json=body, headers={"If-None-Match": '"outro"'})
+    assert unmatched.status_code == 200
+
+
+def test_writes_and_imports_change_the_etag(client, mock_mongo):
+    etag = client.get("/yield/all").headers["ETag"]
+
+    create_yield_event(mock_mongo["yield_collection"], dict(YIELD_DOCUMENT))
+    after_write = client.get("/yield/all", headers={"If-None-Match": etag})
+    assert after_write.status_code == 200
+
+    bump_data_version(mock_mongo)
+    after_import = client.get("/yield/all", headers={"If-None-Match": after_write.headers["ETag"]})
+    assert after_import.status_code == 200
+
+
+def test_watchers_share_one_listener_and_bump_once_per_write(app, mock_mongo):
+    listeners = list(yield_model._change_listeners)
+    watchers = [DataVersionWatcher(mock_mongo, interval=0) for _ in range(3)]
+    assert yield_model._change_listeners == listeners
+
+    for watcher in watchers:
+        watcher.check()
+    before = get_data_version(mock_mongo)
+    imports = []
+
+    def listener(action, document):
+        imports.append(action == "import")
+    yield_model.on_yield_change(listener)
+    try:
+        create_yield_event(mock_mongo["yield_collection"], dict(YIELD_DOCUMENT))
+    finally:
+        yield_model._change_listeners.remove(listener)
+
+    assert get_data_version(mock_mongo) == before + 1
+    assert all(watcher.version == before + 1 for watcher in watchers)
+    assert not any(imports)
+
+
+def test_failed_bump_disables_304_until_the_next_check(client, app, mock_mongo):
+    etag = client.get("/yield/all").headers["ETag"]
+    watcher = app.extensions[DATA_VERSION_EXTENSION]
+
+    down = PyMongoError("fora do ar")
+    with patch("api.service.data_version.bump_data_version", side_effect=down), \
+            patch("api.service.data_version.get_data_version", side_effect=down):
+        create_yield_event(mock_mongo["yield_collection"], dict(YIELD_DOCUMENT))
+        assert watcher.version is None
+        response = client.get("/yield/all", headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert "ETag" not in response.headers
+
+    # A próxima consulta bem-sucedida volta a habilitar as revalidações
+    fresh = client.get("/yield/all")
+    assert watcher.version == get_data_version(mock_mongo)
+    cached = client.get("/yield/all", headers={"If-None-Match": fresh.headers["ETag"]})
+    assert cached.status_code == 304
+
+
+def test_large_responses_are_compressed(client):
+    response = client.get("/yield/all", headers={"Accept-Encoding": "gzip"})
+
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" in response.headers["Vary"]
+    assert response.headers["ETag"].endswith('-gzip"')
+    assert len(json.loads(gzip.decompress(response.get_data()))) == 200
+
+    # A versão comprimida guardada pelo cliente também revalida
+    cached = client.get("/yield/all", headers={
+        "Accept-Encoding": "gzip", "If-None-Match": response.headers["ETag"]})
+    assert cached.status_code == 304
+
+
+def test_small_or_unaccepted_responses_are_not_compressed(client):
+    small = client.post("/yield/", json={"page": 1, "size": 1}, headers={"Accept-Encoding": "gzip"})
+    plain = client.get("/yield/all", headers={"Accept-Encoding": "identity"})
+
+    assert "Content-Encoding" not in small.headers
+    assert "Content-Encoding" not in plain.headers
+    assert len(json.loads(plain.get_data())) == 200
+
+
+def test_compressed_variant_of_filters_revalidates(client):
+    etag = client.get("/dashboard/filters").headers["ETag"].strip('"')
+
+    response = client.get("/dashboard/filters", headers={"If-None-Match": f'"{etag}-gzip"'})
+
+    assert response.status_code == 304
+
+
+def test_compressed_bodies_are_reused_by_etag():
+    app = Flask(__name__)
+    compressor = Compressor(min_size=10, encodings=["gzip"])
+
+    @app.route("/")
+    def index():
+        response = jsonify({"values": list(range(100))})
+        response.set_etag("v1")
+        return response
+
+    app.after_request(compressor.after_request)
+    client = app.test_client()
+
+    with patch.object(compressor, "compress", wraps=compressor.compress) as compress:
+        bodies = [client.get("/", headers={"Accept-Encoding": "gzip"}).get_data() for _ in range(3)]
+
+    assert compress.call_count == 1
+    assert bodies[0] == bodies[1] == bodies[2]
+
+
+def test_accept_encoding_quality_is_respected():
+    app = Flask(__name__)
+    compressor = Compressor(min_size=0, encodings=["gzip"])
+
+    with app.test_request_context(headers={"Accept-Encoding": "gzip;q=0, identity"}):
+        assert choose_encoding(request.accept_encodings, compressor.encodings) is None
@@ -0,0 +1,99 @@
+import json
+from datetime import date, datetime
+import numpy as np
+import pytest
+from bson import ObjectId
+from bson.decimal128 import Decimal128
+from flask import Flask, jsonify
+from api.json_provider import ORJSONProvider
+
+
+def make_app(debug=False):
+    app = Flask(__name__)
+    app.json = ORJSONProvider(app)
+    app.debug = debug
+    return app
+
+
+def test_encodes_mongo_datetime_and_numpy_values():
+    app = make_app()
+    object_id = ObjectId()
+
+    with app.app_context():
+        response = jsonify({
+            "_id": object_id,
+            "created_at": datetime(2024, 5, 1, 12, 30),
+            "total": np.float64(1.5),
+            "count": np.int64(3),
+            "price": Decimal128("10.25"),
+            # Anos como chave, como em yearly_crop_stats
+            "years": {2001: [1], 2000: [2]},
+        })
+
+    assert response.mimetype == "application/json"
+    assert json.loads(response.get_data()) == {
+        "_id": str(object_id),
+        "count": 3,
+        # Mesmo formato do DefaultJSONProvider do Flask
+        "created_at": "Wed, 01 May 2024 12:30:00 GMT",
+        "price": "10.25",
+        "total": 1.5,
+        "years": {"2000": [2], "2001": [1]},
+    }
+
+
+def test_output_matches_default_provider_layout():
+    document = {"b": 1, "a": [1.5, "ç"], "c": None}
+    app = make_app()
+
+    with app.app_context():
+        body = jsonify(document).get_data()
+
+    assert body == b'{"a":[1.5,"\xc3\xa7"],"b":1,"c":null}\n'
+    assert make_app(debug=True).json.loads(body) == document
+
+
+def test_unknown_types_raise_type_error():
+    with pytest.raises(TypeError):
+        make_app().json.dumps({"value": object()})
+
+
+def test_dates_keep_the_default_provider_format():
+    document = {"at": datetime(2024, 1, 1), "day": date(2024, 1, 1)}
+    app = make_app()
+
+    with app.app_context():
+        body = jsonify(document).get_data()
+
+    assert json.loads(body) == {
+        "at": "Mon, 01 Jan 2024 00:00:00 GMT",
+        "day": "Mon, 01 Jan 2024 00:00:00 GMT",
+    }
+
+
+@pytest.mark.parametrize("debug", [False, True])
+def test_integers_beyond_64_bits_are_encoded(debug):
+    document = {"big": 2**70, "small": -(2**64), "at": datetime(2024, 1, 1),
+                "count": np.int64(3), "_id": ObjectId("65f000000000000000000000"), "name": "ç"}
+    app = make_app(debug)
+
+    with app.app_context():
+        response = jsonify(document)
+
+    assert response.status_code == 200
+    assert json.loads(response.get_data()) == {
+        "_id": "65f000000000000000000000",
+        "at": "Mon, 01 Jan 2024 00:00:00 GMT",
+        "big": 2**70,
+        "count": 3,
+        "name": "ç",
+        "small": -(2**64),
+    }
+    if not debug:
+        assert response.get_data().startswith(b'{"_id":"65f000000000000000000000","at":')
+        assert "ç".encode() in response.get_data()
+
+
+def test_unknown_types_raise_type_error_with_big_integers():
+    with pytest.raises(TypeError):
+        make_app().json.dumps({"big": 2**70, "value": object()})
@@ -0,0 +1,159 @@
+from unittest.mock import patch
+import pytest
+from flask import Flask
+from mongomock import MongoClient
+from api.json_provider import ORJSONProvider
+from api.models.yield_model import create_yield_event
+from api.routes import yield_routes
+from api.routes.pagination import Pagination
+
+
+@pytest.fixture
+def mock_mongo():
+    client = MongoClient()
+    db = client['test_db']
+    db['yield_collection'].insert_many([
+        {
+            "crop": "Rice" if i % 2 else "Wheat",
+            "crop_year": 2000 + i % 3,
+            "season": "Spring",
+            "state": "Acre",
+        }
+        for i in range(25)
+    ])
+    return db
+
+
+@pytest.fixture(autouse=True)
+def clear_counts():
+    Pagination.invalidate_counts()
+    yield
+    Pagination.invalidate_counts()
+
+
+@pytest.fixture
+def client(mock_mongo, monkeypatch):
+    monkeypatch.setenv("API_BYPASS_AUTH", "true")
+    app = Flask(__name__)
+    app.json = ORJSONProvider(app)
+    app.register_blueprint(yield_routes.create_blueprint(mock_mongo))
+    return app.test_client()
+
+
+def walk_forward(client, url, body):
+    pages = []
+    cursor = None
+    while True:
+        response = client.post(url, json={**body, "cursor": cursor, "size": 10}).get_json()
+        pages.append(response)
+        cursor = response["next"]
+        if cursor is None:
+            return pages
+
+
+def test_cursor_pages_match_offset_pages(client):
+    pages = walk_forward(client, "/yield/", {})
+
+    assert [len(page["items"]) for page in pages] == [10, 10, 5]
+    assert [page["hasMore"] for page in pages] == [True, True, False]
+    assert pages[0]["prev"] is None
+
+    offset_items = []
+    for page in (1, 2, 3):
+        offset_items += client.post("/yield/", json={"page": page, "size": 10}).get_json()["items"]
+    assert [item for page in pages for item in page["items"]] == offset_items
+
+
+def test_cursor_prev_returns_previous_page(client):
+    pages = walk_forward(client, "/yield/", {})
+
+    previous = client.post("/yield/", json={"cursor": pages[2]["prev"], "size": 10}).get_json()
+    assert previous["items"] == pages[1]["items"]
+
+    first = client.post("/yield/", json={"cursor": previous["prev"], "size": 10}).get_json()
+    assert first["items"] == pages[0]["items"]
+    assert first["prev"] is None
+
+
+def test_cursor_pagination_with_filters_and_total(client):
+    response = client.post(
+        "/yield/filter",
+        json={"crop": "Rice", "cursor": None, "size": 5, "withTotal": True}
+    ).get_json()
+
+    assert response["total"] == 12
+    assert all(item["crop"] == "Rice" for item in response["items"])
+
+    pages = walk_forward(client, "/yield/filter", {"crop": "Rice"})
+    assert sum(len(page["items"]) for page in pages) == 12
+
+
+def test_invalid_cursor_is_rejected(client):
+    response = client.post("/yield/", json={"cursor": "not-a-cursor"})
+    assert response.status_code == 400
+
+
+def test_cursor_round_trip_with_sort_field(mock_mongo):
+    item = mock_mongo['yield_collection'].find_one()
+    token = Pagination.encode_cursor(item, "next", "crop_year")
+    cursor = Pagination.decode_cursor(token)
+
+    assert cursor["id"] == item["_id"]
+    assert cursor["v"] == item["crop_year"]
+
+    items, metadata = Pagination.cursor_page(
+        mock_mongo['yield_collection'], 30, cursor, sort_field="crop_year")
+    assert all(
+        (other["crop_year"], other["_id"]) > (item["crop_year"], item["_id"])
+        for other in items
+    )
+
+
+def test_offset_page_without_total_reports_has_more(client):
+    first = client.post("/yield/", json={"page": 1, "size": 10, "withTotal": False}).get_json()
+    last = client.post("/yield/", json={"page": 3, "size": 10, "withTotal": False}).get_json()
+
+    assert "total" not in first
+    assert first["hasMore"] is True
+    assert len(first["items"]) == 10
+    assert last["hasMore"] is False
+    assert len(last["items"]) == 5
+
+
+def test_unfiltered_count_uses_estimate(mock_mongo):
+    collection = mock_mongo['yield_collection']
+    with patch.object(type(collection), "estimated_document_count", return_value=25) as estimate:
+        metadata = Pagination.get_metadata(collection, 10)
+
+    estimate.assert_called_once_with()
+    assert metadata == {'total': 25, 'totalPages': 3, 'size': 10}
+
+
+def test_filtered_count_is_cached_until_yield_write(client, mock_mongo):
+    collection = mock_mongo['yield_collection']
+    counter = patch.object(
+        type(collection), "count_documents", autospec=True,
+        side_effect=lambda self, query: len(list(self.find(query))))
+
+    with counter as count_documents:
+        client.post("/yield/filter", json={"crop": "Rice", "page": 1, "size": 5})
+        second = client.post("/yield/filter", json={"crop": "Rice", "page": 2, "size": 5})
+        assert count_documents.call_count == 1
+        assert second.get_json()["total"] == 12
+
+        create_yield_event(collection, {
+            "crop": "Rice",
+            "crop_year": "2024",
+            "season": "Spring",
+            "state": "Acre",
+            "area": 1.0,
+            "production": 1.0,
+            "annual_rainfall": 1.0,
+            "fertilizer": 1.0,
+            "pesticide": 1.0,
+            "yield": 1.0,
+        })
+        third = client.post("/yield/filter", json={"crop": "Rice", "page": 1, "size": 5})
+
+    assert count_documents.call_count == 2
+    assert third.get_json()["total"] == 13
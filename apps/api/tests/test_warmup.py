@@ -0,0 +1,109 @@
+import importlib
+import sys
+import types
+import warnings
+import pytest
+from flask import Flask
+from mongomock import MongoClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from api import gunicorn_config
+from api.json_provider import ORJSONProvider
+from api.routes import create_blueprints
+from api.warmup import WARMUP_EXTENSION, add_warmup, warm_up
+
+
+@pytest.fixture
+def mock_mongo():
+    db = MongoClient()['test_db']
+    db['yield_collection'].insert_many([
+        {"crop": crop, "crop_year": 2000 + i % 3, "season": "Spring", "state": "Acre",
+         "area": 10.0, "production": 100 + i, "annual_rainfall": 1200.0,
+         "fertilizer": 50.0, "pesticide": 5.0, "yield": 1.0}
+        for i, crop in enumerate(["Wheat", "Rice", "Maize"] * 4)
+    ])
+    return db
+
+
+@pytest.fixture
+def app(mock_mongo, monkeypatch):
+    monkeypatch.setenv("API_BYPASS_AUTH", "true")
+    monkeypatch.setenv("DASHBOARD_CACHE_BACKEND", "memory")
+    app = Flask(__name__)
+    app.json = ORJSONProvider(app)
+    for blueprint in create_blueprints(mock_mongo):
+        app.register_blueprint(blueprint)
+    return app
+
+
+def test_warm_up_primes_dashboard_cache(app, monkeypatch):
+    names = [name for name, _ in app.extensions[WARMUP_EXTENSION]]
+    assert names == ["catálogo de filtros", "dashboard"]
+
+    warm_up(app)
+
+    # Depois do aquecimento, a primeira tela não consulta o banco
+    def fail(**kwargs):
+        raise AssertionError("consulta fora do cache")
+    monkeypatch.setattr("api.routes.dashboard_routes.get_filtered_yield_data", fail)
+
+    response = app.test_client().post("/dashboard/", json={})
+    assert response.status_code == 200
+    assert response.get_json()
+
+
+def test_failed_warm_up_task_does_not_stop_the_others(capsys):
+    app = Flask(__name__)
+    done = []
+
+    def broken():
+        raise RuntimeError("sem conexão")
+    add_warmup(app, "quebrada", broken)
+    add_warmup(app, "ok", lambda: done.append(True))
+
+    warm_up(app)
+
+    assert done == [True]
+    assert "Aquecimento de quebrada falhou: sem conexão" in capsys.readouterr().out
+
+
+def test_gunicorn_config_from_env(monkeypatch):
+    monkeypatch.setenv("API_SERVER", "asgi")
+    monkeypatch.setenv("API_WORKERS", "3")
+    monkeypatch.setenv("API_PRELOAD", "false")
+    try:
+        config = importlib.reload(gunicorn_config)
+        assert config.wsgi_app == "api.asgi.server:create_app()"
+        assert config.worker_class == "uvicorn_worker.UvicornWorker"
+        assert config.workers == 3
+        assert config.preload_app is False
+    finally:
+        monkeypatch.undo()
+        config = importlib.reload(gunicorn_config)
+
+    assert config.wsgi_app == "api.server:create_app()"
+    assert config.worker_class == "gthread"
+
+
+def test_post_fork_discards_inherited_sql_connections(monkeypatch):
+    engine = create_engine("sqlite://")
+    monkeypatch.setitem(sys.modules, "db.keys", types.SimpleNamespace(
+        Session=sessionmaker(bind=engine)))
+    monkeypatch.delitem(sys.modules, "db.postgres", raising=False)
+    inherited_pool = engine.pool
+
+    gunicorn_config.dispose_sql_engines()
+
+    assert engine.pool is not inherited_pool
+
+
+def test_post_fork_replaces_mongo_client_without_global_warning_filter(monkeypatch):
+    calls = []
+    monkeypatch.setattr(gunicorn_config.MongoDB, "after_fork", lambda: calls.append("mongo"))
+    monkeypatch.setattr(gunicorn_config, "dispose_sql_engines", lambda: calls.append("sql"))
+    filters = list(warnings.filters)
+
+    gunicorn_config.post_fork(server=None, worker=None)
+
+    assert calls == ["mongo", "sql"]
+    assert warnings.filters == filters
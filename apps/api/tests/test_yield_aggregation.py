@@ -0,0 +1,91 @@
+import json
+import random
+import pytest
+from api.service.dashboard_service import (
+    aggregate_yield_data,
+    calculate_total_production,
+    get_yearly_season_totals,
+    get_production_by_state,
+    get_yearly_crop_statistics,
+    get_general_metrics,
+    get_production_by_crop,
+)
+from api.service.yield_aggregation import load_yield_columns
+
+
+def legacy_results(rows):
+    return (
+        calculate_total_production(rows),
+        get_yearly_season_totals(rows),
+        get_production_by_state(rows),
+        get_yearly_crop_statistics(rows),
+        get_general_metrics(rows),
+        get_production_by_crop(rows),
+    )
+
+
+def as_json(results):
+    return json.dumps(results, sort_keys=True)
+
+
+def make_rows(count, seed=42):
+    rng = random.Random(seed)
+    rows = []
+    for _ in range(count):
+        rows.append({
+            "_id": str(rng.random()),
+            "crop": rng.choice(["Wheat", "Rice", "Maize", "Banana"]),
+            "crop_year": rng.randint(1997, 2003),
+            "season": rng.choice(["Whole Year", "Spring", "Autumn", "Summer", "Winter"]),
+            "state": rng.choice(["Acre", "Bahia", "Goiás", "Pará"]),
+            "area": rng.uniform(1, 5000),
+            "production": rng.choice([rng.randint(0, 90000), rng.uniform(0, 90000)]),
+            "annual_rainfall": rng.uniform(300, 3000),
+            "fertilizer": rng.uniform(0, 1e6),
+            "pesticide": rng.randint(0, 5000),
+            "yield": rng.random(),
+        })
+    return rows
+
+
+@pytest.mark.parametrize("count", [1, 7, 500, 3000])
+def test_aggregate_matches_individual_functions(count):
+    rows = make_rows(count, seed=count)
+    assert load_yield_columns(rows) is not None
+    assert as_json(aggregate_yield_data(rows)) == as_json(legacy_results(rows))
+
+
+def test_aggregate_preserves_integer_totals():
+    rows = make_rows(200)
+    for row in rows:
+        row["production"] = int(row["production"])
+
+    total_production, _, _, yearly_crop_stats, _, _ = aggregate_yield_data(rows)
+
+    assert isinstance(total_production, int)
+    assert all(
+        isinstance(stats["total_production"], int)
+        for crops in yearly_crop_stats.values()
+        for stats in crops
+    )
+
+
+def test_aggregate_empty_data():
+    assert as_json(aggregate_yield_data([])) == as_json(legacy_results([]))
+
+
+def test_aggregate_falls_back_on_irregular_rows():
+    rows = make_rows(50)
+    rows[3]["state"] = None
+    del rows[10]["area"]
+
+    assert load_yield_columns(rows) is None
+    assert as_json(aggregate_yield_data(rows)) == as_json(legacy_results(rows))
+
+
+def test_aggregate_requires_production_field():
+    rows = make_rows(5)
+    del rows[0]["production"]
+
+    with pytest.raises(ValueError):
+        aggregate_yield_data(rows)
@@ -0,0 +1,79 @@
+import csv
+import io
+import json
+import pytest
+from flask import Flask
+from mongomock import MongoClient
+from api.routes import yield_routes
+from api.service.yield_export import EXPORT_FIELDS, iter_csv, iter_ndjson
+
+
+@pytest.fixture
+def mock_mongo():
+    client = MongoClient()
+    db = client['test_db']
+    db['yield_collection'].insert_many([
+        {
+            "crop": "Rice" if i % 2 else "Wheat",
+            "crop_year": "2001",
+            "season": "Spring",
+            "state": "Acre",
+            "area": 1.5,
+            "production": i,
+            "annual_rainfall": 800.2,
+            "fertilizer": 50.5,
+            "pesticide": 10.3,
+            "yield": 49.75,
+        }
+        for i in range(20)
+    ])
+    return db
+
+
+@pytest.fixture
+def client(mock_mongo, monkeypatch):
+    monkeypatch.setenv("API_BYPASS_AUTH", "true")
+    monkeypatch.setenv("YIELD_EXPORT_BATCH_SIZE", "3")
+    app = Flask(__name__)
+    app.register_blueprint(yield_routes.create_blueprint(mock_mongo))
+    return app.test_client()
+
+
+def test_ndjson_export_honors_filters(client):
+    response = client.post("/yield/export", json={"crop": "Rice"})
+
+    assert response.status_code == 200
+    assert response.mimetype == "application/x-ndjson"
+    assert response.is_streamed
+
+    rows = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert len(rows) == 10
+    assert all(row["crop"] == "Rice" for row in rows)
+    assert all("_id" not in row for row in rows)
+
+
+def test_csv_export_has_header_and_all_rows(client):
+    response = client.get("/yield/export?format=csv")
+
+    assert response.mimetype == "text/csv"
+    rows = list(csv.DictReader(io.StringIO(response.get_data(as_text=True))))
+    assert len(rows) == 20
+    assert list(rows[0]) == EXPORT_FIELDS
+    assert sorted(int(row["production"]) for row in rows) == list(range(20))
+
+
+def test_export_rejects_invalid_input(client):
+    assert client.get("/yield/export?format=xml").status_code == 400
+    assert client.post("/yield/export", json={"crop": 1}).status_code == 400
+
+
+def test_serializers_emit_bounded_chunks():
+    documents = [{"crop": "Rice", "production": i} for i in range(100)]
+
+    ndjson_chunks = list(iter_ndjson(documents, chunk_size=200))
+    csv_chunks = list(iter_csv(documents, ["crop", "production"], chunk_size=200))
+
+    assert len(ndjson_chunks) > 1
+    assert len(csv_chunks) > 1
+    assert "".join(ndjson_chunks).count("\n") == 100
+    assert "".join(csv_chunks).splitlines()[0] == "crop,production"
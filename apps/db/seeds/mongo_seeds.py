@@ -1,103 +1,55 @@
-import pandas as pd
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from db.crop_yield import CSV_PATH, build_documents, load_crop_yield
 from db.mongo import MongoDB
+from db.yield_rollup import build_rollup, rollup_exists
 
-db = MongoDB.connect()
-df = pd.read_csv("apps/db/crop_yield.csv")
-
-# retirando valores nulos
-df = df.dropna()
-
-# eliminando espaço em branco
-df.columns = df.columns.str.strip()
-df["Crop"] = df["Crop"].str.strip()
-df["Season"] = df["Season"].str.strip()
-df["State"] = df["State"].str.strip()
-
-# Atualizando estado para estados brasileiros
-update_states = {
-    "Assam": "Acre",
-    "Karnataka": "Alagoas",
-    "Kerala": "Amapá",
-    "Meghalaya": "Amazonas",
-    "West Bengal": "Bahia",
-    "Puducherry": "Ceará",
-    "Goa": "Distrito Federal",
-    "Andhra Pradesh": "Espírito Santo",
-    "Tamil Nadu": "Goiás",
-    "Odisha": "Maranhão",
-    "Bihar": "Mato Grosso",
-    "Gujarat": "Mato Grosso do Sul",
-    "Madhya Pradesh": "Minas Gerais",
-    "Maharashtra": "Pará",
-    "Mizoram": "Paraíba",
-    "Punjab": "Paraná",
-    "Uttar Pradesh": "Pernambuco",
-    "Haryana": "Piauí",
-    "Himachal Pradesh": "Rio de Janeiro",
-    "Tripura": "Rio Grande do Norte",
-    "Nagaland": "Rio Grande do Sul",
-    "Chhattisgarh": "Rondônia",
-    "Uttarakhand": "Roraima",
-    "Jharkhand": "Santa Catarina",
-    "Delhi": "São Paulo",
-    "Manipur": "Sergipe",
-    "Jammu and Kashmir": "Tocantins",
-    "Telangana": "Maranhão",
-    "Arunachal Pradesh": "Pará",
-    "Sikkim": "Pernambuco",
-}
-df["State"] = df["State"].replace(update_states)
-
-# alterando valores de estação
-update_season = {
-    "Kharif": "Spring",
-    "Rabi": "Autumn",
-}
-df["Season"] = df["Season"].replace(update_season)
-
-
-def seed_populate(df):
-    try:
-        species = df["Crop"].unique()
-        for sp in species:
-            db.species_collection.insert_one({"scientific_name": sp, "common_name": sp})
-
-        for row in df.itertuples():
-            crop = row.Crop
-            crop_year = row.Crop_Year
-            season = row.Season
-            state = row.State
-            area = row.Area
-            production = row.Production
-            annual_rainfall = row.Annual_Rainfall
-            fertilizer = row.Fertilizer
-            pesticide = row.Pesticide
-            yield_ = row.Yield
-
-            # collection plots
-            db.plots_collection.insert_one(
-                {"area": row.Area, "state": row.State, "country": "Brazil"}
-            )
-            # collection yield
-            db.yield_collection.insert_one(
-                {
-                    "crop": crop,
-                    "crop_year": crop_year,
-                    "season": season,
-                    "state": state,
-                    "area": area,
-                    "production": production,
-                    "annual_rainfall": annual_rainfall,
-                    "fertilizer": fertilizer,
-                    "pesticide": pesticide,
-                    "yield": yield_,
-                }
+BATCH_SIZE = 5000
+WORKERS = 4
+
+
+def insert_batches(collection, documents, batch_size=BATCH_SIZE, workers=WORKERS):
+    """
+    Insere os documentos em lotes com insert_many(ordered=False), em paralelo
+    quando workers > 1, imprimindo o progresso e a taxa de linhas por segundo.
+    """
+    batches = [
+        documents[i:i + batch_size]
+        for i in range(0, len(documents), batch_size)
+    ]
+    start = time.perf_counter()
+    inserted = 0
+
+    def insert(batch):
+        return len(collection.insert_many(batch, ordered=False).inserted_ids)
+
+    with ThreadPoolExecutor(max_workers=max(workers, 1)) as executor:
+        for count in executor.map(insert, batches):
+            inserted += count
+            elapsed = time.perf_counter() - start
+            rate = inserted / elapsed if elapsed else float("inf")
+            print(
+                f"{collection.name}: {inserted}/{len(documents)} "
+                f"({rate:.0f} linhas/s)"
             )
+    return inserted
+
+
+def seed_populate(db, df, batch_size=BATCH_SIZE, workers=WORKERS):
+    try:
+        species, plots, yields = build_documents(df)
+
+        insert_batches(db.species_collection, species, batch_size, workers)
+        insert_batches(db.plots_collection, plots, batch_size, workers)
+        insert_batches(db.yield_collection, yields, batch_size, workers)
         return "Dados inseridos com sucesso!"
     except Exception as e:
         raise Exception("Erro ao popular banco de dados:", e) from e
 
-def seed_terms_of_use():
+
+def seed_terms_of_use(db):
     terms = {
         "text": "Estes são os termos de uso padrão da aplicação...",
         "status": "ativo",
@@ -119,7 +71,7 @@ def seed_terms_of_use():
     print("Seed: Termos de uso inseridos.")
 
 
-def seed_user_acceptance():
+def seed_user_acceptance(db):
     user_acceptance = {
         "user_id": "user123",
         "topics": [
@@ -139,7 +91,24 @@ def seed_user_acceptance():
     print("Seed: Aceite do usuário inserido.")
 
 
+def main():
+    parser = argparse.ArgumentParser(description="Popula o MongoDB a partir de crop_yield.csv")
+    parser.add_argument("--csv", default=CSV_PATH)
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--workers", type=int, default=WORKERS)
+    args = parser.parse_args()
+
+    db = MongoDB.connect()
+    df = load_crop_yield(args.csv)
+
+    start = time.perf_counter()
+    print(seed_populate(db, df, args.batch_size, args.workers))
+    print(f"{len(df)} linhas em {time.perf_counter() - start:.2f}s")
+    if rollup_exists(db):
+        print(f"{build_rollup(db)} células no cubo do dashboard")
+    seed_terms_of_use(db)
+    seed_user_acceptance(db)
+
+
 if __name__ == "__main__":
-    seed_populate(df)
-    seed_terms_of_use()
-    seed_user_acceptance()
+    main()
@@ -1,7 +1,12 @@
+import argparse
+import os
 import random
+import time
 from base64 import b64encode
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta
 
+from sqlalchemy import insert
 from sqlalchemy.orm import sessionmaker
 from faker import Faker
 from cryptography.fernet import Fernet
@@ -35,6 +40,11 @@ NUM_USERS_DISABLED = 0
 NUM_EXTERNAL_CLIENTS = 9
 NUM_EXTERNAL_CLIENTS_DISABLED = 0
 
+BATCH_SIZE = 1000
+
+ENCRYPTED_USER_FIELDS = ("name", "email", "password", "version_terms_agreement")
+ENCRYPTED_EXTERNAL_CLIENT_FIELDS = ("name", "password")
+
 
 def insert_entity_types(keys_session):
     entity_types = {
@@ -105,164 +115,148 @@ def insert_roles(postgres_session, permissions):
     return roles
 
 
+def prepare_entity(task):
+    """
+    Executado nos processos do pool: gera a chave Fernet da entidade, faz o
+    hash bcrypt da senha e encripta os campos sensíveis.
+    """
+    fields, encrypted_fields, hash_cost = task
+    key = Fernet.generate_key()
+    fernet = Fernet(key)
+
+    row = dict(fields)
+    row["password"] = hash_password(row["password"], hash_cost)
+    for field in encrypted_fields:
+        row[field] = encrypt_field(fernet, row[field])
+    return row, key.decode()
+
+
+def prepare_entities(entities, encrypted_fields, hash_cost, workers):
+    tasks = [(entity, encrypted_fields, hash_cost) for entity in entities]
+    if workers <= 1:
+        return [prepare_entity(task) for task in tasks]
+
+    chunksize = max(1, len(tasks) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(prepare_entity, tasks, chunksize=chunksize))
+
+
+def bulk_insert_entities(
+    postgres_session,
+    keys_session,
+    model,
+    prepared,
+    entity_type,
+    batch_size=BATCH_SIZE,
+):
+    """
+    Insere as entidades em lotes, obtendo os IDs gerados de uma vez via
+    RETURNING (na ordem dos parâmetros), e em seguida as EntityKey de cada lote.
+    """
+    ids = []
+    for i in range(0, len(prepared), batch_size):
+        batch = prepared[i:i + batch_size]
+        batch_ids = postgres_session.scalars(
+            insert(model).returning(model.id, sort_by_parameter_order=True),
+            [row for row, _ in batch]
+        ).all()
+        keys_session.execute(insert(EntityKey), [
+            {"entity_id": entity_id, "key": key, "entity_type": entity_type}
+            for entity_id, (_, key) in zip(batch_ids, batch)
+        ])
+        ids.extend(batch_ids)
+    return ids
+
+
+def disabled_since(index, num_disabled):
+    # Decide se a entidade será soft-deletada
+    if index < num_disabled:
+        return datetime.now() - timedelta(days=random.randint(31, 365))
+    return None
+
+
 def insert_users(
     postgres_session,
     keys_session,
     roles,
     entity_types,
+    num_users=NUM_USERS,
+    num_disabled=NUM_USERS_DISABLED,
+    workers=1,
+    batch_size=BATCH_SIZE,
+    hash_cost=DEFAULT_HASH_COST,
 ):
-    users = []
-
-    def encrypt_user(
-        fernet: Fernet,
-        user: User,
-    ):
-        return User(
-            name=encrypt_field(fernet, user.name),
-            login=user.login,
-            email=encrypt_field(fernet, user.email),
-            password=encrypt_field(fernet, user.password),
-            version_terms_agreement=encrypt_field(
-                fernet,
-                user.version_terms_agreement
-            ),
-            role_id=user.role_id
-        )
-
-    def add_user(
-        name: str,
-        login: str,
-        email: str,
-        password: str,
-        version_terms_agreement: str,
-        role_id: int,
-        disabled_since: datetime | None = None
-    ):
-        key = Fernet.generate_key()
-        fernet = Fernet(key)
-        user = encrypt_user(fernet, User(
-            name=name,
-            login=login,
-            email=email,
-            password=password,
-            version_terms_agreement=version_terms_agreement,
-            role_id=role_id,
-            disabled_since=disabled_since,
-        ))
-        users.append(user)
-        postgres_session.add(user)
-        postgres_session.flush()  # get user.id
-
-        keys_session.add(EntityKey(
-            entity_id=user.id,
-            key=key.decode(),
-            entity_type=entity_types["user"]
-        ))
-
-    add_user(  # default user for easy login
-        name="Alice",
-        login="a",
-        email="alice@email.com",
-        password=hash_password("secret"),
-        version_terms_agreement="v1.0",
-        role_id=roles[0].id
-    )
-
-    for i in range(NUM_USERS):
-        # Decide se o usuário será soft-deletado
-        disabled_date = None
-        if i < NUM_USERS_DISABLED:
-            disabled_date = datetime.now() - timedelta(days=random.randint(31, 365))
-
-        add_user(
-            name=fake.name(),
-            email=fake.unique.email(),
-            login=fake.unique.user_name(),
-            password=hash_password(fake.password()),
-            version_terms_agreement="v1.0",
-            role_id=random.choice(roles).id,
-            disabled_since=disabled_date,
-        )
-
-    postgres_session.add_all(users)
-    print(f"{NUM_USERS} usuários inseridos.")
-
-    postgres_session.flush()
-    keys_session.flush()
-    print(f"{NUM_USERS + 1} usuários inseridos e encriptados.")
-    print(f"{NUM_USERS + 1} chaves de usuário inseridas.")
-
-    return users
+    users = [{  # default user for easy login
+        "name": "Alice",
+        "login": "a",
+        "email": "alice@email.com",
+        "password": "secret",
+        "version_terms_agreement": "v1.0",
+        "role_id": roles[0].id,
+        "disabled_since": None,
+    }]
+    for i in range(num_users):
+        users.append({
+            "name": fake.name(),
+            "email": fake.unique.email(),
+            "login": fake.unique.user_name(),
+            "password": fake.password(),
+            "version_terms_agreement": "v1.0",
+            "role_id": random.choice(roles).id,
+            "disabled_since": disabled_since(i, num_disabled),
+        })
+
+    start = time.perf_counter()
+    prepared = prepare_entities(users, ENCRYPTED_USER_FIELDS, hash_cost, workers)
+    print(f"{len(prepared)} usuários encriptados em {time.perf_counter() - start:.1f}s.")
+
+    ids = bulk_insert_entities(
+        postgres_session, keys_session, User, prepared, entity_types["user"], batch_size)
+    print(f"{len(ids)} usuários inseridos e encriptados.")
+    print(f"{len(ids)} chaves de usuário inseridas.")
+
+    return ids
 
 
 def insert_external_clients(
     postgres_session,
     keys_session,
     entity_types,
+    num_external_clients=NUM_EXTERNAL_CLIENTS,
+    num_disabled=NUM_EXTERNAL_CLIENTS_DISABLED,
+    workers=1,
+    batch_size=BATCH_SIZE,
+    hash_cost=DEFAULT_HASH_COST,
 ):
-    external_clients = []
-
-    def encrypt_external_client(
-        fernet: Fernet,
-        external_client: ExternalClient,
-    ):
-        return ExternalClient(
-            name=encrypt_field(fernet, external_client.name),
-            login=external_client.login,
-            password=encrypt_field(fernet, external_client.password),
-        )
-
-    def add_external_client(
-        name: str,
-        login: str,
-        password: str,
-        disabled_since: datetime | None = None
-    ):
-        key = Fernet.generate_key()
-        fernet = Fernet(key)
-        external_client = encrypt_external_client(fernet, ExternalClient(
-            name=name,
-            login=login,
-            password=password,
-            disabled_since=disabled_since,
-        ))
-        external_clients.append(external_client)
-        postgres_session.add(external_client)
-        postgres_session.flush()  # get external_client.id
-
-        keys_session.add(EntityKey(
-            entity_id=external_client.id,
-            key=key.decode(),
-            entity_type=entity_types["external_client"],
-        ))
-
-    add_external_client(  # default external_client for easy login
-        name="Canva",
-        login="canva",
-        password=hash_password("secret"),
+    external_clients = [{  # default external_client for easy login
+        "name": "Canva",
+        "login": "canva",
+        "password": "secret",
+        "disabled_since": None,
+    }]
+    for i in range(num_external_clients):
+        external_clients.append({
+            "name": fake.name(),
+            "login": fake.unique.company(),
+            "password": fake.password(),
+            "disabled_since": disabled_since(i, num_disabled),
+        })
+
+    prepared = prepare_entities(
+        external_clients, ENCRYPTED_EXTERNAL_CLIENT_FIELDS, hash_cost, workers)
+
+    ids = bulk_insert_entities(
+        postgres_session,
+        keys_session,
+        ExternalClient,
+        prepared,
+        entity_types["external_client"],
+        batch_size,
     )
+    print(f"{len(ids)} clientes externos inseridos e encriptados.")
+    print(f"{len(ids)} chaves de clientes externos inseridas.")
 
-    for i in range(NUM_EXTERNAL_CLIENTS):
-        disabled_date = None
-        if i < NUM_EXTERNAL_CLIENTS_DISABLED:
-            disabled_date = datetime.now() - timedelta(days=random.randint(31, 365))
-
-        add_external_client(
-            name=fake.name(),
-            login=fake.unique.company(),
-            password=hash_password(fake.password()),
-            disabled_since=disabled_date
-        )
-
-    postgres_session.add_all(external_clients)
-    print(f"{NUM_USERS} usuários inseridos.")
-
-    postgres_session.flush()
-    keys_session.flush()
-    print(f"{NUM_USERS + 1} usuários inseridos e encriptados.")
-    print(f"{NUM_USERS + 1} chaves de usuário inseridas.")
-
-    return external_clients
+    return ids
 
 
 def encrypt_field(
@@ -272,14 +266,22 @@ def encrypt_field(
     return b64encode(fernet.encrypt(field.encode())).decode()
 
 
-def hash_password(password: str) -> str:
+def hash_password(password: str, cost: int = DEFAULT_HASH_COST) -> str:
     return bcrypt.hashpw(
         password.encode("utf-8"),
-        bcrypt.gensalt(rounds=DEFAULT_HASH_COST)
+        bcrypt.gensalt(rounds=cost)
     ).decode("utf-8")
 
 
-def insert_seeds():
+def insert_seeds(
+    num_users=NUM_USERS,
+    num_users_disabled=NUM_USERS_DISABLED,
+    num_external_clients=NUM_EXTERNAL_CLIENTS,
+    num_external_clients_disabled=NUM_EXTERNAL_CLIENTS_DISABLED,
+    workers=1,
+    batch_size=BATCH_SIZE,
+    hash_cost=DEFAULT_HASH_COST,
+):
     postgres_engine = get_engine()
     keys_engine = get_keys_engine()
 
@@ -295,9 +297,28 @@ def insert_seeds():
 
     permissions = insert_permissions(postgres_session)
     roles = insert_roles(postgres_session, permissions)
-    insert_users(postgres_session, keys_session, roles, entity_types)
+    insert_users(
+        postgres_session,
+        keys_session,
+        roles,
+        entity_types,
+        num_users,
+        num_users_disabled,
+        workers,
+        batch_size,
+        hash_cost,
+    )
 
-    insert_external_clients(postgres_session, keys_session, entity_types)
+    insert_external_clients(
+        postgres_session,
+        keys_session,
+        entity_types,
+        num_external_clients,
+        num_external_clients_disabled,
+        workers,
+        batch_size,
+        hash_cost,
+    )
 
     postgres_session.commit()
     keys_session.commit()
@@ -305,5 +326,31 @@ def insert_seeds():
     print("Seed finalizada com sucesso.")
 
 
+def main():
+    parser = argparse.ArgumentParser(description="Popula o PostgreSQL e o banco de chaves")
+    parser.add_argument("--users", type=int, default=NUM_USERS, help="NUM_USERS")
+    parser.add_argument("--users-disabled", type=int, default=NUM_USERS_DISABLED)
+    parser.add_argument("--external-clients", type=int, default=NUM_EXTERNAL_CLIENTS)
+    parser.add_argument("--external-clients-disabled", type=int, default=NUM_EXTERNAL_CLIENTS_DISABLED)
+    parser.add_argument(
+        "--workers", type=int, default=os.cpu_count() or 1,
+        help="processos usados para bcrypt/Fernet (1 desativa o pool)")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument(
+        "--hash-cost", type=int, default=DEFAULT_HASH_COST,
+        help="custo do bcrypt; valores menores aceleram datasets de carga")
+    args = parser.parse_args()
+
+    insert_seeds(
+        args.users,
+        args.users_disabled,
+        args.external_clients,
+        args.external_clients_disabled,
+        args.workers,
+        args.batch_size,
+        args.hash_cost,
+    )
+
+
 if __name__ == "__main__":
-    insert_seeds()
+    main()
@@ -0,0 +1,89 @@
+import pandas as pd
+
+CSV_PATH = "apps/db/crop_yield.csv"
+
+# Atualizando estado para estados brasileiros
+update_states = {
+    "Assam": "Acre",
+    "Karnataka": "Alagoas",
+    "Kerala": "Amapá",
+    "Meghalaya": "Amazonas",
+    "West Bengal": "Bahia",
+    "Puducherry": "Ceará",
+    "Goa": "Distrito Federal",
+    "Andhra Pradesh": "Espírito Santo",
+    "Tamil Nadu": "Goiás",
+    "Odisha": "Maranhão",
+    "Bihar": "Mato Grosso",
+    "Gujarat": "Mato Grosso do Sul",
+    "Madhya Pradesh": "Minas Gerais",
+    "Maharashtra": "Pará",
+    "Mizoram": "Paraíba",
+    "Punjab": "Paraná",
+    "Uttar Pradesh": "Pernambuco",
+    "Haryana": "Piauí",
+    "Himachal Pradesh": "Rio de Janeiro",
+    "Tripura": "Rio Grande do Norte",
+    "Nagaland": "Rio Grande do Sul",
+    "Chhattisgarh": "Rondônia",
+    "Uttarakhand": "Roraima",
+    "Jharkhand": "Santa Catarina",
+    "Delhi": "São Paulo",
+    "Manipur": "Sergipe",
+    "Jammu and Kashmir": "Tocantins",
+    "Telangana": "Maranhão",
+    "Arunachal Pradesh": "Pará",
+    "Sikkim": "Pernambuco",
+}
+
+# alterando valores de estação
+update_season = {
+    "Kharif": "Spring",
+    "Rabi": "Autumn",
+}
+
+YIELD_COLUMNS = {
+    "Crop": "crop",
+    "Crop_Year": "crop_year",
+    "Season": "season",
+    "State": "state",
+    "Area": "area",
+    "Production": "production",
+    "Annual_Rainfall": "annual_rainfall",
+    "Fertilizer": "fertilizer",
+    "Pesticide": "pesticide",
+    "Yield": "yield",
+}
+
+
+def load_crop_yield(path=CSV_PATH):
+    df = pd.read_csv(path)
+
+    # retirando valores nulos
+    df = df.dropna()
+
+    # eliminando espaço em branco
+    df.columns = df.columns.str.strip()
+    df["Crop"] = df["Crop"].str.strip()
+    df["Season"] = df["Season"].str.strip()
+    df["State"] = df["State"].str.strip()
+
+    df["State"] = df["State"].replace(update_states)
+    df["Season"] = df["Season"].replace(update_season)
+    return df
+
+
+def build_documents(df):
+    """Converte o DataFrame nos documentos de species, plots e yield de uma vez"""
+    species = [
+        {"scientific_name": sp, "common_name": sp}
+        for sp in df["Crop"].unique().tolist()
+    ]
+    plots = (
+        df[["Area", "State"]]
+        .rename(columns={"Area": "area", "State": "state"})
+        .assign(country="Brazil")
+        .to_dict("records")
+    )
+    yields = df[list(YIELD_COLUMNS)].rename(columns=YIELD_COLUMNS).to_dict("records")
+    return species, plots, yields
@@ -0,0 +1,21 @@
+from pymongo import ReturnDocument
+
+# Contador em metadata_collection incrementado a cada carga externa de dados
+# de yield e a cada escrita feita pela API; as instâncias da API o consultam
+# para descartar seus caches e o usam nos ETags das respostas.
+DATA_VERSION_ID = "yield_data_version"
+
+
+def get_data_version(db) -> int:
+    document = db.metadata_collection.find_one({"_id": DATA_VERSION_ID})
+    return document["version"] if document else 0
+
+
+def bump_data_version(db) -> int:
+    document = db.metadata_collection.find_one_and_update(
+        {"_id": DATA_VERSION_ID},
+        {"$inc": {"version": 1}},
+        upsert=True,
+        return_document=ReturnDocument.AFTER
+    )
+    return document["version"]
@@ -0,0 +1,230 @@
+import argparse
+from pymongo import ASCENDING
+from pymongo.errors import OperationFailure
+
+YIELD_GROUP_FIELDS = ["crop_year", "season", "crop", "state"]
+YIELD_NUMERIC_FIELDS = ["production", "area", "fertilizer", "pesticide", "annual_rainfall"]
+
+# Índices declarados por coleção. Cada entrada tem o nome do índice, as
+# chaves e opções extras repassadas para `create_index`.
+INDEXES = {
+    "species_collection": [
+        {
+            "name": "scientific_name_1",
+            "keys": [("scientific_name", ASCENDING)],
+            "options": {"unique": True},
+        },
+    ],
+    "plots_collection": [
+        {"name": "area_1", "keys": [("area", ASCENDING)]},
+    ],
+    "yield_collection": [
+        {"name": "production_1", "keys": [("production", ASCENDING)]},
+        # Filtros do dashboard, /yield/filter e contagens da paginação.
+        # Inclui os campos numéricos para cobrir as agregações do dashboard.
+        {
+            "name": "dashboard_filters_covering",
+            "keys": [
+                (field, ASCENDING)
+                for field in YIELD_GROUP_FIELDS + YIELD_NUMERIC_FIELDS
+            ],
+        },
+        # Filtros que não começam por crop_year; também atende o update por (crop, crop_year)
+        {"name": "crop_crop_year", "keys": [("crop", ASCENDING), ("crop_year", ASCENDING)]},
+        {"name": "state_crop_year", "keys": [("state", ASCENDING), ("crop_year", ASCENDING)]},
+        {"name": "season_crop_year", "keys": [("season", ASCENDING), ("crop_year", ASCENDING)]},
+    ],
+    # Cubo de db.yield_rollup, filtrado pelo dashboard no modo "rollup"
+    "yield_rollup_collection": [
+        {
+            "name": "rollup_dimensions",
+            "keys": [(field, ASCENDING) for field in YIELD_GROUP_FIELDS],
+        },
+        {"name": "rollup_crop", "keys": [("crop", ASCENDING)]},
+        {"name": "rollup_state", "keys": [("state", ASCENDING)]},
+    ],
+    "yield_predict_collection": [
+        {
+            "name": "projection_filters",
+            "keys": [
+                ("Crop_year", ASCENDING),
+                ("Season", ASCENDING),
+                ("Crop", ASCENDING),
+                ("State", ASCENDING),
+            ],
+        },
+        {"name": "projection_crop_year", "keys": [("Crop", ASCENDING), ("Crop_year", ASCENDING)]},
+        {"name": "projection_state_year", "keys": [("State", ASCENDING), ("Crop_year", ASCENDING)]},
+    ],
+}
+
+# Formatos de consulta mais frequentes, usados no relatório para verificar
+# via explain se algum deles ainda faz varredura completa da coleção
+QUERY_SHAPES = {
+    "yield_collection": [
+        {"crop_year": {"$in": [2000]}},
+        {"crop_year": {"$in": [2000]}, "season": {"$in": ["Spring"]}},
+        {"crop": {"$in": ["Rice"]}},
+        {"state": {"$in": ["Acre"]}},
+        {"season": {"$in": ["Spring"]}},
+        {"crop": "Rice", "crop_year": 2000},
+    ],
+    "yield_predict_collection": [
+        {"Crop_year": {"$in": [2000]}},
+        {"Crop": {"$in": ["Rice"]}},
+        {"State": {"$in": ["Acre"]}},
+    ],
+}
+
+
+def _key_spec(keys):
+    return [(field, int(direction)) for field, direction in keys]
+
+
+def ensure_indexes(db, collections=None):
+    """
+    Cria os índices declarados que ainda não existem.
+
+    Índices com as mesmas chaves já presentes (mesmo com outro nome) são
+    mantidos, então a função pode ser chamada a cada inicialização.
+
+    Returns:
+        dict: {coleção: [nomes dos índices criados]}
+    """
+    created = {}
+    for collection_name, indexes in INDEXES.items():
+        if collections is not None and collection_name not in collections:
+            continue
+
+        collection = db[collection_name]
+        existing = [
+            _key_spec(info["key"])
+            for info in collection.index_information().values()
+        ]
+
+        created[collection_name] = []
+        for index in indexes:
+            if _key_spec(index["keys"]) in existing:
+                continue
+            try:
+                collection.create_index(
+                    index["keys"], name=index["name"], **index.get("options", {}))
+            except OperationFailure as e:
+                raise Exception(
+                    f"Erro ao criar índice '{index['name']}' em '{collection_name}': {e}") from e
+            created[collection_name].append(index["name"])
+
+    return created
+
+
+def _index_usage(collection):
+    """Retorna {nome do índice: número de acessos} a partir de $indexStats"""
+    try:
+        return {
+            stats["name"]: stats["accesses"]["ops"]
+            for stats in collection.aggregate([{"$indexStats": {}}])
+        }
+    except OperationFailure:
+        return None
+
+
+def _winning_stages(plan):
+    """Lista os estágios do plano vencedor de um explain"""
+    stages = []
+    while plan:
+        stages.append(plan.get("stage"))
+        plan = plan.get("inputStage") or (plan.get("inputStages") or [None])[0]
+    return stages
+
+
+def explain_query(collection, query):
+    """Retorna os estágios do plano escolhido pelo MongoDB para a consulta"""
+    explain = collection.find(query).explain()
+    plan = explain.get("queryPlanner", {}).get("winningPlan", {})
+    # MongoDB 7+ com o slot-based engine encapsula o plano em queryPlan
+    return _winning_stages(plan.get("queryPlan", plan))
+
+
+def report_indexes(db):
+    """
+    Compara os índices declarados com os existentes.
+
+    Returns:
+        dict: por coleção, os índices `missing` (declarados e ausentes),
+        `undeclared` (existentes e não declarados), `unused` (sem acessos
+        segundo $indexStats) e `collection_scans` (formatos de consulta de
+        QUERY_SHAPES que ainda fazem COLLSCAN)
+    """
+    report = {}
+    for collection_name, indexes in INDEXES.items():
+        collection = db[collection_name]
+        existing = collection.index_information()
+        existing_specs = {
+            name: _key_spec(info["key"]) for name, info in existing.items()
+        }
+        declared_specs = [_key_spec(index["keys"]) for index in indexes]
+
+        usage = _index_usage(collection)
+
+        collection_scans = []
+        for query in QUERY_SHAPES.get(collection_name, []):
+            try:
+                if "COLLSCAN" in explain_query(collection, query):
+                    collection_scans.append(query)
+            except OperationFailure:
+                break
+
+        report[collection_name] = {
+            "missing": [
+                index["name"] for index in indexes
+                if _key_spec(index["keys"]) not in existing_specs.values()
+            ],
+            "undeclared": [
+                name for name, spec in existing_specs.items()
+                if name != "_id_" and spec not in declared_specs
+            ],
+            "unused": [
+                name for name, ops in (usage or {}).items()
+                if name != "_id_" and ops == 0
+            ],
+            "collection_scans": collection_scans,
+        }
+
+    return report
+
+
+def print_report(report):
+    for collection_name, result in report.items():
+        print(f"📌 {collection_name}")
+        for key, label in (
+            ("missing", "Índices ausentes"),
+            ("undeclared", "Índices não declarados"),
+            ("unused", "Índices sem uso"),
+            ("collection_scans", "Consultas com COLLSCAN"),
+        ):
+            values = result[key]
+            print(f"    {label}: {values if values else '-'}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gerenciamento de índices do MongoDB")
+    parser.add_argument(
+        "command",
+        choices=["ensure", "report"],
+        help="ensure: cria os índices ausentes; report: mostra índices ausentes, sem uso e COLLSCANs",
+    )
+    args = parser.parse_args()
+
+    from db.mongo import MongoDB
+    db = MongoDB.connect()
+
+    if args.command == "ensure":
+        created = ensure_indexes(db)
+        for collection_name, names in created.items():
+            print(f"📌 {collection_name}: {', '.join(names) if names else 'nenhum índice novo'}")
+    else:
+        print_report(report_indexes(db))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,35 +1,282 @@
 import os
+import threading
 from dotenv import load_dotenv
-from pymongo import MongoClient, ASCENDING
+from pymongo import AsyncMongoClient, MongoClient
+from pymongo.monitoring import ConnectionPoolListener
+from db.indexes import ensure_indexes
+from db.yield_rollup import drop_rollup
+
+load_dotenv()
+
+# Opções do pool repassadas ao MongoClient: variável de ambiente -> (opção, tipo).
+# Variáveis ausentes mantêm o padrão do pymongo.
+POOL_OPTIONS = {
+    "DB_MONGO_MAX_POOL_SIZE": ("maxPoolSize", int),
+    "DB_MONGO_MIN_POOL_SIZE": ("minPoolSize", int),
+    "DB_MONGO_MAX_IDLE_TIME_MS": ("maxIdleTimeMS", int),
+    "DB_MONGO_MAX_CONNECTING": ("maxConnecting", int),
+    "DB_MONGO_WAIT_QUEUE_TIMEOUT_MS": ("waitQueueTimeoutMS", int),
+    "DB_MONGO_CONNECT_TIMEOUT_MS": ("connectTimeoutMS", int),
+    "DB_MONGO_SOCKET_TIMEOUT_MS": ("socketTimeoutMS", int),
+    "DB_MONGO_SERVER_SELECTION_TIMEOUT_MS": ("serverSelectionTimeoutMS", int),
+    "DB_MONGO_TIMEOUT_MS": ("timeoutMS", int),
+}
+
+
+def client_options():
+    """
+    Monta as opções do MongoClient a partir do ambiente. DB_MONGO_COMPRESSORS
+    é uma lista separada por vírgulas (ex.: "zstd,snappy,zlib"); compressores
+    sem o módulo instalado são ignorados pelo pymongo.
+    """
+    options = {}
+    for variable, (option, cast) in POOL_OPTIONS.items():
+        value = os.getenv(variable)
+        if value not in (None, ""):
+            options[option] = cast(value)
+
+    compressors = os.getenv("DB_MONGO_COMPRESSORS", "")
+    compressors = [name.strip() for name in compressors.split(",") if name.strip()]
+    if compressors:
+        options["compressors"] = ",".join(compressors)
+    return options
+
+
+class PoolMetrics(ConnectionPoolListener):
+    """
+    Contadores do pool de conexões do MongoClient, alimentados pelos eventos
+    de monitoramento do pymongo. O tempo de espera no checkout mostra quando
+    o maxPoolSize está limitando as requisições.
+    """
+
+    COUNTERS = (
+        "pools_created", "pools_cleared",
+        "connections_created", "connections_closed",
+        "checkouts", "checkins", "checkout_failures",
+    )
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        # Lock novo também após um fork: o herdado pode ter ficado preso por
+        # uma thread do pymongo que não existe no processo filho
+        self._lock = threading.Lock()
+        with self._lock:
+            self._counts = dict.fromkeys(self.COUNTERS, 0)
+            self._close_reasons = {}
+            self._checkout_failure_reasons = {}
+            self._wait_total = 0.0
+            self._wait_max = 0.0
+
+    def _increment(self, counter):
+        with self._lock:
+            self._counts[counter] += 1
+
+    def pool_created(self, event):
+        self._increment("pools_created")
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        self._increment("pools_cleared")
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        self._increment("connections_created")
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        with self._lock:
+            self._counts["connections_closed"] += 1
+            reason = str(event.reason)
+            self._close_reasons[reason] = self._close_reasons.get(reason, 0) + 1
+
+    def connection_check_out_started(self, event):
+        pass
+
+    def connection_check_out_failed(self, event):
+        with self._lock:
+            self._counts["checkout_failures"] += 1
+            reason = str(event.reason)
+            self._checkout_failure_reasons[reason] = (
+                self._checkout_failure_reasons.get(reason, 0) + 1)
+
+    def connection_checked_out(self, event):
+        duration = getattr(event, "duration", 0.0) or 0.0
+        with self._lock:
+            self._counts["checkouts"] += 1
+            self._wait_total += duration
+            self._wait_max = max(self._wait_max, duration)
+
+    def connection_checked_in(self, event):
+        self._increment("checkins")
+
+    def snapshot(self):
+        with self._lock:
+            counts = dict(self._counts)
+            checkouts = counts["checkouts"]
+            return {
+                **counts,
+                "open_connections": counts["connections_created"] - counts["connections_closed"],
+                "in_use": checkouts - counts["checkins"],
+                "checkout_wait_avg_ms": self._wait_total / checkouts * 1000 if checkouts else 0.0,
+                "checkout_wait_max_ms": self._wait_max * 1000,
+                "close_reasons": dict(self._close_reasons),
+                "checkout_failure_reasons": dict(self._checkout_failure_reasons),
+            }
+
 
 class MongoDB:
-    _client = None
+    """
+    Gerencia o MongoClient do processo.
 
-    @classmethod
-    def connect(cls):
-        """Connect to MongoDB using environment variables."""
-        if cls._client is not None:
-            return cls._client
+    O cliente (e não só o Database) fica guardado para poder ser fechado em
+    `shutdown`. Com o gunicorn em modo preload, os workers herdam o cliente
+    criado no processo mestre; como recomenda o pymongo, `after_fork` fecha
+    esse cliente sem usá-lo e cria um novo no worker, ao qual o Database já
+    entregue às rotas passa a apontar. Um cliente herdado de outro processo
+    sem `after_fork` é descartado e substituído por um novo em `connect`.
+    """
 
-        load_dotenv()
+    _client = None
+    _database = None
+    _pid = None
+    _lock = threading.Lock()
+    metrics = PoolMetrics()
+
+    @staticmethod
+    def database_name():
+        return os.getenv("DB_MONGO_NAME", "api6_mongo")
 
+    @staticmethod
+    def url():
         mongo_user = os.getenv("DB_MONGO_USER", "mongo")
         mongo_password = os.getenv("DB_MONGO_PASS", "secret")
         mongo_host = os.getenv("DB_MONGO_HOST", "localhost")
         mongo_port = os.getenv("DB_MONGO_PORT", "27017")
-        mongo_db = os.getenv("DB_MONGO_NAME", "api6_mongo")
+        mongo_db = MongoDB.database_name()
 
-        mongo_url = f"mongodb://{mongo_user}:{mongo_password}@{mongo_host}:{mongo_port}/{mongo_db}?authSource=admin"
+        return f"mongodb://{mongo_user}:{mongo_password}@{mongo_host}:{mongo_port}/{mongo_db}?authSource=admin"
+
+    @classmethod
+    def client(cls):
+        """Retorna o MongoClient do processo, criando-o se necessário."""
+        if cls._client is not None and cls._pid == os.getpid():
+            return cls._client
 
-        cls._client = MongoClient(mongo_url)[mongo_db]
+        with cls._lock:
+            if cls._client is None or cls._pid != os.getpid():
+                # O cliente herdado no fork não é fechado aqui: suas conexões
+                # ainda pertencem ao processo pai
+                cls._client = cls._new_client()
+                cls._database = cls._client[cls.database_name()]
+                cls._pid = os.getpid()
         return cls._client
 
+    @classmethod
+    def _new_client(cls):
+        return MongoClient(
+            cls.url(),
+            connect=False,
+            event_listeners=[cls.metrics],
+            **client_options(),
+        )
+
+    @classmethod
+    def async_client(cls):
+        """
+        Cria um AsyncMongoClient com as mesmas opções e métricas do cliente
+        síncrono. Ele não é guardado aqui: pertence ao event loop que o usa
+        (ver api.asgi.server), e quem o cria deve fechá-lo com `await close()`.
+        """
+        return AsyncMongoClient(
+            cls.url(),
+            event_listeners=[cls.metrics],
+            **client_options(),
+        )
+
+    @classmethod
+    def connect(cls):
+        """Connect to MongoDB using environment variables."""
+        if cls._database is not None and cls._pid == os.getpid():
+            return cls._database
+        cls.client()
+        return cls._database
+
+    @classmethod
+    def get_database(cls, name=None):
+        if name is None:
+            return cls.connect()
+        return cls.client()[name]
+
     @classmethod
     def test(cls):
         """Test the connection to MongoDB."""
         db = cls.connect()
         db.command("ping")
 
+    @classmethod
+    def startup(cls):
+        """
+        Cria o cliente e valida a conexão. Com DB_MONGO_MIN_POOL_SIZE o pymongo
+        já abre as conexões mínimas em segundo plano a partir daqui.
+        """
+        db = cls.connect()
+        cls.test()
+        return db
+
+    @classmethod
+    def after_fork(cls):
+        """
+        Troca, no worker, o cliente herdado do processo mestre por um novo.
+        As contagens do pool recomeçam, já que `/metrics/mongo` descreve o
+        pool deste processo.
+
+        O cliente herdado é fechado sem ser usado: o pymongo já descartou no
+        filho o pool e as sessões dele, então o close não fala com o servidor
+        nem dispara o aviso de fork. O novo cliente não conecta aqui; o
+        aquecimento do worker (post_worker_init) abre o pool. O Database
+        entregue por `connect` antes do fork, guardado pelos modelos e rotas
+        da aplicação pré-carregada, passa a usar o cliente novo.
+        """
+        cls._lock = threading.Lock()
+        cls.metrics.reset()
+        inherited, database = cls._client, cls._database
+        cls._client = cls._database = cls._pid = None
+        if inherited is None:
+            return
+        inherited.close()
+
+        client = cls.client()
+        if database is not None:
+            # Database e Collection resolvem o cliente a cada operação
+            database._client = client
+            cls._database = database
+
+    @classmethod
+    def shutdown(cls):
+        """Fecha o cliente e esquece a conexão; `connect` cria outra depois."""
+        with cls._lock:
+            if cls._client is not None and cls._pid == os.getpid():
+                cls._client.close()
+            cls._client = None
+            cls._database = None
+            cls._pid = None
+
+    @classmethod
+    def pool_stats(cls):
+        stats = cls.metrics.snapshot()
+        client = cls._client if cls._pid == os.getpid() else None
+        stats["options"] = client_options()
+        stats["connected"] = client is not None
+        return stats
+
 # Uso:
 # from mongo import MongoDB
 # db = MongoDB.connect()
@@ -250,12 +497,9 @@ def create_user_acceptance_collection(db):
 
 
 def create_indexes(db):
+    """Cria os índices declarados em db.indexes.INDEXES que ainda não existem."""
     try:
-        db.species_collection.create_index(
-            [("scientific_name", ASCENDING)], unique=True
-        )
-        db.plots_collection.create_index([("area", ASCENDING)])
-        db.yield_collection.create_index([("production", ASCENDING)])
+        ensure_indexes(db)
         print("📌 Índices criados com sucesso!")
     except Exception as e:
         raise Exception(f"Erro ao criar índices: {e}") from e
@@ -265,6 +509,7 @@ def restart_collections(db):
     db.species_collection.drop()
     db.plots_collection.drop()
     db.yield_collection.drop()
+    drop_rollup(db)
     create_species_collection(db)
     create_plots_collection(db)
     create_yield_collection(db)
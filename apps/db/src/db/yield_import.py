@@ -0,0 +1,165 @@
+import argparse
+from collections import defaultdict
+
+from pymongo import InsertOne, UpdateOne
+
+from db.crop_yield import YIELD_COLUMNS, build_documents, load_crop_yield
+from db.data_version import bump_data_version
+from db.yield_rollup import build_rollup, rollup_exists
+
+NATURAL_KEY = ("crop", "crop_year", "season", "state")
+BATCH_SIZE = 1000
+
+# Caches derivados gravados pela API (api.cache.MongoCache e o catálogo de
+# filtros do dashboard, api.service.filter_catalog.CATALOG_ID)
+CACHE_COLLECTION = "api_cache"
+FILTER_CATALOG_ID = "dashboard_filters"
+
+
+def _year_key(value):
+    """
+    Ano como inteiro: documentos gravados pela API (YieldEvent) guardam
+    crop_year como string, os do seed e desta importação como inteiro
+    """
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return value
+
+
+def natural_key(document):
+    return tuple(
+        _year_key(document[field]) if field == "crop_year" else document[field]
+        for field in NATURAL_KEY
+    )
+
+
+def _group_by_key(documents):
+    groups = defaultdict(list)
+    for document in documents:
+        groups[natural_key(document)].append(document)
+    return groups
+
+
+def diff_yield(collection, documents):
+    """
+    Compara os documentos do arquivo com os já existentes em yield_collection.
+
+    A chave natural (crop, crop_year, season, state) não é única nos dados
+    (estados de origem diferentes foram mapeados para o mesmo estado), então
+    as linhas de uma mesma chave são pareadas pela ordem: a n-ésima linha do
+    arquivo corresponde ao n-ésimo documento gravado. Linhas sem par são
+    inserções; pares com valores diferentes viram atualizações por _id.
+
+    Documentos com crop_year em string (gravados pela API) pareiam com as
+    linhas do mesmo ano e recebem o ano inteiro na atualização.
+
+    Retorna (inserções, atualizações, quantidade de linhas inalteradas).
+    """
+    years = sorted({document["crop_year"] for document in documents})
+    existing = _group_by_key(collection.find(
+        {"crop_year": {"$in": years + [str(year) for year in years]}},
+        {field: 1 for field in YIELD_COLUMNS.values()}
+    ).sort("_id", 1))
+
+    inserts, updates, unchanged = [], [], 0
+    for key, rows in _group_by_key(documents).items():
+        current = existing.get(key, [])
+        for row, stored in zip(rows, current):
+            changes = {
+                field: value for field, value in row.items()
+                if stored.get(field) != value
+            }
+            if changes:
+                updates.append((stored["_id"], changes))
+            else:
+                unchanged += 1
+        inserts.extend(rows[len(current):])
+    return inserts, updates, unchanged
+
+
+def _write_batches(collection, operations, batch_size):
+    for i in range(0, len(operations), batch_size):
+        collection.bulk_write(operations[i:i + batch_size], ordered=False)
+
+
+def invalidate_derived_caches(db):
+    """Descarta os caches da API guardados no MongoDB e sinaliza as instâncias em execução"""
+    db[CACHE_COLLECTION].delete_many({})
+    db.metadata_collection.delete_one({"_id": FILTER_CATALOG_ID})
+    return bump_data_version(db)
+
+
+def import_yield(db, df, batch_size=BATCH_SIZE, dry_run=False):
+    """
+    Aplica um CSV de yield de forma incremental e idempotente: reexecutar o
+    mesmo arquivo não altera nada. Documentos que existem no banco mas não no
+    arquivo são mantidos.
+    """
+    species, _, documents = build_documents(df)
+    inserts, updates, unchanged = diff_yield(db.yield_collection, documents)
+    report = {
+        "inserted": len(inserts),
+        "updated": len(updates),
+        "unchanged": unchanged,
+        "species": 0,
+    }
+    if dry_run or not (inserts or updates):
+        return report
+
+    _write_batches(
+        db.yield_collection,
+        [InsertOne(document) for document in inserts] + [
+            UpdateOne({"_id": _id}, {"$set": changes}) for _id, changes in updates
+        ],
+        batch_size
+    )
+
+    if inserts:
+        db.plots_collection.insert_many(
+            [
+                {"area": document["area"], "state": document["state"], "country": "Brazil"}
+                for document in inserts
+            ],
+            ordered=False
+        )
+
+    result = db.species_collection.bulk_write(
+        [
+            UpdateOne(
+                {"scientific_name": sp["scientific_name"]},
+                {"$setOnInsert": sp},
+                upsert=True
+            )
+            for sp in species
+        ],
+        ordered=False
+    )
+    report["species"] = result.upserted_count
+
+    if rollup_exists(db):
+        build_rollup(db)
+    invalidate_derived_caches(db)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Importação incremental de um CSV de yield")
+    parser.add_argument("csv", help="arquivo no formato do crop_yield.csv")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--dry-run", action="store_true", help="apenas mostra o que seria alterado")
+    args = parser.parse_args()
+
+    from db.mongo import MongoDB
+    db = MongoDB.connect()
+
+    report = import_yield(db, load_crop_yield(args.csv), args.batch_size, args.dry_run)
+    prefix = "🔎 (dry-run) " if args.dry_run else "📥 "
+    print(
+        f"{prefix}inseridos: {report['inserted']}, atualizados: {report['updated']}, "
+        f"inalterados: {report['unchanged']}, novas espécies: {report['species']}"
+    )
+
+
+if __name__ == "__main__":
+    main()
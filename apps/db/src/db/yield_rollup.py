@@ -0,0 +1,127 @@
+import argparse
+from datetime import datetime, timezone
+
+from db.data_version import bump_data_version
+from db.indexes import YIELD_GROUP_FIELDS, YIELD_NUMERIC_FIELDS
+
+# Cubo com a menor granularidade usada pelo dashboard: uma célula por
+# (crop_year, season, crop, state), com a contagem e as somas numéricas
+ROLLUP_COLLECTION = "yield_rollup_collection"
+# Documento em metadata_collection que indica que o cubo foi construído
+ROLLUP_METADATA_ID = "yield_rollup"
+
+
+def cells_pipeline():
+    """Estágios que agrupam o yield por ano, estação, cultura e estado"""
+    return [
+        {"$group": {
+            "_id": {field: f"${field}" for field in YIELD_GROUP_FIELDS},
+            "count": {"$sum": 1},
+            **{field: {"$sum": f"${field}"} for field in YIELD_NUMERIC_FIELDS},
+        }},
+        {"$sort": {f"_id.{field}": 1 for field in YIELD_GROUP_FIELDS}},
+    ]
+
+
+def build_rollup(db):
+    """
+    Recria o cubo inteiro a partir de yield_collection. O $out substitui a
+    coleção de uma vez (mantendo seus índices), então leitores nunca veem um
+    cubo pela metade. Retorna a quantidade de células.
+    """
+    group = cells_pipeline()[0]
+    db.yield_collection.aggregate([
+        group,
+        # Dimensões também no nível de cima, para filtrar com a mesma query do yield
+        {"$addFields": {field: f"$_id.{field}" for field in YIELD_GROUP_FIELDS}},
+        {"$out": ROLLUP_COLLECTION},
+    ])
+    cells = db[ROLLUP_COLLECTION].count_documents({})
+    db.metadata_collection.replace_one(
+        {"_id": ROLLUP_METADATA_ID},
+        {"built_at": datetime.now(timezone.utc), "cells": cells},
+        upsert=True
+    )
+    return cells
+
+
+def rollup_exists(db):
+    return db.metadata_collection.find_one({"_id": ROLLUP_METADATA_ID}, {"_id": 1}) is not None
+
+
+def ensure_rollup(db):
+    """Constrói o cubo se ele ainda não existir"""
+    if not rollup_exists(db):
+        build_rollup(db)
+
+
+def drop_rollup(db):
+    db[ROLLUP_COLLECTION].drop()
+    db.metadata_collection.delete_one({"_id": ROLLUP_METADATA_ID})
+
+
+def cell_key(document):
+    return {field: document.get(field) for field in YIELD_GROUP_FIELDS}
+
+
+def _number(value):
+    # $sum ignora valores não numéricos; o incremento faz o mesmo
+    return value if isinstance(value, (int, float)) and not isinstance(value, bool) else 0
+
+
+def _increment_cell(rollup, document, sign):
+    key = cell_key(document)
+    rollup.update_one(
+        {"_id": key},
+        {
+            "$inc": {
+                "count": sign,
+                **{field: sign * _number(document.get(field)) for field in YIELD_NUMERIC_FIELDS},
+            },
+            "$setOnInsert": key,
+        },
+        upsert=True
+    )
+
+
+def apply_rollup_change(db, removed=None, added=None):
+    """
+    Aplica ao cubo uma escrita em yield_collection: `removed` é o documento
+    antes da alteração e `added` o documento gravado. Sem cubo construído,
+    nada é feito (ele será criado completo por build_rollup).
+    """
+    if not rollup_exists(db):
+        return
+
+    rollup = db[ROLLUP_COLLECTION]
+    if removed:
+        _increment_cell(rollup, removed, -1)
+        rollup.delete_one({"_id": cell_key(removed), "count": {"$lte": 0}})
+    if added:
+        _increment_cell(rollup, added, 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cubo de agregação do yield para o dashboard")
+    parser.add_argument(
+        "command",
+        choices=["build", "drop"],
+        help="build: recria o cubo a partir de yield_collection; drop: remove o cubo",
+    )
+    args = parser.parse_args()
+
+    from db.mongo import MongoDB
+    db = MongoDB.connect()
+
+    if args.command == "build":
+        cells = build_rollup(db)
+        print(f"🧊 Cubo recriado: {cells} células em {ROLLUP_COLLECTION}")
+    else:
+        drop_rollup(db)
+        print(f"🗑️ {ROLLUP_COLLECTION} removida")
+    # Instâncias da API descartam as respostas do dashboard em cache
+    bump_data_version(db)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+from unittest.mock import patch
+from mongomock import MongoClient
+import pytest
+from db.indexes import INDEXES, ensure_indexes, report_indexes
+
+
+@pytest.fixture
+def mock_mongo():
+    client = MongoClient()
+    return client['test_db']
+
+
+def test_ensure_indexes_creates_declared_indexes(mock_mongo):
+    created = ensure_indexes(mock_mongo)
+
+    for collection_name, indexes in INDEXES.items():
+        assert created[collection_name] == [index["name"] for index in indexes]
+        assert set(created[collection_name]) <= set(
+            mock_mongo[collection_name].index_information())
+
+
+def test_ensure_indexes_is_idempotent(mock_mongo):
+    ensure_indexes(mock_mongo)
+    created = ensure_indexes(mock_mongo)
+
+    assert all(names == [] for names in created.values())
+
+
+def test_ensure_indexes_keeps_equivalent_index_with_other_name(mock_mongo):
+    mock_mongo.yield_collection.create_index(
+        [("crop", 1), ("crop_year", 1)], name="legacy_crop_index")
+
+    created = ensure_indexes(mock_mongo, collections=["yield_collection"])
+
+    assert "crop_crop_year" not in created["yield_collection"]
+    assert list(created) == ["yield_collection"]
+
+
+# mongomock não implementa $indexStats nem explain
+@patch("db.indexes.explain_query", return_value=["FETCH", "COLLSCAN"])
+@patch("db.indexes._index_usage", return_value={"_id_": 0, "yield_1": 0, "production_1": 4})
+def test_report_indexes(_index_usage, _explain_query, mock_mongo):
+    mock_mongo.yield_collection.create_index([("production", 1)], name="production_1")
+    mock_mongo.yield_collection.create_index([("yield", 1)], name="yield_1")
+
+    report = report_indexes(mock_mongo)["yield_collection"]
+
+    assert "dashboard_filters_covering" in report["missing"]
+    assert "production_1" not in report["missing"]
+    assert report["undeclared"] == ["yield_1"]
+    assert report["unused"] == ["yield_1"]
+    assert len(report["collection_scans"]) > 0
@@ -0,0 +1,149 @@
+import os
+import warnings
+from types import SimpleNamespace
+from unittest.mock import patch
+import mongomock
+import pymongo
+import pytest
+from db.mongo import MongoDB, PoolMetrics, client_options
+
+
+class FakeClient(mongomock.MongoClient):
+    def __init__(self, url, **kwargs):
+        super().__init__()
+        self.options = kwargs
+        self.closed = 0
+
+    def close(self):
+        self.closed += 1
+
+
+@pytest.fixture(autouse=True)
+def reset_client(monkeypatch):
+    for variable in os.environ:
+        if variable.startswith("DB_MONGO_"):
+            monkeypatch.delenv(variable)
+    MongoDB.shutdown()
+    with patch("db.mongo.MongoClient", FakeClient):
+        yield
+    MongoDB.shutdown()
+
+
+def test_client_options_from_env(monkeypatch):
+    monkeypatch.setenv("DB_MONGO_MAX_POOL_SIZE", "50")
+    monkeypatch.setenv("DB_MONGO_MIN_POOL_SIZE", "5")
+    monkeypatch.setenv("DB_MONGO_MAX_IDLE_TIME_MS", "")
+    monkeypatch.setenv("DB_MONGO_COMPRESSORS", "zstd, snappy")
+
+    assert client_options() == {
+        "maxPoolSize": 50,
+        "minPoolSize": 5,
+        "compressors": "zstd,snappy",
+    }
+
+
+def test_connect_caches_client_and_database(monkeypatch):
+    monkeypatch.setenv("DB_MONGO_NAME", "other_db")
+    monkeypatch.setenv("DB_MONGO_MAX_POOL_SIZE", "10")
+
+    db = MongoDB.connect()
+
+    assert db.name == "other_db"
+    assert MongoDB.connect() is db
+    client = MongoDB.client()
+    assert client.options["maxPoolSize"] == 10
+    assert client.options["event_listeners"] == [MongoDB.metrics]
+
+
+def test_shutdown_closes_client():
+    MongoDB.connect()
+    client = MongoDB.client()
+
+    MongoDB.shutdown()
+
+    assert client.closed == 1
+    assert MongoDB.client() is not client
+
+
+def test_client_inherited_from_other_process_is_replaced():
+    db = MongoDB.connect()
+    inherited = MongoDB.client()
+    MongoDB._pid = os.getpid() + 1
+
+    assert MongoDB.connect() is not db
+    assert MongoDB.client() is not inherited
+    assert inherited.closed == 0
+
+
+def test_after_fork_replaces_inherited_client():
+    db = MongoDB.connect()
+    collection = db.yield_collection
+    inherited = MongoDB.client()
+    MongoDB.metrics.connection_created(SimpleNamespace())
+    MongoDB._pid = os.getpid() + 1
+
+    MongoDB.after_fork()
+
+    client = MongoDB.client()
+    assert client is not inherited
+    assert inherited.closed == 1 and client.closed == 0
+    # O Database já entregue às rotas segue para o cliente novo
+    assert MongoDB.connect() is db
+    assert db.client is client and collection.database.client is client
+    assert MongoDB.metrics.snapshot()["connections_created"] == 0
+
+
+def test_after_fork_without_client_does_nothing():
+    MongoDB.after_fork()
+
+    assert MongoDB._client is None
+
+
+def test_after_fork_in_a_real_child_process():
+    with patch("db.mongo.MongoClient", pymongo.MongoClient):
+        MongoDB.connect()
+    collection = MongoDB.connect().yield_collection
+    inherited = MongoDB.client()
+    read, write = os.pipe()
+
+    pid = os.fork()
+    if pid == 0:
+        try:
+            with warnings.catch_warnings(record=True) as caught:
+                warnings.simplefilter("always")
+                MongoDB.after_fork()
+                client = MongoDB.client()
+            ok = (
+                client is not inherited
+                and collection.database.client is client
+                and inherited._closed
+                and not caught
+            )
+            os.write(write, b"1" if ok else b"0")
+        finally:
+            os._exit(0)
+
+    os.waitpid(pid, 0)
+    assert os.read(read, 1) == b"1"
+    assert MongoDB.client() is inherited and not inherited._closed
+
+
+def test_pool_metrics_snapshot():
+    metrics = PoolMetrics()
+    event = SimpleNamespace(duration=0.002, reason="idle")
+
+    for _ in range(3):
+        metrics.connection_created(event)
+    metrics.connection_closed(event)
+    metrics.connection_checked_out(event)
+    metrics.connection_checked_out(SimpleNamespace(duration=0.004))
+    metrics.connection_checked_in(event)
+    metrics.connection_check_out_failed(SimpleNamespace(reason="timeout"))
+
+    stats = metrics.snapshot()
+    assert stats["open_connections"] == 2
+    assert stats["in_use"] == 1
+    assert stats["checkout_wait_avg_ms"] == pytest.approx(3.0)
+    assert stats["checkout_wait_max_ms"] == pytest.approx(4.0)
+    assert stats["close_reasons"] == {"idle": 1}
+    assert stats["checkout_failure_reasons"] == {"timeout": 1}
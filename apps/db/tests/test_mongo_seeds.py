@@ -0,0 +1,69 @@
+import importlib.util
+from pathlib import Path
+from mongomock import MongoClient
+import pandas as pd
+import pytest
+
+SEEDS_PATH = Path(__file__).resolve().parents[1] / "seeds" / "mongo_seeds.py"
+spec = importlib.util.spec_from_file_location("mongo_seeds", SEEDS_PATH)
+mongo_seeds = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(mongo_seeds)
+
+
+@pytest.fixture
+def mock_mongo():
+    client = MongoClient()
+    return client['test_db']
+
+
+@pytest.fixture
+def crop_yield(tmp_path):
+    path = tmp_path / "crop_yield.csv"
+    path.write_text(
+        "Crop,Crop_Year,Season,State,Area,Production,Annual_Rainfall,Fertilizer,Pesticide,Yield\n"
+        "Arecanut,1997,Whole Year ,Assam,73814,56708,2051.4,7024878.38,22882.34,0.796086957\n"
+        "Arhar/Tur,1997,Kharif     ,Assam,6637,4685,2051.4,631643.29,2057.47,0.710434783\n"
+        "Arecanut,1998,Rabi       ,Kerala,100,,2051.4,1.0,1.0,0.5\n"
+        "Rice,1999,Kharif     ,Punjab,200,300,900.5,10.0,2.0,1.5\n"
+    )
+    return mongo_seeds.load_crop_yield(path)
+
+
+def test_load_crop_yield_cleans_rows(crop_yield):
+    assert len(crop_yield) == 3
+    assert crop_yield["Season"].tolist() == ["Whole Year", "Spring", "Spring"]
+    assert crop_yield["State"].tolist() == ["Acre", "Acre", "Paraná"]
+
+
+def test_build_documents_matches_row_by_row_conversion(crop_yield):
+    species, plots, yields = mongo_seeds.build_documents(crop_yield)
+
+    assert species == [
+        {"scientific_name": sp, "common_name": sp}
+        for sp in ["Arecanut", "Arhar/Tur", "Rice"]
+    ]
+    assert plots[0] == {"area": 73814, "state": "Acre", "country": "Brazil"}
+    assert yields[0] == {
+        "crop": "Arecanut",
+        "crop_year": 1997,
+        "season": "Whole Year",
+        "state": "Acre",
+        "area": 73814,
+        "production": 56708.0,
+        "annual_rainfall": 2051.4,
+        "fertilizer": 7024878.38,
+        "pesticide": 22882.34,
+        "yield": 0.796086957,
+    }
+    assert type(yields[0]["crop_year"]) is int
+
+
+def test_seed_populate_inserts_in_batches(mock_mongo, crop_yield, capsys):
+    df = pd.concat([crop_yield] * 5, ignore_index=True)
+
+    mongo_seeds.seed_populate(mock_mongo, df, batch_size=4, workers=3)
+
+    assert mock_mongo.species_collection.count_documents({}) == 3
+    assert mock_mongo.plots_collection.count_documents({}) == 15
+    assert mock_mongo.yield_collection.count_documents({}) == 15
+    assert "yield_collection: 15/15" in capsys.readouterr().out
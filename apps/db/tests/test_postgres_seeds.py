@@ -0,0 +1,107 @@
+import importlib.util
+import sys
+from base64 import b64decode
+from datetime import datetime
+from pathlib import Path
+import bcrypt
+import pytest
+from cryptography.fernet import Fernet
+from sqlalchemy import BigInteger, create_engine, select
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import sessionmaker
+from db import keys, postgres
+
+SEEDS_PATH = Path(__file__).resolve().parents[1] / "seeds" / "postgres_seeds.py"
+spec = importlib.util.spec_from_file_location("postgres_seeds", SEEDS_PATH)
+postgres_seeds = importlib.util.module_from_spec(spec)
+# Registrado para que o pool de processos consiga serializar prepare_entity
+sys.modules["postgres_seeds"] = postgres_seeds
+spec.loader.exec_module(postgres_seeds)
+
+# Custo mínimo do bcrypt para o teste não levar segundos
+HASH_COST = 4
+
+
+@compiles(BigInteger, "sqlite")
+def bigint_as_integer(type_, compiler, **kw):
+    # No SQLite só INTEGER PRIMARY KEY gera IDs, como o BIGSERIAL do Postgres
+    return "INTEGER"
+
+
+def decrypt(key, value):
+    return Fernet(key).decrypt(b64decode(value)).decode()
+
+
+def make_user(index, disabled_since=None):
+    return {
+        "name": f"Usuário {index}",
+        "login": f"user{index}",
+        "email": f"user{index}@example.com",
+        "password": f"senha-{index}",
+        "version_terms_agreement": "v1.0",
+        "role_id": 1,
+        "disabled_since": disabled_since,
+    }
+
+
+@pytest.fixture
+def sessions():
+    postgres_engine = create_engine("sqlite://")
+    keys_engine = create_engine("sqlite://")
+    postgres.Base.metadata.create_all(postgres_engine)
+    keys.Base.metadata.create_all(keys_engine)
+
+    postgres_session = sessionmaker(bind=postgres_engine)()
+    keys_session = sessionmaker(bind=keys_engine)()
+    yield postgres_session, keys_session
+    postgres_session.close()
+    keys_session.close()
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_prepare_entities_hashes_and_encrypts(workers):
+    users = [make_user(i) for i in range(3)]
+
+    prepared = postgres_seeds.prepare_entities(
+        users, postgres_seeds.ENCRYPTED_USER_FIELDS, HASH_COST, workers)
+
+    assert len(prepared) == len(users)
+    for user, (row, key) in zip(users, prepared):
+        for field in ("name", "email", "version_terms_agreement"):
+            assert row[field] != user[field]
+            assert decrypt(key, row[field]) == user[field]
+
+        password_hash = decrypt(key, row["password"]).encode()
+        assert password_hash.startswith(b"$2b$04$")
+        assert bcrypt.checkpw(user["password"].encode(), password_hash)
+
+        assert row["login"] == user["login"]
+        assert row["role_id"] == user["role_id"]
+
+    assert len({key for _, key in prepared}) == len(users)
+
+
+def test_bulk_insert_pairs_each_key_with_its_user(sessions):
+    postgres_session, keys_session = sessions
+    disabled = datetime(2024, 5, 1)
+    users = [make_user(i, disabled if i % 3 == 0 else None) for i in range(7)]
+    prepared = postgres_seeds.prepare_entities(
+        users, postgres_seeds.ENCRYPTED_USER_FIELDS, HASH_COST, workers=1)
+
+    # Lotes menores que o total: os IDs de cada lote vêm do RETURNING
+    ids = postgres_seeds.bulk_insert_entities(
+        postgres_session, keys_session, postgres.User, prepared, entity_type=1, batch_size=3)
+
+    assert len(ids) == len(set(ids)) == len(users)
+    stored_keys = dict(keys_session.execute(
+        select(keys.EntityKey.entity_id, keys.EntityKey.key)
+        .where(keys.EntityKey.entity_type == 1)).all())
+    assert sorted(stored_keys) == sorted(ids)
+
+    for user_id, user in zip(ids, users):
+        row = postgres_session.get(postgres.User, user_id)
+        key = stored_keys[user_id]
+        assert row.login == user["login"]
+        assert decrypt(key, row.name) == user["name"]
+        assert decrypt(key, row.email) == user["email"]
+        assert row.disabled_since == user["disabled_since"]
@@ -0,0 +1,126 @@
+import mongomock.collection
+from mongomock import MongoClient
+import pandas as pd
+import pytest
+from db.crop_yield import build_documents
+from db.data_version import get_data_version
+from db.yield_import import import_yield
+from db.yield_rollup import ROLLUP_COLLECTION, build_rollup
+
+COLUMNS = [
+    "Crop", "Crop_Year", "Season", "State", "Area", "Production",
+    "Annual_Rainfall", "Fertilizer", "Pesticide", "Yield",
+]
+
+
+@pytest.fixture(autouse=True)
+def bulk_update_compat(monkeypatch):
+    # pymongo >= 4.11 passes `sort` to bulk updates, which mongomock 4.3 rejects
+    add_update = mongomock.collection.BulkOperationBuilder.add_update
+
+    def compat(self, *args, sort=None, **kwargs):
+        return add_update(self, *args, **kwargs)
+
+    monkeypatch.setattr(mongomock.collection.BulkOperationBuilder, "add_update", compat)
+
+
+@pytest.fixture
+def mock_mongo():
+    client = MongoClient()
+    return client['test_db']
+
+
+def make_df(rows):
+    return pd.DataFrame(rows, columns=COLUMNS)
+
+
+@pytest.fixture
+def base_rows():
+    return [
+        ["Rice", 2000, "Spring", "Acre", 10.0, 100, 800.0, 1.0, 1.0, 0.5],
+        # Mesma chave natural duas vezes, como no crop_yield.csv
+        ["Rice", 2000, "Spring", "Maranhão", 20.0, 200, 800.0, 1.0, 1.0, 0.5],
+        ["Rice", 2000, "Spring", "Maranhão", 30.0, 300, 800.0, 1.0, 1.0, 0.5],
+        ["Wheat", 2001, "Autumn", "Acre", 40.0, 400, 700.0, 2.0, 2.0, 1.5],
+    ]
+
+
+@pytest.fixture
+def seeded(mock_mongo, base_rows):
+    species, plots, yields = build_documents(make_df(base_rows))
+    mock_mongo.species_collection.insert_many(species)
+    mock_mongo.plots_collection.insert_many(plots)
+    mock_mongo.yield_collection.insert_many(yields)
+    return mock_mongo
+
+
+def test_reimporting_same_file_changes_nothing(seeded, base_rows):
+    report = import_yield(seeded, make_df(base_rows))
+
+    assert report == {"inserted": 0, "updated": 0, "unchanged": 4, "species": 0}
+    assert get_data_version(seeded) == 0
+
+
+def test_import_applies_only_inserts_and_updates(seeded, base_rows):
+    seeded.api_cache.insert_one({"_id": "dashboard:key", "value": b""})
+    seeded.metadata_collection.insert_one({"_id": "dashboard_filters", "crops": ["Rice"]})
+
+    rows = [list(row) for row in base_rows]
+    rows[2][5] = 333
+    rows.append(["Rice", 2000, "Spring", "Maranhão", 50.0, 500, 800.0, 1.0, 1.0, 0.5])
+    rows.append(["Maize", 2002, "Spring", "Bahia", 60.0, 600, 600.0, 3.0, 3.0, 2.5])
+
+    report = import_yield(seeded, make_df(rows), batch_size=1)
+
+    assert report == {"inserted": 2, "updated": 1, "unchanged": 3, "species": 1}
+    assert seeded.yield_collection.count_documents({}) == 6
+    assert sorted(
+        doc["production"]
+        for doc in seeded.yield_collection.find({"state": "Maranhão"})
+    ) == [200, 333, 500]
+    assert seeded.plots_collection.count_documents({}) == 6
+    assert seeded.species_collection.count_documents({}) == 3
+
+    assert seeded.api_cache.count_documents({}) == 0
+    assert seeded.metadata_collection.find_one({"_id": "dashboard_filters"}) is None
+    assert get_data_version(seeded) == 1
+
+    assert import_yield(seeded, make_df(rows))["unchanged"] == 6
+
+
+def test_import_matches_documents_written_by_the_api(seeded, base_rows):
+    # YieldEvent grava crop_year como string
+    seeded.yield_collection.update_many({"crop": "Wheat"}, {"$set": {"crop_year": "2001"}})
+
+    report = import_yield(seeded, make_df(base_rows))
+
+    assert report["inserted"] == 0 and report["updated"] == 1
+    assert seeded.yield_collection.count_documents({"crop": "Wheat"}) == 1
+    assert seeded.yield_collection.find_one({"crop": "Wheat"})["crop_year"] == 2001
+
+
+def test_dry_run_does_not_write(seeded, base_rows):
+    rows = base_rows + [["Maize", 2002, "Spring", "Bahia", 60.0, 600, 600.0, 3.0, 3.0, 2.5]]
+
+    report = import_yield(seeded, make_df(rows), dry_run=True)
+
+    assert report["inserted"] == 1
+    assert seeded.yield_collection.count_documents({}) == 4
+
+
+def test_import_rebuilds_existing_rollup(seeded, base_rows):
+    assert build_rollup(seeded) == 3
+
+    rows = base_rows + [["Maize", 2002, "Winter", "Acre", 5.0, 50, 600.0, 0.5, 0.5, 10.0]]
+    import_yield(seeded, make_df(rows))
+
+    cells = {
+        (cell["crop"], cell["state"]): (cell["count"], cell["production"])
+        for cell in seeded[ROLLUP_COLLECTION].find()
+    }
+    assert cells == {
+        ("Rice", "Acre"): (1, 100),
+        ("Rice", "Maranhão"): (2, 500),
+        ("Wheat", "Acre"): (1, 400),
+        ("Maize", "Acre"): (1, 50),
+    }
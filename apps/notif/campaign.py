@@ -0,0 +1,221 @@
+import json
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+PENDING = "pending"
+CLAIMED = "claimed"
+SENT = "sent"
+FAILED = "failed"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS campaigns (
+    id TEXT PRIMARY KEY,
+    template TEXT NOT NULL,
+    filters TEXT,
+    created_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS recipients (
+    campaign_id TEXT NOT NULL REFERENCES campaigns(id),
+    user_id INTEGER NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    updated_at TEXT,
+    PRIMARY KEY (campaign_id, user_id)
+);
+CREATE INDEX IF NOT EXISTS recipients_status ON recipients (campaign_id, status);
+"""
+
+
+def now():
+    return datetime.now().isoformat(timespec="seconds")
+
+
+class CampaignQueue:
+    """
+    Fila persistente de destinatários de campanhas em um arquivo SQLite.
+
+    Guarda apenas o ID de cada usuário e o estado do envio (nada dos dados
+    criptografados). Os itens são reservados (`claim`) e marcados em lotes;
+    várias execuções podem consumir a mesma campanha, pois a reserva é
+    atômica. Quem está enviando renova as próprias reservas (`refresh`);
+    itens reservados por uma execução que caiu deixam de ser renovados e
+    voltam para a fila com `release_claimed` depois de um tempo, então no
+    máximo o lote que estava em andamento pode ser reenviado.
+    Os filtros usados na criação ficam gravados com a campanha, para que a
+    retomada busque os usuários com os mesmos critérios.
+    """
+
+    def __init__(self, path):
+        self.connection = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.executescript(SCHEMA)
+        self._migrate()
+        self._lock = threading.Lock()
+
+    def _migrate(self):
+        # Arquivos criados antes da coluna de filtros
+        columns = {row[1] for row in self.connection.execute("PRAGMA table_info(campaigns)")}
+        if "filters" not in columns:
+            self.connection.execute("ALTER TABLE campaigns ADD COLUMN filters TEXT")
+
+    def close(self):
+        self.connection.close()
+
+    def _transaction(self, statements):
+        with self._lock:
+            cursor = self.connection.cursor()
+            cursor.execute("BEGIN IMMEDIATE")
+            try:
+                result = statements(cursor)
+                cursor.execute("COMMIT")
+                return result
+            except Exception:
+                cursor.execute("ROLLBACK")
+                raise
+
+    def exists(self, campaign_id):
+        row = self.connection.execute(
+            "SELECT 1 FROM campaigns WHERE id = ?", (campaign_id,)).fetchone()
+        return row is not None
+
+    def template(self, campaign_id):
+        row = self.connection.execute(
+            "SELECT template FROM campaigns WHERE id = ?", (campaign_id,)).fetchone()
+        return row[0] if row else None
+
+    def filters(self, campaign_id):
+        """Filtros gravados na criação; None para campanhas sem filtros gravados"""
+        row = self.connection.execute(
+            "SELECT filters FROM campaigns WHERE id = ?", (campaign_id,)).fetchone()
+        return json.loads(row[0]) if row and row[0] is not None else None
+
+    def create(self, campaign_id, template, user_ids, filters=None):
+        """Materializa a lista de destinatários; IDs repetidos são ignorados"""
+        def statements(cursor):
+            cursor.execute(
+                "INSERT INTO campaigns (id, template, filters, created_at) VALUES (?, ?, ?, ?)",
+                (campaign_id, template, json.dumps(filters or {}), now()))
+            cursor.executemany(
+                "INSERT OR IGNORE INTO recipients (campaign_id, user_id) VALUES (?, ?)",
+                ((campaign_id, user_id) for user_id in user_ids))
+        self._transaction(statements)
+
+    def claim(self, campaign_id, limit):
+        """Reserva até `limit` destinatários pendentes e retorna seus IDs"""
+        def statements(cursor):
+            cursor.execute(
+                f"""UPDATE recipients
+                    SET status = '{CLAIMED}', attempts = attempts + 1, updated_at = ?
+                    WHERE campaign_id = ? AND user_id IN (
+                        SELECT user_id FROM recipients
+                        WHERE campaign_id = ? AND status = '{PENDING}'
+                        ORDER BY user_id LIMIT ?
+                    )
+                    RETURNING user_id""",
+                (now(), campaign_id, campaign_id, limit))
+            return sorted(row[0] for row in cursor.fetchall())
+        return self._transaction(statements)
+
+    def refresh(self, campaign_id, user_ids):
+        """Renova a reserva dos itens ainda em envio por esta execução"""
+        def statements(cursor):
+            cursor.executemany(
+                f"UPDATE recipients SET updated_at = ? "
+                f"WHERE campaign_id = ? AND user_id = ? AND status = '{CLAIMED}'",
+                ((now(), campaign_id, user_id) for user_id in user_ids))
+        self._transaction(statements)
+
+    def mark(self, campaign_id, results):
+        """`results` é um iterável de (user_id, enviado, erro)"""
+        def statements(cursor):
+            cursor.executemany(
+                "UPDATE recipients SET status = ?, error = ?, updated_at = ? "
+                "WHERE campaign_id = ? AND user_id = ?",
+                (
+                    (SENT if sent else FAILED, error, now(), campaign_id, user_id)
+                    for user_id, sent, error in results
+                ))
+        self._transaction(statements)
+
+    def release_claimed(self, campaign_id, older_than=0):
+        """
+        Devolve à fila os itens cuja reserva não é renovada há mais de
+        `older_than` segundos, ou seja, de uma execução que foi interrompida
+        """
+        cutoff = datetime.fromtimestamp(time.time() - older_than).isoformat(timespec="seconds")
+        return self._requeue(campaign_id, CLAIMED, cutoff)
+
+    def retry_failed(self, campaign_id):
+        return self._requeue(campaign_id, FAILED)
+
+    def _requeue(self, campaign_id, status, cutoff=None):
+        def statements(cursor):
+            cursor.execute(
+                "UPDATE recipients SET status = ?, updated_at = ? "
+                "WHERE campaign_id = ? AND status = ? AND (? IS NULL OR updated_at <= ?)",
+                (PENDING, now(), campaign_id, status, cutoff, cutoff))
+            return cursor.rowcount
+        return self._transaction(statements)
+
+    def progress(self, campaign_id):
+        counts = {PENDING: 0, CLAIMED: 0, SENT: 0, FAILED: 0}
+        for status, count in self.connection.execute(
+            "SELECT status, COUNT(*) FROM recipients WHERE campaign_id = ? GROUP BY status",
+            (campaign_id,)
+        ):
+            counts[status] = count
+        counts["total"] = sum(counts.values())
+        return counts
+
+
+def run_campaign(queue, campaign_id, fetch_users, send_batch, batch_size=500, refresh_every=60):
+    """
+    Consome a campanha em lotes: reserva IDs, busca e descriptografa os
+    usuários (`fetch_users(ids)`), envia (`send_batch(users, on_outcome)`,
+    que retorna os Outcome) e marca o resultado, imprimindo o progresso a
+    cada lote. Usuários reservados que não existem mais são marcados como falha.
+
+    Enquanto o lote é enviado, a reserva dos itens é renovada a cada
+    `refresh_every` segundos (no máximo), então um lote lento (ex.: com
+    --rate baixo) não é devolvido à fila por uma retomada concorrente;
+    `refresh_every` deve ser bem menor que o `stale_after` da retomada.
+    """
+    start = time.perf_counter()
+    sent = 0
+    while True:
+        user_ids = queue.claim(campaign_id, batch_size)
+        if not user_ids:
+            break
+
+        users = fetch_users(user_ids)
+        refreshed_at = time.monotonic()
+        queue.refresh(campaign_id, user_ids)
+
+        def on_outcome(outcome):
+            nonlocal refreshed_at
+            if time.monotonic() - refreshed_at >= refresh_every:
+                refreshed_at = time.monotonic()
+                queue.refresh(campaign_id, user_ids)
+
+        outcomes = send_batch(users, on_outcome) if users else []
+        results = [(outcome.user_id, outcome.sent, outcome.error) for outcome in outcomes]
+
+        found = {user['id'] for user in users}
+        results.extend(
+            (user_id, False, "Usuário não encontrado ou fora dos filtros")
+            for user_id in user_ids if user_id not in found
+        )
+        queue.mark(campaign_id, results)
+
+        sent += sum(1 for outcome in outcomes if outcome.sent)
+        progress = queue.progress(campaign_id)
+        elapsed = time.perf_counter() - start
+        print(
+            f"Campanha {campaign_id}: {progress[SENT]}/{progress['total']} enviados, "
+            f"{progress[FAILED]} falhas, {progress[PENDING]} pendentes "
+            f"({sent / elapsed if elapsed else 0:.1f} e-mails/s)"
+        )
+    return queue.progress(campaign_id)
@@ -0,0 +1,200 @@
+import queue
+import random
+import smtplib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+
+class SMTPPool:
+    """
+    Pool de conexões SMTP já autenticadas (STARTTLS + login feitos uma vez
+    por conexão). As conexões são abertas sob demanda até `size`; uma
+    conexão que falhou é descartada em vez de devolvida ao pool.
+    """
+
+    def __init__(self, smtp_config, size=4):
+        self.smtp_config = smtp_config
+        self.size = size
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+
+    def _connect(self):
+        config = self.smtp_config
+        server = smtplib.SMTP(config['host'], config['port'], timeout=config.get('timeout', 30))
+        try:
+            if config.get('starttls', True):
+                server.starttls()
+            if config.get('user'):
+                server.login(config['user'], config['password'])
+        except Exception:
+            server.close()
+            raise
+        return server
+
+    def acquire(self):
+        self._slots.acquire()
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        try:
+            return self._connect()
+        except Exception:
+            self._slots.release()
+            raise
+
+    def release(self, server, broken=False):
+        if broken:
+            try:
+                server.close()
+            except Exception:
+                pass
+        else:
+            self._idle.put(server)
+        self._slots.release()
+
+    def close(self):
+        while True:
+            try:
+                server = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            try:
+                server.quit()
+            except Exception:
+                server.close()
+
+
+REFUSALS = (
+    smtplib.SMTPRecipientsRefused,
+    smtplib.SMTPSenderRefused,
+    smtplib.SMTPDataError,
+)
+
+
+def is_transient(error):
+    """Falhas de conexão e respostas 4xx do servidor podem ser tentadas novamente"""
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return all(400 <= code < 500 for code, _ in error.recipients.values())
+    if isinstance(error, smtplib.SMTPResponseException):
+        return 400 <= error.smtp_code < 500
+    return isinstance(error, (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError, OSError))
+
+
+class RateLimiter:
+    """Espaça as chamadas de `wait` para no máximo `rate` por segundo, entre threads"""
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate
+        self._next = time.monotonic()
+        self._lock = threading.Lock()
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            scheduled = max(self._next, now)
+            self._next = scheduled + self.interval
+        if scheduled > now:
+            time.sleep(scheduled - now)
+
+
+@dataclass
+class Outcome:
+    user_id: Optional[int]
+    email: str
+    sent: bool
+    attempts: int
+    error: Optional[str] = None
+
+
+@dataclass
+class DeliveryReport:
+    outcomes: List[Outcome] = field(default_factory=list)
+    elapsed: float = 0.0
+
+    @property
+    def sent(self):
+        return sum(1 for outcome in self.outcomes if outcome.sent)
+
+    @property
+    def failed(self):
+        return len(self.outcomes) - self.sent
+
+    @property
+    def throughput(self):
+        return self.sent / self.elapsed if self.elapsed else 0.0
+
+    def summary(self):
+        return (
+            f"{self.sent} enviados, {self.failed} falhas em {self.elapsed:.1f}s "
+            f"({self.throughput:.1f} e-mails/s)"
+        )
+
+
+class Delivery:
+    """
+    Envia mensagens com concorrência limitada usando um SMTPPool, repetindo
+    falhas transitórias com backoff exponencial (e jitter) e, opcionalmente,
+    limitando a taxa de envio a `rate` e-mails por segundo.
+    As conexões do pool são mantidas entre chamadas de send_all até `close`.
+    """
+
+    def __init__(self, smtp_config, concurrency=4, retries=3, backoff=1.0, rate=None):
+        self.pool = SMTPPool(smtp_config, concurrency)
+        self.concurrency = concurrency
+        self.retries = retries
+        self.backoff = backoff
+        self.limiter = RateLimiter(rate) if rate else None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self.pool.close()
+
+    def send(self, from_addr, to_addr, message, user_id=None):
+        attempts = 0
+        while True:
+            attempts += 1
+            server = None
+            try:
+                if self.limiter is not None:
+                    self.limiter.wait()
+                server = self.pool.acquire()
+                server.sendmail(from_addr, to_addr, message)
+                self.pool.release(server)
+                return Outcome(user_id, to_addr, True, attempts)
+            except Exception as e:
+                if server is not None:
+                    # Recusas do servidor deixam a sessão utilizável (sendmail
+                    # faz RSET); em outros erros o estado da conexão é incerto
+                    self.pool.release(server, broken=not isinstance(e, REFUSALS))
+                if not is_transient(e) or attempts > self.retries:
+                    return Outcome(user_id, to_addr, False, attempts, str(e))
+                time.sleep(self.backoff * 2 ** (attempts - 1) * random.uniform(0.5, 1.5))
+
+    def send_all(self, messages, on_outcome=None):
+        """
+        `messages` é um iterável de (user_id, from, to, mensagem). Retorna um
+        DeliveryReport com o resultado de cada destinatário, na ordem de entrada.
+        """
+        report = DeliveryReport()
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            futures = [
+                executor.submit(self.send, from_addr, to_addr, message, user_id)
+                for user_id, from_addr, to_addr, message in messages
+            ]
+            for future in futures:
+                outcome = future.result()
+                report.outcomes.append(outcome)
+                if on_outcome is not None:
+                    on_outcome(outcome)
+        report.elapsed = time.perf_counter() - start
+        return report
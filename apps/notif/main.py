@@ -1,13 +1,22 @@
+import argparse
 from base64 import b64decode
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from itertools import islice
 import yaml
-from jinja2 import Template
 from cryptography.fernet import Fernet
 
-from db.keys import Session as KeysSession, UserKey
+from db.keys import Session as KeysSession, EntityKey, EntityType
 from db.postgres import Session, User
+from campaign import CampaignQueue, run_campaign
+from delivery import Delivery, Outcome
+from messages import DEFAULT_TEMPLATE, load_templates
+
+CHUNK_SIZE = 1000
+DECRYPT_WORKERS = 4
+
+UserRow = namedtuple('UserRow', 'id name email login role_id disabled_since')
 
 def decrypt(cipher_text: str, key:bytes):
     try:
@@ -17,133 +26,269 @@ def decrypt(cipher_text: str, key:bytes):
         print(f"Erro ao descriptografar: {e}")
         return None
 
-def get_user_keys(user_ids):
-    session = KeysSession()
-    try:
-        keys = session.query(UserKey).filter(UserKey.id.in_(user_ids)).all()
-        return {key.id: key.key for key in keys}
-    finally:
-        session.close()
+def get_user_keys(keys_session, user_ids):
+    keys = (
+        keys_session.query(EntityKey.entity_id, EntityKey.key)
+        .join(EntityType, EntityType.id == EntityKey.entity_type)
+        .filter(EntityType.name == "user", EntityKey.entity_id.in_(user_ids))
+        .all()
+    )
+    return {entity_id: key for entity_id, key in keys}
 
 def load_config():
     with open('apps/notif/config.yaml', 'r') as f:
         return yaml.safe_load(f)
 
-def filter_users(session, filters):
-    query = session.query(User)
-    users = query.all()
-
-    if not users:
-        return []
-
-    user_ids = [user.id for user in users]
-    user_keys = get_user_keys(user_ids)
-
-    decrypted_users = []
-
-    for user in users:
-        key = user_keys.get(user.id)
-        if not key:
-            print(f"Chave não encontrada para o usuário ID {user.id}, pulando...")
-            continue
-
-        try:
-            decrypted_users.append({
-                'id': user.id,
-                'name': decrypt(user.name, key),
-                'email': decrypt(user.email, key),
-                'login': user.login,
-                'role_id': user.role_id,
-                'disabled_since': user.disabled_since
-            })
-        except Exception as e:
-            print(f"Erro ao descriptografar dados do usuário ID {user.id}: {e}")
-            continue
-
-    filtered_users = []
-    for user in decrypted_users:
-        skip = False
-
-        if 'role_id' in filters and filters['role_id'] is not None:
-            if user['role_id'] != filters['role_id']:
-                skip = True
-
-        if 'disabled' in filters:
-            if filters['disabled'] and user['disabled_since'] is None:
-                skip = True
-            elif not filters['disabled'] and user['disabled_since'] is not None:
-                skip = True
-
-        if 'email_domain' in filters and filters['email_domain']:
-            if not user['email'].endswith(filters['email_domain']):
-                skip = True
-
-        if 'user_id' in filters and filters['user_id']:
-            if isinstance(filters['user_id'], list):
-                if user['id'] not in filters['user_id']:
-                    skip = True
-            elif user['id'] != filters['user_id']:
-                skip = True
-
-        if 'login-conteins' in filters and filters['login-conteins']:
-            if filters['login-conteins'].lower() not in user['login'].lower():
-                skip = True
-
-        if 'name-conteins' in filters and filters['name-conteins']:
-            if filters['name-conteins'].lower() not in user['name'].lower():
-                skip = True
-
-        if not skip:
-            filtered_users.append(user)
-
-    return filtered_users
-
-def send_email(smtp_config, email_config, user):
+def get_filter(filters, name):
+    # Aceita tanto "login_conteins" (config.yaml) quanto "login-conteins"
+    value = filters.get(name)
+    if value is None:
+        value = filters.get(name.replace('_', '-'))
+    return value
+
+def build_user_query(session, filters):
+    """Aplica no SQL os filtros sobre colunas em texto puro"""
+    query = session.query(
+        User.id,
+        User.name,
+        User.email,
+        User.login,
+        User.role_id,
+        User.disabled_since,
+    )
+
+    if filters.get('role_id') is not None:
+        query = query.filter(User.role_id == filters['role_id'])
+
+    # Como antes: a chave presente sem valor (disabled: ) seleciona os ativos
+    if 'disabled' in filters:
+        if filters['disabled']:
+            query = query.filter(User.disabled_since.isnot(None))
+        else:
+            query = query.filter(User.disabled_since.is_(None))
+
+    user_id = filters.get('user_id')
+    if user_id:
+        if isinstance(user_id, list):
+            query = query.filter(User.id.in_(user_id))
+        else:
+            query = query.filter(User.id == user_id)
+
+    login_contains = get_filter(filters, 'login_conteins')
+    if login_contains:
+        query = query.filter(User.login.icontains(login_contains, autoescape=True))
+
+    return query.order_by(User.id)
+
+def decrypt_user(row, key, email_domain=None, name_contains=None):
+    """
+    Descriptografa um usuário e aplica os filtros que dependem dos campos
+    criptografados. O e-mail é verificado antes de descriptografar o nome.
+    """
+    email = decrypt(row.email, key)
+    if email is None:
+        return None
+    if email_domain and not email.endswith(email_domain):
+        return None
+
+    name = decrypt(row.name, key)
+    if name is None:
+        return None
+    if name_contains and name_contains.lower() not in name.lower():
+        return None
+
+    return {
+        'id': row.id,
+        'name': name,
+        'email': email,
+        'login': row.login,
+        'role_id': row.role_id,
+        'disabled_since': row.disabled_since
+    }
+
+def decrypt_chunk(rows, email_domain=None, name_contains=None):
+    """Executado nos workers: recebe (linha, chave) e devolve os usuários que passaram"""
+    users = []
+    for row, key in rows:
+        user = decrypt_user(row, key, email_domain, name_contains)
+        if user is not None:
+            users.append(user)
+    return users
+
+def iter_chunks(iterable, size):
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+def filter_users(session, filters, chunk_size=CHUNK_SIZE, workers=DECRYPT_WORKERS):
+    """
+    Pipeline de filtragem: os filtros sobre colunas em texto puro (role_id,
+    disabled_since, id, login) vão para o SQL; os usuários restantes são lidos
+    em blocos com yield_per, as chaves são buscadas por bloco e apenas esses
+    usuários são descriptografados, em paralelo, para os filtros de e-mail e nome.
+    """
+    email_domain = filters.get('email_domain')
+    name_contains = get_filter(filters, 'name_conteins')
+
+    query = build_user_query(session, filters).yield_per(chunk_size)
+    keys_session = KeysSession()
+    executor = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
     try:
-        msg = MIMEMultipart()
-        msg['From'] = email_config['from']
-        msg['To'] = user['email']
-        msg['Subject'] = email_config['subject']
+        pending = []
+        for chunk in iter_chunks(query, chunk_size):
+            user_keys = get_user_keys(keys_session, [row.id for row in chunk])
 
-        body_template = Template(email_config['body'])
-        body = body_template.render(name=user['name'])
+            rows = []
+            for row in chunk:
+                key = user_keys.get(row.id)
+                if not key:
+                    print(f"Chave não encontrada para o usuário ID {row.id}, pulando...")
+                    continue
+                # Tupla simples para poder ser enviada aos workers
+                rows.append((UserRow(*row), key))
 
-        msg.attach(MIMEText(body, 'plain'))
+            if executor is None:
+                pending.append(decrypt_chunk(rows, email_domain, name_contains))
+            else:
+                pending.append(executor.submit(decrypt_chunk, rows, email_domain, name_contains))
 
-        with smtplib.SMTP(smtp_config['host'], smtp_config['port']) as server:
-            server.starttls()
-            server.login(smtp_config['user'], smtp_config['password'])
-            server.sendmail(email_config['from'], user['email'], msg.as_string())
+        filtered_users = []
+        for result in pending:
+            filtered_users.extend(result if executor is None else result.result())
+        return filtered_users
+    finally:
+        if executor is not None:
+            executor.shutdown()
+        keys_session.close()
 
-        print(f"Email enviado para {user['email']}")
-    except Exception as e:
-        print(f"Erro ao enviar email para {user['email']}: {e}")
+def print_outcome(outcome):
+    if outcome.sent:
+        print(f"Email enviado para {outcome.email}")
+    else:
+        print(f"Erro ao enviar email para {outcome.email} "
+              f"após {outcome.attempts} tentativa(s): {outcome.error}")
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Envio de notificações por e-mail")
+    parser.add_argument(
+        "--campaign",
+        help="nome da campanha; se já existir, retoma o envio de onde parou")
+    parser.add_argument(
+        "--retry-failed", action="store_true",
+        help="ao retomar, tenta novamente os destinatários que falharam")
+    parser.add_argument(
+        "--status", action="store_true",
+        help="apenas mostra o progresso da campanha")
+    parser.add_argument("--rate", type=float, help="limite de e-mails por segundo")
+    return parser.parse_args()
 
 def main():
+    args = parse_args()
     config = load_config()
-    filters = config.get('filters', {})
+    filters = config.get('filters') or {}
+    decrypt_config = config.get('decrypt') or {}
+    delivery_config = config.get('delivery') or {}
+    campaign_config = config.get('campaign') or {}
     email_config = config['email']
     smtp_config = config['smtp']
 
+    chunk_size = decrypt_config.get('chunk_size', CHUNK_SIZE)
+    workers = decrypt_config.get('workers', DECRYPT_WORKERS)
+
+    queue = CampaignQueue(campaign_config.get('db_path', 'apps/notif/campaigns.sqlite3'))
+    campaign_id = args.campaign or datetime.now().strftime("campanha-%Y%m%d-%H%M%S")
+    if args.status:
+        print(f"Campanha {campaign_id}: {queue.progress(campaign_id)}")
+        queue.close()
+        return
+
+    # Compilados uma vez por execução; um nome inválido falha antes de consultar o banco
+    templates = load_templates(email_config, config.get('templates'))
+    template_name = queue.template(campaign_id) or email_config.get('template', DEFAULT_TEMPLATE)
+    if template_name not in templates:
+        raise KeyError(f"Template de e-mail '{template_name}' não definido")
+    template = templates[template_name]
+
     session = Session()
     try:
-        users = filter_users(session, filters)
+        # Usuários já descriptografados ao criar a campanha nesta execução
+        known_users = {}
+
+        stale_after = campaign_config.get('stale_after', 300)
+
+        if queue.exists(campaign_id):
+            # Campanhas antigas não gravaram os filtros: usa os do config.yaml
+            stored_filters = queue.filters(campaign_id)
+            if stored_filters is not None:
+                filters = stored_filters
+            released = queue.release_claimed(campaign_id, stale_after)
+            retried = queue.retry_failed(campaign_id) if args.retry_failed else 0
+            print(f"Retomando campanha {campaign_id} "
+                  f"({released} reservas interrompidas e {retried} falhas devolvidas à fila).")
+        else:
+            users = filter_users(session, filters, chunk_size, workers)
+
+            if not users:
+                print("Nenhum usuário encontrado com os filtros aplicados.")
+                return
+
+            queue.create(campaign_id, template_name, [user['id'] for user in users], filters)
+            known_users = {user['id']: user for user in users}
+            print(f"Campanha {campaign_id} criada com {len(users)} usuários. Enviando e-mails...")
+
+        def fetch_users(user_ids):
+            missing = [user_id for user_id in user_ids if user_id not in known_users]
+            users = [known_users.pop(user_id) for user_id in user_ids if user_id in known_users]
+            if missing:
+                users.extend(filter_users(session, {**filters, 'user_id': missing}, chunk_size, workers))
+            return users
+
+        with Delivery(
+            smtp_config,
+            concurrency=delivery_config.get('concurrency', 4),
+            retries=delivery_config.get('retries', 3),
+            backoff=delivery_config.get('backoff', 1.0),
+            rate=args.rate or delivery_config.get('rate'),
+        ) as delivery:
+
+            def send_batch(users, on_outcome):
+                messages, rejected = template.render_all(users)
+                outcomes = [
+                    Outcome(user['id'], user['email'], False, 0, error)
+                    for user, error in rejected
+                ]
+                for outcome in outcomes:
+                    print_outcome(outcome)
+
+                def report_outcome(outcome):
+                    print_outcome(outcome)
+                    on_outcome(outcome)
 
-        if not users:
-            print("Nenhum usuário encontrado com os filtros aplicados.")
-            return
+                report = delivery.send_all(
+                    (
+                        (user['id'], template.from_addr, user['email'], message)
+                        for user, message in messages
+                    ),
+                    on_outcome=report_outcome,
+                )
+                return outcomes + report.outcomes
 
-        print(f"Encontrados {len(users)} usuários. Enviando e-mails...")
+            progress = run_campaign(
+                queue,
+                campaign_id,
+                fetch_users,
+                send_batch,
+                campaign_config.get('batch_size', 500),
+                # Várias renovações dentro de stale_after
+                refresh_every=stale_after / 5,
+            )
 
-        for user in users:
-            try:
-                send_email(smtp_config, email_config, user)
-            except Exception as e:
-                print(f"Falha ao processar usuário {user['id']}: {e}")
-                continue
+        print(f"Campanha {campaign_id} finalizada: {progress['sent']} enviados, "
+              f"{progress['failed']} falhas, {progress['claimed']} reservados por outra execução.")
 
     finally:
         session.close()
+        queue.close()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,155 @@
+import binascii
+import re
+import uuid
+from functools import lru_cache
+from email.headerregistry import Address
+from email.message import EmailMessage
+from email.policy import SMTP
+
+from jinja2 import Environment
+
+DEFAULT_TEMPLATE = "default"
+
+LINE_BREAKS = re.compile(r"[\r\n]+")
+
+# Marcadores do esqueleto; o de destinatário precisa ser um endereço válido
+TO = f"notif-{uuid.uuid4().hex}@to.invalid"
+SUBJECT = f"__NOTIF_SUBJECT_{uuid.uuid4().hex}__"
+BODY = f"__NOTIF_BODY_{uuid.uuid4().hex}__"
+
+# Bytes por linha de base64, como no EmailMessage (76 caracteres por linha)
+BASE64_LINE_BYTES = SMTP.max_line_length // 4 * 3
+
+
+def header_text(value):
+    """
+    Texto renderizado de um template pronto para um cabeçalho: quebras de
+    linha viram espaço, para que um valor vindo do usuário não consiga
+    injetar cabeçalhos (ex.: "Bob\\nBcc: ...")
+    """
+    return LINE_BREAKS.sub(" ", value).strip()
+
+
+def recipient(email):
+    """Endereço do destinatário; ValueError se não for um endereço válido"""
+    try:
+        return Address(addr_spec=email)
+    except (ValueError, IndexError) as e:
+        raise ValueError(f"Destinatário inválido: {email!r}") from e
+
+
+def sender(from_addr):
+    """Valida o remetente: um único endereço completo, sem quebras de linha"""
+    if LINE_BREAKS.search(from_addr):
+        raise ValueError(f"Remetente inválido: {from_addr!r}")
+    header = SMTP.header_factory("From", from_addr)
+    if len(header.addresses) != 1 or header.defects:
+        raise ValueError(f"Remetente inválido: {from_addr!r}")
+    return from_addr
+
+
+def fold_header(name, value):
+    """Linha do cabeçalho como o EmailMessage a escreve (RFC 2047, CRLF)"""
+    return SMTP.header_factory(name, value).fold(policy=SMTP)
+
+
+@lru_cache(maxsize=1024)
+def fold_subject(subject):
+    """Assuntos sem variáveis do usuário são iguais em toda a campanha"""
+    return fold_header("Subject", subject)
+
+
+def encode_body(body):
+    """Corpo em base64 como o EmailMessage com cte="base64" o escreve"""
+    data = b"\r\n".join(body.encode("utf-8").splitlines()) + b"\r\n"
+    return "".join(
+        binascii.b2a_base64(data[start:start + BASE64_LINE_BYTES], newline=False).decode("ascii")
+        + "\r\n"
+        for start in range(0, len(data), BASE64_LINE_BYTES)
+    )
+
+
+class MessageTemplate:
+    """
+    Template de e-mail compilado uma vez por execução.
+
+    O MIME é montado uma única vez pelo EmailMessage (política SMTP) como
+    esqueleto com marcadores; para cada destinatário só o assunto e o corpo
+    são renderizados, e a mensagem final é a junção do esqueleto com as
+    linhas de To e Subject e o corpo em base64. O destinatário é validado
+    como endereço e o assunto perde as quebras de linha, então nenhum valor
+    do usuário injeta cabeçalhos.
+    """
+
+    def __init__(self, env, from_addr, subject, body):
+        self.from_addr = sender(from_addr)
+        self.subject = env.from_string(subject)
+        self.body = env.from_string(body)
+        self._skeleton = self._build_skeleton(from_addr)
+
+    @staticmethod
+    def _build_skeleton(from_addr):
+        msg = EmailMessage(policy=SMTP)
+        msg['From'] = from_addr
+        msg['To'] = TO
+        msg['Subject'] = SUBJECT
+        msg.set_content("", charset="utf-8", cte="base64")
+        msg.set_payload(BODY)
+
+        skeleton = msg.as_string()
+        head, rest = skeleton.split(fold_header("To", TO))
+        middle, rest = rest.split(fold_header("Subject", SUBJECT))
+        before_body, tail = rest.split(BODY)
+        # O gerador termina o payload com CRLF; o corpo codificado já traz o seu
+        return head, middle, before_body, tail.removeprefix("\r\n")
+
+    def render(self, user):
+        """
+        Mensagem completa para um destinatário. ValueError se o e-mail do
+        destinatário não for um endereço válido.
+        """
+        to = str(recipient(user['email']))
+        to_line = f"To: {to}\r\n" if to.isascii() else fold_header("To", to)
+        subject_line = fold_subject(header_text(self.subject.render(**user)))
+        body = encode_body(self.body.render(**user))
+
+        head, middle, before_body, tail = self._skeleton
+        return "".join((head, to_line, middle, subject_line, before_body, body, tail))
+
+    def render_all(self, users):
+        """
+        Renderiza as mensagens de todos os usuários. Retorna
+        ([(usuário, mensagem)], [(usuário, erro)]): um destinatário inválido
+        não impede o envio dos demais.
+        """
+        messages, rejected = [], []
+        for user in users:
+            try:
+                messages.append((user, self.render(user)))
+            except ValueError as e:
+                rejected.append((user, str(e)))
+        return messages, rejected
+
+
+def load_templates(email_config, templates_config=None):
+    """
+    Compila os templates nomeados de `templates` no config.yaml. O assunto e
+    o corpo definidos direto em `email` formam o template "default".
+    """
+    env = Environment(autoescape=False)
+    definitions = dict(templates_config or {})
+    if 'body' in email_config:
+        definitions.setdefault(DEFAULT_TEMPLATE, {
+            'subject': email_config['subject'],
+            'body': email_config['body'],
+        })
+
+    return {
+        name: MessageTemplate(
+            env,
+            definition.get('from', email_config['from']),
+            definition['subject'],
+            definition['body'],
+        )
+        for name, definition in definitions.items()
+    }
@@ -0,0 +1,195 @@
+import sqlite3
+import pytest
+from campaign import CLAIMED, FAILED, PENDING, SENT, CampaignQueue, run_campaign
+from delivery import Outcome
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "campaigns.sqlite3")
+
+
+@pytest.fixture
+def queue(path):
+    queue = CampaignQueue(path)
+    yield queue
+    queue.close()
+
+
+def backdate_claims(queue, campaign_id, timestamp="2000-01-01T00:00:00"):
+    queue.connection.execute(
+        "UPDATE recipients SET updated_at = ? WHERE campaign_id = ? AND status = ?",
+        (timestamp, campaign_id, CLAIMED))
+
+
+def make_sender(sent_to, fail=()):
+    def send_batch(users, on_outcome):
+        outcomes = []
+        for user in users:
+            outcome = Outcome(user['id'], user['email'], user['id'] not in fail, 1)
+            if outcome.sent:
+                sent_to.append(user['id'])
+            on_outcome(outcome)
+            outcomes.append(outcome)
+        return outcomes
+    return send_batch
+
+
+def fetch(user_ids):
+    return [{'id': user_id, 'email': f"user{user_id}@example.com"} for user_id in user_ids]
+
+
+def test_claim_mark_and_progress(queue):
+    queue.create("c1", "default", [3, 1, 2, 2], {"role_id": 2})
+
+    assert queue.exists("c1") and queue.template("c1") == "default"
+    assert queue.claim("c1", 2) == [1, 2]
+    assert queue.claim("c1", 5) == [3]
+    assert queue.claim("c1", 5) == []
+
+    queue.mark("c1", [(1, True, None), (2, False, "recusado")])
+    assert queue.progress("c1") == {PENDING: 0, CLAIMED: 1, SENT: 1, FAILED: 1, "total": 3}
+
+    assert queue.retry_failed("c1") == 1
+    assert queue.claim("c1", 5) == [2]
+
+
+def test_claims_are_atomic_across_connections(path, queue):
+    queue.create("c1", "default", range(10))
+    other = CampaignQueue(path)
+    try:
+        first = queue.claim("c1", 6)
+        second = other.claim("c1", 6)
+    finally:
+        other.close()
+    assert not set(first) & set(second)
+    assert sorted(first + second) == list(range(10))
+
+
+def test_release_claimed_only_returns_stale_claims(queue):
+    queue.create("c1", "default", [1, 2])
+    queue.claim("c1", 1)
+    assert queue.release_claimed("c1", older_than=300) == 0
+
+    backdate_claims(queue, "c1")
+    assert queue.release_claimed("c1", older_than=300) == 1
+    assert queue.progress("c1")[PENDING] == 2
+
+
+def test_refresh_keeps_live_claims_from_being_released(queue):
+    queue.create("c1", "default", [1, 2])
+    queue.claim("c1", 2)
+    queue.mark("c1", [(1, True, None)])
+    backdate_claims(queue, "c1")
+
+    queue.refresh("c1", [1, 2])
+
+    assert queue.release_claimed("c1", older_than=300) == 0
+    assert queue.progress("c1")[SENT] == 1
+
+
+def test_filters_are_stored_with_the_campaign(path, queue):
+    filters = {"role_id": 2, "disabled": False, "email_domain": "@example.com"}
+    queue.create("c1", "default", [1], filters)
+    queue.close()
+
+    reopened = CampaignQueue(path)
+    try:
+        assert reopened.filters("c1") == filters
+        assert reopened.filters("outra") is None
+    finally:
+        reopened.close()
+
+
+def test_opens_files_created_before_the_filters_column(path):
+    connection = sqlite3.connect(path)
+    connection.executescript("""
+        CREATE TABLE campaigns (id TEXT PRIMARY KEY, template TEXT NOT NULL, created_at TEXT NOT NULL);
+        INSERT INTO campaigns VALUES ('antiga', 'default', '2024-01-01T00:00:00');
+    """)
+    connection.close()
+
+    queue = CampaignQueue(path)
+    try:
+        assert queue.filters("antiga") is None
+        queue.create("nova", "default", [1], {"role_id": 1})
+        assert queue.filters("nova") == {"role_id": 1}
+    finally:
+        queue.close()
+
+
+def test_run_campaign_sends_everyone_once(queue):
+    queue.create("c1", "default", range(1, 8))
+    sent_to = []
+
+    progress = run_campaign(queue, "c1", fetch, make_sender(sent_to, fail={4}), batch_size=3)
+
+    assert sorted(sent_to) == [1, 2, 3, 5, 6, 7]
+    assert progress[SENT] == 6 and progress[FAILED] == 1 and progress[PENDING] == 0
+
+
+def test_missing_users_are_marked_failed(queue):
+    queue.create("c1", "default", [1, 2, 3])
+
+    def fetch_some(user_ids):
+        return [user for user in fetch(user_ids) if user['id'] != 2]
+
+    progress = run_campaign(queue, "c1", fetch_some, make_sender([]), batch_size=10)
+
+    assert progress[SENT] == 2 and progress[FAILED] == 1
+
+
+def test_resume_after_interruption_skips_sent_recipients(path, queue):
+    queue.create("c1", "default", range(1, 11))
+    sent_to = []
+    send = make_sender(sent_to)
+    batches = []
+
+    def interrupted(users, on_outcome):
+        batches.append(users)
+        if len(batches) == 3:
+            raise KeyboardInterrupt
+        return send(users, on_outcome)
+
+    with pytest.raises(KeyboardInterrupt):
+        run_campaign(queue, "c1", fetch, interrupted, batch_size=3)
+    assert sorted(sent_to) == [1, 2, 3, 4, 5, 6]
+    assert queue.progress("c1")[CLAIMED] == 3
+
+    # A retomada devolve as reservas da execução que caiu e envia o resto
+    resumed = CampaignQueue(path)
+    try:
+        backdate_claims(resumed, "c1")
+        assert resumed.release_claimed("c1", older_than=300) == 3
+        progress = run_campaign(resumed, "c1", fetch, send, batch_size=3)
+    finally:
+        resumed.close()
+
+    assert sorted(sent_to) == list(range(1, 11))
+    assert progress[SENT] == 10 and progress[CLAIMED] == 0
+
+
+def test_slow_batch_is_not_released_by_a_concurrent_resume(path, queue):
+    queue.create("c1", "default", range(1, 5))
+    sent_to = []
+    send = make_sender(sent_to)
+    released = []
+
+    def slow(users, on_outcome):
+        # Simula um lote que já passou de stale_after (ex.: --rate baixo);
+        # a renovação a cada envio impede que outra execução o devolva
+        backdate_claims(queue, "c1")
+        other = CampaignQueue(path)
+        try:
+            for user in users:
+                send([user], on_outcome)
+                released.append(other.release_claimed("c1", older_than=300))
+        finally:
+            other.close()
+        return [Outcome(user['id'], user['email'], True, 1) for user in users]
+
+    progress = run_campaign(queue, "c1", fetch, slow, batch_size=10, refresh_every=0)
+
+    assert released == [0, 0, 0, 0]
+    assert sorted(sent_to) == [1, 2, 3, 4]
+    assert progress[SENT] == 4
@@ -0,0 +1,304 @@
+import base64
+import datetime
+import smtplib
+import socketserver
+import ssl
+import threading
+import time
+import pytest
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+from cryptography.x509.oid import NameOID
+from delivery import Delivery, SMTPPool, is_transient
+
+USER, PASSWORD = "notif", "senha"
+
+
+class Session:
+    """O que o servidor viu em uma conexão"""
+
+    def __init__(self):
+        self.tls = False
+        self.logins = 0
+        self.messages = []
+        self.quit = False
+        self.closed = False
+
+
+class SMTPStub(socketserver.StreamRequestHandler):
+    """
+    Servidor SMTP mínimo sobre um socket real (EHLO, STARTTLS, AUTH PLAIN,
+    MAIL, RCPT, DATA, RSET, QUIT). Cada mensagem consome a próxima ação de
+    `failures`: None aceita, ("rcpt", código) ou ("data", código) respondem
+    com o código nessa etapa e ("disconnect",) derruba a conexão no MAIL.
+    """
+
+    sessions = []
+    failures = []
+    lock = threading.Lock()
+    tls_context = None
+    active = 0
+    max_active = 0
+
+    def reply(self, line):
+        self.wfile.write(f"{line}\r\n".encode())
+        self.wfile.flush()
+
+    def handle(self):
+        session = Session()
+        with SMTPStub.lock:
+            SMTPStub.sessions.append(session)
+            SMTPStub.active += 1
+            SMTPStub.max_active = max(SMTPStub.max_active, SMTPStub.active)
+        try:
+            self.reply("220 stub ESMTP")
+            self.serve(session)
+        except (ConnectionError, ssl.SSLError):
+            pass
+        finally:
+            with SMTPStub.lock:
+                SMTPStub.active -= 1
+            session.closed = True
+
+    def serve(self, session):
+        failure = None
+        while line := self.rfile.readline():
+            command, _, argument = line.decode().rstrip("\r\n").partition(" ")
+            command = command.upper()
+
+            if command == "EHLO":
+                extensions = ["AUTH PLAIN"] if session.tls else ["STARTTLS"]
+                self.reply("250-stub")
+                self.reply(f"250 {extensions[0]}")
+            elif command == "STARTTLS":
+                self.reply("220 pronto para TLS")
+                self.request = SMTPStub.tls_context.wrap_socket(self.request, server_side=True)
+                self.rfile = self.request.makefile("rb")
+                self.wfile = self.request.makefile("wb")
+                session.tls = True
+            elif command == "AUTH":
+                _, user, password = base64.b64decode(argument.split()[1]).split(b"\0")
+                if (user.decode(), password.decode()) != (USER, PASSWORD):
+                    self.reply("535 5.7.8 senha invalida")
+                    continue
+                session.logins += 1
+                self.reply("235 ok")
+            elif command == "MAIL":
+                with SMTPStub.lock:
+                    failure = SMTPStub.failures.pop(0) if SMTPStub.failures else None
+                if failure == ("disconnect",):
+                    return
+                self.reply("250 ok")
+            elif command == "RCPT":
+                if failure and failure[0] == "rcpt":
+                    self.reply(f"{failure[1]} recusado")
+                else:
+                    self.reply("250 ok")
+            elif command == "DATA":
+                self.reply("354 fim com .")
+                data = []
+                while (chunk := self.rfile.readline()) != b".\r\n":
+                    data.append(chunk)
+                if failure and failure[0] == "data":
+                    self.reply(f"{failure[1]} tente mais tarde")
+                else:
+                    session.messages.append(b"".join(data).decode())
+                    self.reply("250 aceito")
+            elif command == "RSET":
+                failure = None
+                self.reply("250 ok")
+            elif command == "QUIT":
+                session.quit = True
+                self.reply("221 tchau")
+                return
+            else:
+                self.reply("502 nao implementado")
+
+
+def self_signed_context(directory):
+    key = ec.generate_private_key(ec.SECP256R1())
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "localhost")])
+    now = datetime.datetime.now(datetime.timezone.utc)
+    certificate = (
+        x509.CertificateBuilder()
+        .subject_name(name).issuer_name(name)
+        .public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now - datetime.timedelta(days=1))
+        .not_valid_after(now + datetime.timedelta(days=1))
+        .sign(key, hashes.SHA256())
+    )
+    cert_path, key_path = directory / "cert.pem", directory / "key.pem"
+    cert_path.write_bytes(certificate.public_bytes(serialization.Encoding.PEM))
+    key_path.write_bytes(key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption(),
+    ))
+    context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+    context.load_cert_chain(cert_path, key_path)
+    return context
+
+
+@pytest.fixture(scope="module")
+def tls_context(tmp_path_factory):
+    return self_signed_context(tmp_path_factory.mktemp("smtp"))
+
+
+@pytest.fixture
+def smtp_config(tls_context):
+    SMTPStub.sessions = []
+    SMTPStub.failures = []
+    SMTPStub.active = SMTPStub.max_active = 0
+    SMTPStub.tls_context = tls_context
+
+    server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), SMTPStub)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True)
+    thread.start()
+    yield {
+        "host": "127.0.0.1",
+        "port": server.server_address[1],
+        "user": USER,
+        "password": PASSWORD,
+        "timeout": 5,
+    }
+    server.shutdown()
+    server.server_close()
+
+
+def wait_for(condition, timeout=2.0):
+    # O servidor percebe o fim da conexão na thread dele
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "condição não atingida"
+        time.sleep(0.01)
+
+
+def messages(count):
+    return [
+        (user_id, "no-reply@example.com", f"user{user_id}@example.com", f"mensagem {user_id}")
+        for user_id in range(count)
+    ]
+
+
+def test_connections_are_authenticated_once_and_reused(smtp_config):
+    with Delivery(smtp_config, concurrency=1, backoff=0) as sender:
+        first = sender.send_all(messages(3))
+        second = sender.send_all(messages(2))
+
+    assert first.sent == 3 and second.sent == 2
+    [session] = SMTPStub.sessions
+    assert session.tls and session.logins == 1
+    assert [message.strip() for message in session.messages] == [
+        "mensagem 0", "mensagem 1", "mensagem 2", "mensagem 0", "mensagem 1"]
+    assert session.quit
+
+
+def test_send_all_shares_the_pool_between_threads(smtp_config):
+    received = []
+
+    with Delivery(smtp_config, concurrency=3, backoff=0) as sender:
+        report = sender.send_all(messages(12), on_outcome=received.append)
+
+    assert report.sent == 12
+    assert [outcome.user_id for outcome in report.outcomes] == list(range(12))
+    assert received == report.outcomes
+    assert 1 <= len(SMTPStub.sessions) <= 3 and SMTPStub.max_active <= 3
+    assert all(session.logins == 1 and session.quit for session in SMTPStub.sessions)
+    assert sorted(
+        message.strip() for session in SMTPStub.sessions for message in session.messages
+    ) == sorted(f"mensagem {user_id}" for user_id in range(12))
+
+
+def test_transient_refusal_is_retried_on_the_same_connection(smtp_config):
+    SMTPStub.failures = [("data", 451)]
+
+    with Delivery(smtp_config, concurrency=1, backoff=0) as sender:
+        outcome = sender.send("no-reply@example.com", "ana@example.com", "oi", user_id=1)
+
+    assert outcome.sent and outcome.attempts == 2
+    [session] = SMTPStub.sessions
+    assert len(session.messages) == 1
+
+
+def test_disconnect_discards_the_connection_and_reconnects(smtp_config):
+    SMTPStub.failures = [("disconnect",)]
+
+    with Delivery(smtp_config, concurrency=1, backoff=0) as sender:
+        outcome = sender.send("no-reply@example.com", "ana@example.com", "oi", user_id=1)
+
+    assert outcome.sent and outcome.attempts == 2
+    broken, fresh = SMTPStub.sessions
+    assert broken.closed and not broken.messages and not broken.quit
+    assert fresh.logins == 1 and len(fresh.messages) == 1
+
+
+def test_permanent_refusal_is_not_retried(smtp_config):
+    SMTPStub.failures = [("rcpt", 550)]
+
+    with Delivery(smtp_config, concurrency=1, retries=3, backoff=0) as sender:
+        report = sender.send_all(messages(2))
+
+    refused, delivered = report.outcomes
+    assert not refused.sent and refused.attempts == 1 and "550" in refused.error
+    assert delivered.sent
+    # Uma recusa não invalida a sessão (sendmail faz RSET): a conexão continua no pool
+    assert len(SMTPStub.sessions) == 1
+
+
+def test_gives_up_after_the_configured_retries(smtp_config):
+    SMTPStub.failures = [("disconnect",)] * 3
+
+    with Delivery(smtp_config, concurrency=1, retries=2, backoff=0) as sender:
+        outcome = sender.send("no-reply@example.com", "ana@example.com", "oi")
+
+    assert not outcome.sent and outcome.attempts == 3
+    assert len(SMTPStub.sessions) == 3
+
+
+def test_failed_connect_frees_the_pool_slot(smtp_config):
+    pool = SMTPPool({**smtp_config, "password": "errada"}, size=1)
+
+    for _ in range(2):
+        with pytest.raises(smtplib.SMTPAuthenticationError) as error:
+            pool.acquire()
+        assert error.value.smtp_code == 535
+    wait_for(lambda: len(SMTPStub.sessions) == 2 and all(
+        session.closed for session in SMTPStub.sessions))
+
+
+@pytest.mark.parametrize("stage, code, transient", [
+    ("data", 421, True),
+    ("data", 451, True),
+    ("data", 554, False),
+    ("rcpt", 450, True),
+    ("rcpt", 550, False),
+])
+def test_is_transient_with_server_replies(smtp_config, stage, code, transient):
+    SMTPStub.failures = [(stage, code)]
+    pool = SMTPPool(smtp_config, size=1)
+    server = pool.acquire()
+
+    with pytest.raises(smtplib.SMTPException) as error:
+        server.sendmail("no-reply@example.com", "ana@example.com", "oi")
+    pool.release(server)
+    pool.close()
+
+    assert is_transient(error.value) is transient
+
+
+def test_is_transient_for_connection_errors(smtp_config):
+    SMTPStub.failures = [("disconnect",)]
+    pool = SMTPPool(smtp_config, size=1)
+    server = pool.acquire()
+
+    with pytest.raises(smtplib.SMTPServerDisconnected) as error:
+        server.sendmail("no-reply@example.com", "ana@example.com", "oi")
+    pool.release(server, broken=True)
+
+    assert is_transient(error.value)
+    assert is_transient(ConnectionResetError())
+    assert not is_transient(smtplib.SMTPRecipientsRefused({
+        "a@example.com": (450, b"cheia"), "b@example.com": (550, b"nao existe")}))
@@ -0,0 +1,156 @@
+from base64 import b64encode
+from datetime import datetime
+import pytest
+from cryptography.fernet import Fernet
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from db import keys, postgres
+import main
+
+USERS = [
+    # id, nome, e-mail, login, role_id, desabilitado
+    (1, "Alice Souza", "alice@gmail.com", "alice", 2, False),
+    (2, "Bruno Lima", "bruno@empresa.com", "bruno", 2, False),
+    (3, "Carla Alice", "carla@gmail.com", "carla_a", 1, True),
+    (4, "Davi Rocha", "davi@gmail.com", "DAVI", 1, False),
+    (5, "Érica Alves", "erica@empresa.com", "erica", 2, True),
+    (6, "Fábio Nunes", "fabio@gmail.com", "fa%bio", 1, False),
+    (7, "Sem Chave", "semchave@gmail.com", "semchave", 2, False),
+]
+WITHOUT_KEY = {7}
+
+
+def encrypt(value, key):
+    return b64encode(Fernet(key).encrypt(value.encode())).decode()
+
+
+def memory_engine(base):
+    engine = create_engine("sqlite://", poolclass=StaticPool,
+                           connect_args={"check_same_thread": False})
+    base.metadata.create_all(engine)
+    return engine
+
+
+@pytest.fixture
+def session(monkeypatch):
+    users_engine = memory_engine(postgres.Base)
+    keys_engine = memory_engine(keys.Base)
+    users_session = sessionmaker(bind=users_engine)()
+    keys_session = sessionmaker(bind=keys_engine)()
+
+    user_type = keys.EntityType(id=1, name="user")
+    # Mesmo entity_id de outro tipo: a junção com EntityType não pode trazê-lo
+    client_type = keys.EntityType(id=2, name="external_client")
+    keys_session.add_all([user_type, client_type])
+    users_session.add_all([postgres.Role(id=1, name="admin"), postgres.Role(id=2, name="user")])
+
+    for user_id, name, email, login, role_id, disabled in USERS:
+        key = Fernet.generate_key().decode()
+        users_session.add(postgres.User(
+            id=user_id,
+            name=encrypt(name, key),
+            email=encrypt(email, key),
+            login=login,
+            password="hash",
+            role_id=role_id,
+            disabled_since=datetime(2024, 1, 1) if disabled else None,
+        ))
+        # BigInteger não é autoincremento no SQLite: ids explícitos
+        if user_id not in WITHOUT_KEY:
+            keys_session.add(keys.EntityKey(
+                id=user_id, entity_id=user_id, key=key, entity_type=1))
+        keys_session.add(keys.EntityKey(
+            id=100 + user_id, entity_id=user_id, key=Fernet.generate_key().decode(),
+            entity_type=2))
+    users_session.commit()
+    keys_session.commit()
+    keys_session.close()
+
+    monkeypatch.setattr(main, "KeysSession", sessionmaker(bind=keys_engine))
+    yield users_session
+    users_session.close()
+
+
+def ids(users):
+    return [user["id"] for user in users]
+
+
+def test_without_filters_decrypts_everyone_with_a_key(session):
+    users = main.filter_users(session, {}, workers=1)
+
+    assert ids(users) == [1, 2, 3, 4, 5, 6]
+    assert users[0] == {
+        "id": 1, "name": "Alice Souza", "email": "alice@gmail.com", "login": "alice",
+        "role_id": 2, "disabled_since": None,
+    }
+
+
+@pytest.mark.parametrize("filters, expected", [
+    ({"role_id": 2}, [1, 2, 5]),
+    ({"role_id": None}, [1, 2, 3, 4, 5, 6]),
+    ({"disabled": True}, [3, 5]),
+    ({"disabled": False}, [1, 2, 4, 6]),
+    # Como no código original, a chave presente sem valor seleciona os ativos
+    ({"disabled": None}, [1, 2, 4, 6]),
+    ({"email_domain": "@gmail.com"}, [1, 3, 4, 6]),
+    ({"user_id": 4}, [4]),
+    ({"user_id": [2, 3, 7]}, [2, 3]),
+    ({"user_id": []}, [1, 2, 3, 4, 5, 6]),
+    ({"login_conteins": "a"}, [1, 3, 4, 5, 6]),
+    ({"login-conteins": "davi"}, [4]),
+    # % e _ são literais, não curingas do LIKE
+    ({"login_conteins": "%"}, [6]),
+    ({"login_conteins": "_"}, [3]),
+    ({"name_conteins": "alice"}, [1, 3]),
+    ({"name-conteins": "ÉRICA"}, [5]),
+    ({"role_id": 1, "disabled": False, "email_domain": "@gmail.com",
+      "login_conteins": "a", "name_conteins": "o"}, [4, 6]),
+])
+def test_each_filter_key(session, filters, expected):
+    assert ids(main.filter_users(session, filters, workers=1)) == expected
+
+
+@pytest.mark.parametrize("filters, sql", [
+    ({"role_id": 2}, "users.role_id = "),
+    ({"disabled": True}, "users.disabled_since IS NOT NULL"),
+    ({"disabled": None}, "users.disabled_since IS NULL"),
+    ({"user_id": [1, 2]}, "users.id IN "),
+    ({"login_conteins": "a"}, "lower(users.login) LIKE"),
+])
+def test_plain_text_filters_are_pushed_into_sql(session, filters, sql):
+    assert sql in str(main.build_user_query(session, filters))
+
+
+def test_encrypted_filters_stay_out_of_sql(session):
+    statement = str(main.build_user_query(
+        session, {"email_domain": "@gmail.com", "name_conteins": "alice"}))
+
+    assert "WHERE" not in statement
+
+
+def test_keys_are_fetched_per_chunk(session, monkeypatch):
+    requested = []
+    get_user_keys = main.get_user_keys
+
+    def spy(keys_session, user_ids):
+        requested.append(list(user_ids))
+        return get_user_keys(keys_session, user_ids)
+
+    monkeypatch.setattr(main, "get_user_keys", spy)
+
+    users = main.filter_users(session, {"disabled": False}, chunk_size=2, workers=1)
+
+    assert requested == [[1, 2], [4, 6], [7]]
+    assert ids(users) == [1, 2, 4, 6]
+
+
+def test_process_pool_matches_serial_decryption(session):
+    filters = {"email_domain": "@gmail.com", "name_conteins": "a"}
+
+    serial = main.filter_users(session, filters, chunk_size=2, workers=1)
+    parallel = main.filter_users(session, filters, chunk_size=2, workers=2)
+
+    assert parallel == serial
+    assert ids(parallel) == [1, 3, 4]
@@ -0,0 +1,80 @@
+from email import message_from_string, policy
+from email.message import EmailMessage
+import pytest
+from jinja2 import Environment
+from messages import MessageTemplate, header_text, load_templates
+
+
+def make_template(subject="Olá {{ name }}", body="Oi {{ name }}, seu login é {{ login }}"):
+    return MessageTemplate(Environment(), "Sistema <no-reply@example.com>", subject, body)
+
+
+def parse(message):
+    return message_from_string(message, policy=policy.default)
+
+
+def test_renders_encoded_subject_and_body():
+    message = make_template().render(
+        {"name": "João", "login": "joao", "email": "joao@example.com"})
+
+    assert "\r\n" in message
+    parsed = parse(message)
+    assert parsed["From"] == "Sistema <no-reply@example.com>"
+    assert parsed["To"] == "joao@example.com"
+    assert parsed["Subject"] == "Olá João"
+    assert parsed.get_content().rstrip() == "Oi João, seu login é joao"
+
+
+def test_line_breaks_in_templated_subject_do_not_inject_headers():
+    message = make_template().render(
+        {"name": "Bob\nBcc: victim@evil.com", "login": "bob", "email": "bob@example.com"})
+
+    parsed = parse(message)
+    assert parsed["Bcc"] is None
+    assert parsed["Subject"] == "Olá Bob Bcc: victim@evil.com"
+
+
+@pytest.mark.parametrize("user", [
+    {"name": "João", "login": "joao", "email": "joao@example.com"},
+    {"name": "Ção " * 40, "login": "x" * 300, "email": "long@example.com"},
+    {"name": "", "login": "", "email": "empty@example.com"},
+    {"name": "Ana\r\nBcc: victim@evil.com", "login": "ana", "email": '"ana maria"@example.com'},
+])
+def test_skeleton_matches_full_email_message(user):
+    template = make_template(body="Oi {{ name }}\n\nlinha 2 {{ login }}\r\nfim")
+
+    msg = EmailMessage(policy=policy.SMTP)
+    msg["From"] = template.from_addr
+    msg["To"] = user["email"]
+    msg["Subject"] = header_text(template.subject.render(**user))
+    msg.set_content(template.body.render(**user), charset="utf-8", cte="base64")
+
+    assert template.render(user) == msg.as_string()
+
+
+@pytest.mark.parametrize("email", ["bob@example.com\r\nBcc: victim@evil.com", ""])
+def test_invalid_recipient_is_rejected_without_stopping_the_batch(email):
+    users = [
+        {"id": 1, "name": "Bob", "login": "bob", "email": email},
+        {"id": 2, "name": "Ana", "login": "ana", "email": "ana@example.com"},
+    ]
+
+    messages, rejected = make_template().render_all(users)
+
+    assert [user["id"] for user, _ in messages] == [2]
+    assert [user["id"] for user, _ in rejected] == [1]
+    assert "Destinatário inválido" in rejected[0][1]
+
+
+@pytest.mark.parametrize("from_addr", [
+    "no-reply@example.com\nBcc: victim@evil.com",
+    "no-reply",
+    "a@example.com, b@example.com",
+])
+def test_invalid_sender_fails_when_loading_templates(from_addr):
+    with pytest.raises(ValueError, match="Remetente inválido"):
+        load_templates({
+            "from": from_addr,
+            "subject": "Oi",
+            "body": "Oi",
+        })
@@ -2,7 +2,7 @@ import {
   filterListSchema,
   YieldDataResponse,
 } from '../schemas/DashboardSchema';
-import { processGET, processPOST } from './service';
+import { processGET } from './service';
 
 export interface FilterParams {
   crop_year?: number | number[];
@@ -14,16 +14,19 @@ export interface FilterParams {
 export async function fetchYieldData(
   filters: FilterParams = {}
 ): Promise<YieldDataResponse> {
-  const requestBody = {
-    ...(filters.crop_year && { crop_year: filters.crop_year }),
-    ...(filters.season && { season: filters.season }),
-    ...(filters.crop && { crop: filters.crop }),
-    ...(filters.state && { state: filters.state }),
-  };
+  // GET com os filtros na query string: o navegador guarda a resposta e a
+  // revalida com If-None-Match (304 quando os dados não mudaram)
+  const params = new URLSearchParams();
+  for (const [field, value] of Object.entries(filters)) {
+    if (!value) continue;
+    for (const item of Array.isArray(value) ? value : [value]) {
+      params.append(field, String(item));
+    }
+  }
+  const query = params.toString();
 
-  return await processPOST<FilterParams, YieldDataResponse>({
-    path: '/dashboard/',
-    body: requestBody,
+  return await processGET<YieldDataResponse>({
+    path: `/dashboard/${query ? `?${query}` : ''}`,
   });
 }
 